@@ -0,0 +1,167 @@
+import os
+import sys
+import csv
+import json
+import time
+import typing
+import argparse
+import itertools
+import concurrent.futures
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from game import Game
+
+# config keys a sweep can vary, with the flag that sets them
+SWEEP_KEYS = {
+    'n_minotaurs': 'n-minotaurs',
+    'size': 'size',
+    'match_time': 'match-time',
+    'loop_precent': 'loop-precent',
+}
+FIELDS = ['seed', 'n_minotaurs', 'rows', 'cols', 'match_time', 'loop_precent', 'status', 'ticks', 'elapsed', 'time_to_catch', 'spawn_distance', 'player_moves']
+
+class _MoveCounter:
+    # wraps the bot and counts how many cells the player walks through
+    def __init__(self, controller) -> None:
+        self.controller = controller
+        self.cell = None
+        self.moves = 0
+
+    def __call__(self, app: Game) -> int:
+        cell = app.maze.get_cell(app.player.rect.center)
+        if cell != self.cell:
+            self.moves += self.cell is not None
+            self.cell = cell
+        return self.controller(app)
+
+def play(config: dict) -> dict:
+    game = Game(config, headless = True)
+    counter = game.controller = _MoveCounter(game.controller)
+    result = game.simulate()
+
+    from_start = game.maze.distance_field([game.maze.grid[0][0]])
+    spawn_distances = [from_start[game.maze.index_of(cell.pos)] for cell in game.spawn_cells]
+
+    return {
+        'seed': config['seed'],
+        'n_minotaurs': config['n_minotaurs'],
+        'rows': game.maze.rows,
+        'cols': game.maze.cols,
+        'match_time': config['match_time'],
+        'loop_precent': game.maze.loop_precent,
+        'status': result.status,
+        'ticks': result.ticks,
+        'elapsed': round(result.elapsed, 4),
+        'time_to_catch': None if result.time_to_catch is None else round(result.time_to_catch, 4),
+        'spawn_distance': min(spawn_distances) if spawn_distances else None,
+        'player_moves': counter.moves,
+    }
+
+def jobs(base: dict, sweep: typing.Dict[str, list], matches: int, seed: int) -> typing.Iterator[dict]:
+    # every combination plays the same seeds, so combinations can be compared match for match
+    keys = list(sweep)
+    for values in itertools.product(*(sweep[key] for key in keys)):
+        config = dict(base)
+        for key, value in zip(keys, values):
+            if key == 'size':
+                config['rows'], config['cols'] = value
+            else:
+                config[key] = value
+        for index in range(matches):
+            yield dict(config, seed = seed + index)
+
+class Writer:
+    def __init__(self, path: typing.Optional[str]) -> None:
+        self.file = open(path, 'w', newline = '') if path else None
+        self.csv = None
+        if self.file and path.endswith('.csv'):
+            self.csv = csv.DictWriter(self.file, fieldnames = FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row: dict):
+        if self.csv:
+            self.csv.writerow(row)
+        elif self.file:
+            self.file.write(json.dumps(row) + '\n')
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+def summarise(rows: typing.List[dict]) -> typing.List[dict]:
+    groups: typing.Dict[tuple, typing.List[dict]] = {}
+    for row in rows:
+        groups.setdefault((row['n_minotaurs'], row['rows'], row['cols'], row['match_time'], row['loop_precent']), []).append(row)
+
+    summary = []
+    for (n_minotaurs, rows_, cols, match_time, loop_precent), group in groups.items():
+        caught = [row['time_to_catch'] for row in group if row['time_to_catch'] is not None]
+        spawns = [row['spawn_distance'] for row in group if row['spawn_distance'] is not None]
+        summary.append({
+            'n_minotaurs': n_minotaurs,
+            'rows': rows_,
+            'cols': cols,
+            'match_time': match_time,
+            'loop_precent': loop_precent,
+            'matches': len(group),
+            'win_rate': sum(row['status'] == 'won' for row in group) / len(group),
+            'mean_catch_time': sum(caught) / len(caught) if caught else None,
+            'mean_spawn_distance': sum(spawns) / len(spawns) if spawns else None,
+            'mean_player_moves': sum(row['player_moves'] for row in group) / len(group),
+        })
+    return summary
+
+def parse_list(text: str, kind = int) -> list:
+    return [kind(value) for value in text.split(',')]
+
+def parse_size(text: str) -> typing.Tuple[int, int]:
+    rows, cols = text.lower().split('x')
+    return int(rows), int(cols)
+
+def main(argv: typing.Optional[typing.List[str]] = None):
+    parser = argparse.ArgumentParser(prog = 'python -m game --batch', description = 'Run seeded headless matches over a config sweep')
+    parser.add_argument('--config', default = 'config.json')
+    parser.add_argument('--matches', type = int, default = 100, help = 'matches per combination')
+    parser.add_argument('--seed', type = int, default = 0, help = 'first seed, match i uses seed + i')
+    parser.add_argument('--workers', type = int, default = None, help = 'processes, defaults to the cpu count')
+    parser.add_argument('--out', default = None, help = 'stream every match to a .jsonl or .csv file')
+    parser.add_argument('--summary', default = None, help = 'write the per combination summary as json')
+    parser.add_argument('--n-minotaurs', type = parse_list, default = None, help = 'e.g. 1,2,4')
+    parser.add_argument('--size', type = lambda text: [parse_size(size) for size in text.split(',')], default = None, help = 'ROWSxCOLS list, e.g. 10x22,20x40')
+    parser.add_argument('--match-time', type = parse_list, default = None, help = 'seconds, e.g. 30,60')
+    parser.add_argument('--loop-precent', type = parse_list, default = None, help = 'e.g. 0,20,50')
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        base = json.loads(f.read())
+    base['debug'] = False
+
+    sweep = {}
+    for key, flag in SWEEP_KEYS.items():
+        values = getattr(args, flag.replace('-', '_'))
+        if values:
+            sweep[key] = values
+
+    writer = Writer(args.out)
+    rows = []
+    started_at = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers = args.workers) as pool:
+        # map keeps submission order, so the output file is the same for the same arguments
+        for row in pool.map(play, jobs(base, sweep, args.matches, args.seed), chunksize = 8):
+            writer.write(row)
+            rows.append(row)
+    writer.close()
+    took = time.perf_counter() - started_at
+
+    summary = summarise(rows)
+    for line in summary:
+        print(json.dumps(line))
+    print('{} matches in {:.1f} s ({:.0f} matches/min)'.format(len(rows), took, len(rows) / took * 60), file = sys.stderr)
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent = 4)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import os
+import shutil
+import argparse
+import tempfile
+
+import pygame
+
+import common
+from utils import load_atlas
+from utils.assets import BACKGROUND, SPRITE_FOLDERS, FACES
+
+def legacy(size, background_size):
+    # what Game.load_assets used to do: listdir order, decode and scale one file at a time
+    assets = {}
+    for folder in SPRITE_FOLDERS:
+        for face in FACES:
+            directory = os.path.join('assets', folder, face)
+            assets.setdefault(folder, {})[face] = [
+                pygame.transform.scale(pygame.image.load(os.path.join(directory, file)), size) for file in os.listdir(directory)
+            ]
+    return assets, pygame.transform.scale(pygame.image.load(BACKGROUND), background_size)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Start-up cost of loading sprites and the background')
+    parser.add_argument('--repeat', type = int, default = 5)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    size, background_size = (40, 40), (1280, 720)
+    cache_dir = tempfile.mkdtemp()
+    try:
+        for name, function in [
+            ('sequential decode', lambda: legacy(size, background_size)),
+            ('atlas, cold cache', lambda: (shutil.rmtree(cache_dir, ignore_errors = True), load_atlas(size, background_size, cache_dir = cache_dir))),
+            ('atlas, warm cache', lambda: load_atlas(size, background_size, cache_dir = cache_dir)),
+        ]:
+            print('{:18} {}'.format(name, common.summary(common.timeit(function, args.repeat))))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors = True)
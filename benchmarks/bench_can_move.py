@@ -0,0 +1,46 @@
+import argparse
+import random
+import time
+
+import pygame
+
+from common import parse_sizes, make_maze, window_for
+
+def bench(rows: int, cols: int, moves: int, cell_size: int, seed: int = 0):
+    maze = make_maze(rows, cols, seed = seed, window_size = window_for(rows, cols, cell_size = cell_size))
+    maze.draw_grid() # fills maze.rects, the list the old can_move scanned
+
+    rng = random.Random(seed)
+    size = int(maze.cell_size * 0.8)
+    rects = [
+        pygame.Rect(
+            rng.randrange(int(maze.offset.x), int(maze.offset.x) + cols * maze.cell_size - size),
+            rng.randrange(int(maze.offset.y), int(maze.offset.y) + rows * maze.cell_size - size),
+            size, size
+        ) for _ in range(moves)
+    ]
+
+    started_at = time.perf_counter()
+    legacy = [rect.collidelist(maze.rects) == -1 for rect in rects]
+    legacy_time = time.perf_counter() - started_at
+
+    maze.can_move(rects[0], rects[0]) # build the index outside the timing
+    started_at = time.perf_counter()
+    indexed = [maze.can_move(rect, rect) for rect in rects]
+    indexed_time = time.perf_counter() - started_at
+
+    mismatches = sum(a != b for a, b in zip(legacy, indexed))
+    print('{:>4}x{:<4} walls {:7d}  collidelist {:8.2f} us  wall index {:6.2f} us  speedup {:7.1f}x  mismatches {}'.format(
+        rows, cols, len(maze.rects), legacy_time / moves * 1e6, indexed_time / moves * 1e6, legacy_time / indexed_time, mismatches
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Maze.can_move wall index vs a linear collidelist over every wall')
+    parser.add_argument('--sizes', default = '10x22,50x50,100x100,200x200')
+    parser.add_argument('--moves', type = int, default = 2000)
+    parser.add_argument('--cell-size', type = int, default = 10)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for rows, cols in parse_sizes(args.sizes):
+        bench(rows, cols, moves = args.moves, cell_size = args.cell_size, seed = args.seed)
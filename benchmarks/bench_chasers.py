@@ -0,0 +1,60 @@
+import time
+import random
+import typing
+import argparse
+
+import pygame
+
+from common import make_maze, placeholder_assets, summary, window_for
+from utils import IDK, PathScheduler
+
+def bench(rows: int, cols: int, n_minotaurs: int, frames: int, pathing: str, budget: int, budget_us: typing.Optional[float] = None, seed: int = 0):
+    maze = make_maze(rows, cols, seed = seed, window_size = window_for(rows, cols))
+    app = maze.app
+    app.config['pathing'] = pathing
+    if pathing == 'scheduled':
+        app.pathfinder = PathScheduler(maze, budget = budget, budget_us = budget_us)
+    app.assets = {'minotaur': placeholder_assets()}
+    app.player = pygame.sprite.Sprite()
+    app.player.rect = pygame.Rect(0, 0, 40, 40)
+    app.player.rect.center = maze.grid[0][0].rect.center
+
+    rng = random.Random(seed)
+    sprites = pygame.sprite.Group()
+    for _ in range(n_minotaurs):
+        cell = maze.grid[rng.randrange(cols)][rng.randrange(rows)]
+        sprites.add(IDK(app = app, pos = cell.rect.center))
+
+    timings = []
+    player_cell = maze.grid[0][0]
+    for frame in range(frames):
+        if frame % 15 == 0: # player crosses into a new cell every quarter second
+            player_cell, _ = rng.choice(maze.get_neighbours(player_cell.pos, filter_cant_move = True))
+            app.player.rect.center = player_cell.rect.center
+
+        started_at = time.perf_counter()
+        sprites.update(delta_time = 1 / 60)
+        if app.pathfinder is not None:
+            app.pathfinder.run()
+        timings.append(time.perf_counter() - started_at)
+
+    # a hitch is what the scheduler is for, p99 shows it better than one unlucky max
+    p99 = sorted(timings)[int(len(timings) * 0.99)]
+    print('{:>4}x{:<4} {:11} minotaurs {:5d}  frame {}  p99 {:7.3f} ms  per chaser {:7.2f} us'.format(
+        rows, cols, pathing, n_minotaurs, summary(timings), p99 * 1000, sum(timings) / len(timings) / n_minotaurs * 1e6
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Frame cost of IDK chasers following the shared flow field, their own incremental planners or time sliced A*')
+    parser.add_argument('--rows', type = int, default = 60)
+    parser.add_argument('--cols', type = int, default = 60)
+    parser.add_argument('--counts', default = '1,10,50,100,500,1000')
+    parser.add_argument('--frames', type = int, default = 600)
+    parser.add_argument('--pathing', default = 'field', choices = ['field', 'incremental', 'scheduled'])
+    parser.add_argument('--budget', type = int, default = 500, help = 'node expansions per frame for --pathing scheduled')
+    parser.add_argument('--budget-us', type = float, help = 'microseconds per frame instead')
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for count in args.counts.split(','):
+        bench(args.rows, args.cols, int(count), frames = args.frames, pathing = args.pathing, budget = args.budget, budget_us = args.budget_us, seed = args.seed)
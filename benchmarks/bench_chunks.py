@@ -0,0 +1,48 @@
+import typing
+import argparse
+import tracemalloc
+
+import pygame
+
+from common import parse_sizes, make_app, timeit, summary
+from utils import ChunkedMaze
+
+def walk(rows: int, cols: int, frames: int, speed: int, tile_size: int, max_tiles: int, seed: int) -> typing.Tuple[ChunkedMaze, typing.List[float]]:
+    app = make_app()
+    maze = app.maze = ChunkedMaze(app, rows = rows, cols = cols, seed = seed, tile_size = tile_size, max_tiles = max_tiles)
+    maze.create_maze()
+
+    # a player walking diagonally across the maze, the camera and the chasers' field follow it
+    player = pygame.Rect(0, 0, 40, 40)
+    def frame():
+        player.move_ip(speed, speed // 2)
+        maze.update_camera(player)
+        maze.update_flow_field(maze.get_cell(player.center))
+        maze.draw_grid()
+
+    return maze, timeit(frame, repeat = frames)
+
+def bench(rows: int, cols: int, frames: int, speed: int, tile_size: int, max_tiles: int, seed: int = 0):
+    maze, timings = walk(rows, cols, frames, speed, tile_size, max_tiles, seed)
+
+    # the same walk again under tracemalloc, it slows everything down too much to time it
+    tracemalloc.start()
+    walk(rows, cols, frames, speed, tile_size, max_tiles, seed)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('{:>6}x{:<6} frame {}  tiles {:4d}  memory {:6.1f} MiB  peak {:6.1f} MiB'.format(
+        rows, cols, summary(timings), maze.loaded_tiles, current / 2 ** 20, peak / 2 ** 20
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'ChunkedMaze frame cost and memory while walking across mazes far bigger than the window')
+    parser.add_argument('--sizes', default = '100x100,1000x1000,10000x10000,100000x100000')
+    parser.add_argument('--frames', type = int, default = 600)
+    parser.add_argument('--speed', type = int, default = 4, help = 'pixels per frame, the player moves 2.5 at 60 fps')
+    parser.add_argument('--tile-size', type = int, default = 16)
+    parser.add_argument('--max-tiles', type = int, default = 64)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for rows, cols in parse_sizes(args.sizes):
+        bench(rows, cols, frames = args.frames, speed = args.speed, tile_size = args.tile_size, max_tiles = args.max_tiles, seed = args.seed)
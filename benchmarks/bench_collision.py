@@ -0,0 +1,50 @@
+import argparse
+import random
+import time
+
+import pygame
+
+from common import make_maze
+
+def bench(rows: int, cols: int, step: int, moves: int, seed: int = 0):
+    # random moves of `step` pixels from free spots, the old endpoint test against the swept one
+    maze = make_maze(rows, cols, seed = seed)
+    rng = random.Random(seed)
+    size = int(maze.cell_size * 0.7)
+    starts = []
+    while len(starts) < moves:
+        cell = maze.grid[rng.randrange(cols)][rng.randrange(rows)]
+        rect = pygame.Rect(0, 0, size, size)
+        rect.center = cell.rect.center
+        dx, dy = rng.choice([(step, 0), (-step, 0), (0, step), (0, -step), (step, step), (-step, step)])
+        starts.append((rect, dx, dy))
+
+    tunnelled = 0
+    for rect, dx, dy in starts:
+        if maze.can_move(rect, rect.move(dx, dy)) and maze.sweep(rect, dx, dy)[0] < 1:
+            tunnelled += 1 # the end is free but a wall is in between
+    started_at = time.perf_counter()
+    for rect, dx, dy in starts:
+        maze.can_move(rect, rect.move(dx, 0))
+        maze.can_move(rect, rect.move(0, dy))
+    endpoint = (time.perf_counter() - started_at) / moves
+    started_at = time.perf_counter()
+    for rect, dx, dy in starts:
+        maze.slide(rect, dx, dy)
+    swept = (time.perf_counter() - started_at) / moves
+
+    print('{:>4}x{:<4} step {:4d} px  endpoint {:7.2f} us  swept {:7.2f} us  endpoint test missed a wall {:5.1f}%'.format(
+        rows, cols, step, endpoint * 1e6, swept * 1e6, tunnelled / moves * 100
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Cost of swept collision (Maze.slide) against two can_move calls, and how often the endpoint test tunnels')
+    parser.add_argument('--rows', type = int, default = 10)
+    parser.add_argument('--cols', type = int, default = 22)
+    parser.add_argument('--steps', default = '2,10,25,50,100')
+    parser.add_argument('--moves', type = int, default = 5000)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for step in args.steps.split(','):
+        bench(args.rows, args.cols, int(step), args.moves, seed = args.seed)
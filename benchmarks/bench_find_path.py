@@ -0,0 +1,34 @@
+import argparse
+import random
+import time
+
+from common import parse_sizes, make_maze, summary
+
+def bench(rows: int, cols: int, searches: int, seed: int = 0):
+    started_at = time.perf_counter()
+    maze = make_maze(rows, cols, seed = seed)
+    generated_in = time.perf_counter() - started_at
+
+    rng = random.Random(seed)
+    timings, lengths = [], []
+    for _ in range(searches):
+        start = maze.grid[rng.randrange(cols)][rng.randrange(rows)]
+        end = maze.grid[rng.randrange(cols)][rng.randrange(rows)]
+        started_at = time.perf_counter()
+        path = maze.find_path(start, end)
+        timings.append(time.perf_counter() - started_at)
+        lengths.append(len(path))
+
+    print('{:>5}x{:<5} generate {:8.2f} s  search {}  mean path {:.0f} cells'.format(
+        rows, cols, generated_in, summary(timings), sum(lengths) / len(lengths)
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Per-search latency of Maze.find_path')
+    parser.add_argument('--sizes', default = '10x22,100x100,1000x1000', help = 'comma separated ROWSxCOLS')
+    parser.add_argument('--searches', type = int, default = 20)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for rows, cols in parse_sizes(args.sizes):
+        bench(rows, cols, searches = args.searches, seed = args.seed)
@@ -0,0 +1,48 @@
+import time
+import argparse
+
+from common import parse_sizes, make_app
+from utils import Maze
+
+def check(maze: Maze, loop_precent: int) -> str:
+    # a perfect maze has exactly cells - 1 passages and reaches every cell
+    passages = sum(bin(mask).count('1') for mask in maze.sides) // 2
+    reached = sum(distance != -1 for distance in maze.distance_field([maze.grid[0][0]]))
+    perfect = passages == maze.rows * maze.cols - 1
+    if reached != maze.rows * maze.cols:
+        return 'DISCONNECTED'
+    return 'perfect' if perfect else 'braided (+{} passages)'.format(passages - maze.rows * maze.cols + 1) if loop_precent else 'NOT A TREE'
+
+def bench(rows: int, cols: int, algorithm: str, loop_precent: int, seed: int):
+    app = make_app()
+    app.maze = maze = Maze(app, rows = rows, cols = cols, compact = True, seed = seed)
+    maze.loop_precent = loop_precent
+
+    started_at = time.perf_counter()
+    maze.create_maze(algorithm = None if algorithm == 'legacy' else algorithm)
+    took = time.perf_counter() - started_at
+
+    again = Maze(app, rows = rows, cols = cols, compact = True, seed = seed)
+    again.loop_precent = loop_precent
+    app.maze = again
+    again.create_maze(algorithm = None if algorithm == 'legacy' else algorithm)
+
+    print('{:>5}x{:<5} {:12} {:8.2f} s  {:8.0f} kcells/s  {}  same seed same maze: {}'.format(
+        rows, cols, algorithm, took, rows * cols / took / 1000, check(maze, loop_precent), maze.sides == again.sides
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Maze generation throughput on the compact grid')
+    parser.add_argument('--sizes', default = '100x100,1000x1000,2000x2000')
+    parser.add_argument('--algorithms', default = 'backtracker,eller,kruskal')
+    parser.add_argument('--legacy-up-to', type = int, default = 100 * 100, help = 'only time Maze.create_maze up to this many cells')
+    parser.add_argument('--loop-precent', type = int, default = 0)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for rows, cols in parse_sizes(args.sizes):
+        algorithms = args.algorithms.split(',')
+        if rows * cols <= args.legacy_up_to:
+            algorithms.insert(0, 'legacy')
+        for algorithm in algorithms:
+            bench(rows, cols, algorithm, args.loop_precent, args.seed)
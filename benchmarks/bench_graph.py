@@ -0,0 +1,60 @@
+import time
+import random
+import argparse
+
+from common import make_app, parse_sizes
+from utils import Maze, PROFILER
+
+def bench(rows: int, cols: int, loops: int, searches: int, seed: int = 0):
+    app = make_app()
+    maze = app.maze = Maze(app, rows = rows, cols = cols, seed = seed, compact = True)
+    maze.loop_precent = loops
+    maze.create_maze()
+
+    started_at = time.perf_counter()
+    graph = maze.junction_graph()
+    built = time.perf_counter() - started_at
+
+    rng = random.Random(seed)
+    pairs = [(maze.grid[rng.randrange(cols)][rng.randrange(rows)], maze.grid[rng.randrange(cols)][rng.randrange(rows)]) for _ in range(searches)]
+    timings, expanded = {}, {}
+    for compress, counter in [(False, 'astar.expanded'), (True, 'graph.expanded')]:
+        maze.compress_paths = compress
+        PROFILER.enable()
+        PROFILER.begin_frame() # one frame's counters hold every search
+        started_at = time.perf_counter()
+        for start, goal in pairs:
+            maze.find_path(start, goal)
+        timings[compress] = (time.perf_counter() - started_at) / searches
+        PROFILER.end_frame()
+        expanded[compress] = PROFILER.counter_values[counter][-1] / searches
+        PROFILER.disable()
+
+    # knocking a wall down patches the corridors around it instead of building again
+    walls = [(cell, direction) for cell in [maze.grid[cols // 2][rows // 2]] for neighbour, direction in maze.get_neighbours(cell.pos) if direction not in cell.open_sides]
+    patched = 0.0
+    if walls:
+        cell, direction = walls[0]
+        started_at = time.perf_counter()
+        maze.open_side(cell.pos, direction)
+        maze.open_side(maze.grid[cell.pos[0] - 1 + {'W': -1, 'E': 1}.get(direction, 0)][cell.pos[1] - 1 + {'N': -1, 'S': 1}.get(direction, 0)].pos, maze.reverse_direction(direction))
+        patched = time.perf_counter() - started_at
+
+    print('{:>4}x{:<4} loops {:2d}%  nodes {:7d} of {:7d} cells ({:4.1f}%)  build {:8.1f} ms  open_side {:6.3f} ms'.format(
+        rows, cols, loops, len(graph.nodes), rows * cols, len(graph.nodes) / (rows * cols) * 100, built * 1000, patched * 1000
+    ))
+    print('          find_path  cells: {:8.1f} expanded {:8.3f} ms   graph: {:8.1f} expanded {:8.3f} ms'.format(
+        expanded[False], timings[False] * 1000, expanded[True], timings[True] * 1000
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Nodes and time per search with corridors collapsed (Maze.junction_graph) against plain cell by cell A*')
+    parser.add_argument('--sizes', type = parse_sizes, default = parse_sizes('50x50,200x200'))
+    parser.add_argument('--loops', default = '0,5,20')
+    parser.add_argument('--searches', type = int, default = 50)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for rows, cols in args.sizes:
+        for loops in args.loops.split(','):
+            bench(rows, cols, int(loops), args.searches, seed = args.seed)
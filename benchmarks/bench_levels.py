@@ -0,0 +1,43 @@
+import os
+import time
+import argparse
+import tempfile
+
+from common import parse_sizes, make_app
+from utils import Maze, save_level, load_level
+
+def bench(rows: int, cols: int, algorithm: str, seed: int, directory: str):
+    app = make_app()
+    app.maze = maze = Maze(app, rows = rows, cols = cols, compact = True, seed = seed)
+    started_at = time.perf_counter()
+    maze.create_maze(algorithm = algorithm)
+    generate_time = time.perf_counter() - started_at
+
+    path = os.path.join(directory, 'level-{}x{}.bin'.format(rows, cols))
+    started_at = time.perf_counter()
+    save_level(maze, path)
+    save_time = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    loaded = load_level(app, path)
+    load_time = time.perf_counter() - started_at
+
+    # opening only maps the file, reading every cell once is what actually pages it in
+    started_at = time.perf_counter()
+    same = bytes(loaded.sides) == bytes(maze.sides)
+    touch_time = time.perf_counter() - started_at
+
+    print('{:>5}x{:<5} file {:8.2f} MiB  generate {:9.2f} ms  save {:8.2f} ms  load {:6.3f} ms  read all {:8.2f} ms  round trip {}'.format(
+        rows, cols, os.path.getsize(path) / 2 ** 20, generate_time * 1000, save_time * 1000, load_time * 1000, touch_time * 1000, 'ok' if same else 'MISMATCH'
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Level file save / mapped load times against generating the maze')
+    parser.add_argument('--sizes', default = '100x100,1000x1000,3000x3000')
+    parser.add_argument('--algorithm', default = 'eller')
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows, cols in parse_sizes(args.sizes):
+            bench(rows, cols, algorithm = args.algorithm, seed = args.seed, directory = directory)
@@ -0,0 +1,35 @@
+import argparse
+import gc
+import time
+import tracemalloc
+import concurrent.futures
+import multiprocessing
+
+from common import parse_sizes
+
+def measure(rows: int, cols: int, compact: bool):
+    # runs in a fresh process so nothing from the previous maze is still around
+    from common import make_maze
+
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    maze = make_maze(rows, cols, compact = compact)
+    generated_in = time.perf_counter() - started_at
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained, peak, generated_in, len(maze.sides)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Memory used by the object grid and the compact bitmask grid')
+    parser.add_argument('--sizes', default = '100x100,300x300')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    for rows, cols in parse_sizes(args.sizes):
+        for compact in (False, True):
+            with concurrent.futures.ProcessPoolExecutor(max_workers = 1, mp_context = context) as pool:
+                retained, peak, generated_in, n_cells = pool.submit(measure, rows, cols, compact).result()
+            print('{:>5}x{:<5} {:8}  retained {:8.1f} MB ({:6.1f} B/cell)  peak {:8.1f} MB  generate {:7.2f} s (traced)'.format(
+                rows, cols, 'compact' if compact else 'objects', retained / 2 ** 20, retained / n_cells, peak / 2 ** 20, generated_in
+            ))
@@ -0,0 +1,49 @@
+import time
+import random
+import argparse
+
+from common import parse_sizes, make_app, summary, timeit
+from utils import Maze
+
+def bench(rows: int, cols: int, queries: int, landmarks: int, exact_up_to: int, loop_precent: int, seed: int = 0):
+    app = make_app()
+    app.maze = maze = Maze(app, rows = rows, cols = cols, compact = True, seed = seed)
+    maze.loop_precent = loop_precent
+    maze.create_maze(algorithm = 'backtracker')
+
+    rng = random.Random(seed)
+    pairs = [(maze.grid[rng.randrange(cols)][rng.randrange(rows)], maze.grid[rng.randrange(cols)][rng.randrange(rows)]) for _ in range(queries)]
+    pending = iter(pairs * 2)
+    def path():
+        maze.find_path(*next(pending))
+
+    plain = timeit(path, repeat = queries)
+    started_at = time.perf_counter()
+    oracle = maze.precompute(landmarks = landmarks, exact_up_to = exact_up_to)
+    took = time.perf_counter() - started_at
+    guided = timeit(path, repeat = queries)
+
+    # spawn placement style queries: everything against the player's start cell
+    start = maze.grid[0][0]
+    targets = iter([cell for cell, _ in pairs])
+    lookups = timeit(lambda: maze.distance(next(targets), start), repeat = queries)
+
+    print('{}x{} loops {}% {}: precompute {:.2f} s, {:.2f} MiB'.format(
+        rows, cols, loop_precent, 'exact all-pairs' if oracle.exact else '{} landmarks'.format(len(oracle.landmarks)), took, oracle.nbytes / 2 ** 20
+    ))
+    print('  find_path manhattan  {}'.format(summary(plain)))
+    print('  find_path oracle     {}'.format(summary(guided)))
+    print('  distance to start    {}'.format(summary(lookups)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Maze.precompute cost and the A* / distance queries it speeds up')
+    parser.add_argument('--sizes', default = '10x22,30x30,100x100,300x300')
+    parser.add_argument('--queries', type = int, default = 200)
+    parser.add_argument('--landmarks', type = int, default = 8)
+    parser.add_argument('--exact-up-to', type = int, default = 1024)
+    parser.add_argument('--loop-precent', type = int, default = 20)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for rows, cols in parse_sizes(args.sizes):
+        bench(rows, cols, queries = args.queries, landmarks = args.landmarks, exact_up_to = args.exact_up_to, loop_precent = args.loop_precent, seed = args.seed)
@@ -0,0 +1,67 @@
+import time
+import argparse
+
+from common import parse_sizes, make_app, summary
+from utils import Maze, IncrementalPlanner
+
+def bench(rows: int, cols: int, steps: int, distance: int, algorithm: str, loop_precent: int, seed: int = 0):
+    app = make_app()
+    app.maze = maze = Maze(app, rows = rows, cols = cols, compact = True, seed = seed)
+    maze.loop_precent = loop_precent
+    maze.create_maze(algorithm = algorithm)
+
+    # the chaser starts `distance` cells behind the player, who runs for the cell furthest from it
+    player = maze.grid[cols // 2][rows // 2]
+    from_player = maze.distance_field([player])
+    start = maze.grid[from_player.index(distance) // rows][from_player.index(distance) % rows]
+    from_start = maze.distance_field([start])
+    furthest = from_start.index(max(from_start))
+    walk = maze.find_path(player, maze.grid[furthest // rows][furthest % rows])[:steps]
+
+    def run(next_step) -> list:
+        chaser, timings = start, []
+        for player in walk:
+            started_at = time.perf_counter()
+            step = next_step(chaser, player)
+            timings.append(time.perf_counter() - started_at)
+            # a bit slower than the player, so it neither catches up nor falls far behind
+            if step is not None and len(timings) % 4:
+                chaser = step
+        return timings
+
+    def astar(chaser, player):
+        path = maze.find_path(chaser, player)
+        return path[1] if len(path) > 1 else None
+
+    def measure(chaser, player):
+        path = maze.find_path(chaser, player)
+        lengths.append(len(path) - 1)
+        return path[1] if len(path) > 1 else None
+
+    lengths = []
+    run(measure)
+    planner = IncrementalPlanner(maze)
+    results = [
+        ('A* per step', run(astar)),
+        ('flow field', run(maze.next_step)),
+        ('incremental', run(planner.next_step)),
+    ]
+    print('{}x{} {} loops {}% chaser starts {} cells out, path to the player {:.1f} cells on average'.format(
+        rows, cols, algorithm, loop_precent, distance, sum(lengths) / len(lengths)
+    ))
+    for name, timings in results:
+        print('  {:12} {}'.format(name, summary(timings)))
+    print('  incremental expanded {:.1f} nodes per step'.format(planner.expanded / len(walk)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Cost of one chaser re-planning every time the player changes cell')
+    parser.add_argument('--sizes', default = '100x100,500x500,1000x1000')
+    parser.add_argument('--steps', type = int, default = 400)
+    parser.add_argument('--distance', type = int, default = 60)
+    parser.add_argument('--algorithm', default = 'backtracker')
+    parser.add_argument('--loop-precent', type = int, default = 20)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    for rows, cols in parse_sizes(args.sizes):
+        bench(rows, cols, steps = args.steps, distance = args.distance, algorithm = args.algorithm, loop_precent = args.loop_precent, seed = args.seed)
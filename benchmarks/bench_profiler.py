@@ -0,0 +1,42 @@
+import os
+import json
+import time
+import argparse
+
+import common
+from game import Game
+from utils import PROFILER
+
+def bench(config: dict, matches: int, mode: str) -> float:
+    # best of three, microseconds per simulated tick
+    best = float('inf')
+    for _ in range(3):
+        PROFILER.reset()
+        PROFILER.disable()
+        if mode != 'off':
+            PROFILER.enable(tracing = mode == 'tracing')
+        ticks, started_at = 0, time.perf_counter()
+        for seed in range(matches):
+            ticks += Game(dict(config, seed = seed), headless = True).simulate().ticks
+        best = min(best, (time.perf_counter() - started_at) / ticks)
+    PROFILER.disable()
+    return best * 1e6
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Cost of the frame profiler on headless matches, off vs counting vs tracing')
+    parser.add_argument('--matches', type = int, default = 10)
+    parser.add_argument('--n-minotaurs', type = int, default = 4)
+    parser.add_argument('--size', default = '20x40')
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # assets are relative to the repo root
+    with open('config.json') as f:
+        config = json.loads(f.read())
+    (rows, cols), = common.parse_sizes(args.size)
+    config.update(rows = rows, cols = cols, n_minotaurs = args.n_minotaurs, debug = False, profiler = False)
+
+    off = bench(config, args.matches, 'off')
+    print('{:>8}  {:7.2f} us/tick'.format('off', off))
+    for mode in ['counting', 'tracing']:
+        took = bench(config, args.matches, mode)
+        print('{:>8}  {:7.2f} us/tick  {:+6.1f}%'.format(mode, took, (took / off - 1) * 100))
@@ -0,0 +1,51 @@
+import os
+import json
+import time
+import random
+import argparse
+
+import pygame
+
+import common
+from common import summary
+from game import Game
+from utils import FleeBot
+
+def bench(config: dict, frames: int, dirty_rects: bool):
+    app = Game(dict(config, dirty_rects = dirty_rects), controller = FleeBot(random.Random(config['seed'])))
+    app.setup()
+    app.update(delta_time = app.timestep)
+    app.present(app.update_screen()) # the first frame is always a full one
+
+    timings, pixels = [], 0
+    window = app.window_size[0] * app.window_size[1]
+    for _ in range(frames):
+        app.update(delta_time = app.timestep)
+        started_at = time.perf_counter()
+        rects = app.update_screen()
+        app.present(rects)
+        timings.append(time.perf_counter() - started_at)
+        pixels += window if rects is None else sum(rect.width * rect.height for rect in rects)
+    if app.status != 'playing':
+        raise RuntimeError('the match ended after {} ticks, use fewer --frames or another --seed'.format(app.ticks))
+
+    print('{:>2} minotaurs {:6}  frame {}  pixels/frame {:8.0f} ({:5.1f}% of the window)'.format(
+        config['n_minotaurs'], 'dirty' if dirty_rects else 'full', summary(timings), pixels / frames, pixels / frames / window * 100
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Frame cost of repainting the whole window vs only the rects sprites and overlays moved through')
+    parser.add_argument('--counts', default = '1,5,20')
+    parser.add_argument('--frames', type = int, default = 600)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # assets are relative to the repo root
+    pygame.init()
+    with open('config.json') as f:
+        config = json.loads(f.read())
+    config.update(seed = args.seed, debug = False, profiler = False, match_time = 10 ** 6)
+
+    for count in args.counts.split(','):
+        for dirty_rects in [False, True]:
+            bench(dict(config, n_minotaurs = int(count)), args.frames, dirty_rects)
@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import random
+import argparse
+
+import pygame
+
+import common
+from common import summary
+from game import Game
+from utils import ReplayPlayer
+
+def bench(config: dict, path: str, seeks: int):
+    plain = Game(config, headless = True)
+    started_at = time.perf_counter()
+    plain.simulate()
+    plain_time = time.perf_counter() - started_at
+
+    recorded = Game(dict(config, record = path), headless = True)
+    started_at = time.perf_counter()
+    result = recorded.simulate()
+    record_time = time.perf_counter() - started_at
+    size = os.path.getsize(path)
+
+    replay = ReplayPlayer(path, Game)
+    started_at = time.perf_counter()
+    replay.play()
+    play_time = time.perf_counter() - started_at
+    if not replay.matches():
+        raise RuntimeError('{} replayed as {} {}, recorded {}'.format(path, replay.game.status, replay.game.ticks, replay.result))
+
+    # random jumps, through the snapshots and from the start of the match
+    rng = random.Random(config['seed'])
+    targets = [rng.randrange(1, result.ticks + 1) for _ in range(seeks)]
+    timings = {}
+    for snapshots in [True, False]:
+        saved = replay.snapshots
+        if not snapshots:
+            replay.snapshots = []
+        timings[snapshots] = []
+        for tick in targets:
+            started_at = time.perf_counter()
+            replay.seek(tick)
+            timings[snapshots].append(time.perf_counter() - started_at)
+        replay.snapshots = saved
+    replay.close()
+
+    real_time = result.ticks * recorded.timestep
+    print('{:>4}x{:<4} {:2d} minotaurs {:>4} {:6d} ticks  file {:6d} bytes ({:5.2f} per tick after the header)  recording {:+5.1f}%  playback {:6.0f}x real time'.format(
+        config['rows'], config['cols'], config['n_minotaurs'], result.status, result.ticks, size, (size - replay.records_at) / result.ticks,
+        (record_time / plain_time - 1) * 100, real_time / play_time
+    ))
+    print('          seek  snapshots {}'.format(summary(timings[True])))
+    print('          seek  rewind    {}'.format(summary(timings[False])))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Replay file size, recording overhead, playback speed and seek latency')
+    parser.add_argument('--sizes', type = common.parse_sizes, default = common.parse_sizes('10x22,30x50'))
+    parser.add_argument('--minotaurs', type = int, default = 3)
+    parser.add_argument('--match-time', type = int, default = 600)
+    parser.add_argument('--snapshot-every', type = int, default = 600)
+    parser.add_argument('--seeks', type = int, default = 10)
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--path', default = os.path.join('.cache', 'bench.rpl'))
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # assets are relative to the repo root
+    pygame.init()
+    with open('config.json') as f:
+        config = json.loads(f.read())
+    config.update(seed = args.seed, debug = False, profiler = False, n_minotaurs = args.minotaurs, match_time = args.match_time, snapshot_every = args.snapshot_every)
+    os.makedirs(os.path.dirname(args.path) or '.', exist_ok = True)
+
+    for rows, cols in args.sizes:
+        bench(dict(config, rows = rows, cols = cols), args.path, args.seeks)
@@ -0,0 +1,58 @@
+import os
+import json
+import time
+import random
+import argparse
+
+import pygame
+
+import common
+from common import summary
+from game import Game
+from utils import FleeBot
+
+def bench(config: dict, budget_us: int):
+    app = Game(dict(config, pregenerate_budget_us = budget_us), controller = FleeBot(random.Random(config['seed'])))
+    app.setup()
+
+    # what a match's frames pay for the next maze, one advance a frame like Game.run
+    app.prepare_next()
+    slices = []
+    while not app.upcoming.done:
+        started_at = time.perf_counter()
+        app.upcoming.advance(budget_us = app.pregenerate_budget_us)
+        slices.append(time.perf_counter() - started_at)
+
+    app.status = 'lost'
+    started_at = time.perf_counter()
+    app.restart()
+    app.present(app.update_screen())
+    warm = time.perf_counter() - started_at
+
+    app.status = 'lost'
+    app.upcoming = None # nothing pregenerated, restart builds the whole maze itself
+    started_at = time.perf_counter()
+    app.restart()
+    app.present(app.update_screen())
+    cold = time.perf_counter() - started_at
+
+    print('{:>4}x{:<4} restart to first frame: pregenerated {:8.2f} ms  cold {:8.2f} ms   pregeneration {:4d} frames, slice {}'.format(
+        config['rows'], config['cols'], warm * 1000, cold * 1000, len(slices), summary(slices)
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Time from a restart after won/lost to the next first frame, with and without the maze pregenerated during the match')
+    parser.add_argument('--sizes', type = common.parse_sizes, default = common.parse_sizes('10x22,50x50,100x100'))
+    parser.add_argument('--budget-us', type = int, default = 2000, help = 'pregeneration time a frame')
+    parser.add_argument('--generator', help = 'one of generators.GENERATORS, the cell by cell backtracker by default')
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # assets are relative to the repo root
+    pygame.init()
+    with open('config.json') as f:
+        config = json.loads(f.read())
+    config.update(seed = args.seed, debug = False, profiler = False, generator = args.generator)
+
+    for rows, cols in args.sizes:
+        bench(dict(config, rows = rows, cols = cols), args.budget_us)
@@ -0,0 +1,51 @@
+import os
+import json
+import asyncio
+import argparse
+
+import common
+from client import run_bots, percentile
+from server import GameServer
+from utils.net import FRAME, STATE_HEADER, ENTRY, ABSOLUTE
+
+async def bench(config: dict, bots: int, n_minotaurs: int, warmup: float, duration: float, seed: int):
+    server = GameServer(config)
+    listener = await server.serve(port = 0)
+    host, port = listener.sockets[0].getsockname()[:2]
+    ticks = asyncio.ensure_future(server.run())
+
+    playing = asyncio.ensure_future(run_bots(host, port, {'n_minotaurs': n_minotaurs}, bots, warmup + duration, seed))
+    await asyncio.sleep(warmup) # every bot connected and in a match
+    server.reset_stats()
+    await asyncio.sleep(duration)
+    stats = server.stats()
+    bot_stats = await playing
+
+    ticks.cancel()
+    listener.close()
+    await listener.wait_closed()
+
+    # the same STATE with every sprite's absolute position, every tick
+    full = FRAME.size + STATE_HEADER.size + (1 + n_minotaurs) * (ENTRY.size + ABSOLUTE.size)
+    print('{:4d} bots  {:6.1f} matches  tick p50 {:6.2f} ms  p99 {:6.2f} ms  late p99 {:6.2f} ms  {:6.0f} matches/core  '
+          '{:5.1f} bytes/match/tick (full {:d})  input latency p50 {:6.1f} ms  p99 {:6.1f} ms'.format(
+        bots, stats['matches'], stats['tick_p50_ms'], stats['tick_p99_ms'], stats['late_p99_ms'], stats['matches_per_core'],
+        stats['bytes_per_match_tick'], full, percentile(bot_stats.latencies, 0.5) * 1000, percentile(bot_stats.latencies, 0.99) * 1000
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'server.py under load from client.py bots in the same process, matches per core and tick latency')
+    parser.add_argument('--bots', default = '10,50,100,200', help = 'comma separated bot counts, one run each')
+    parser.add_argument('--n-minotaurs', type = int, default = 3)
+    parser.add_argument('--warmup', type = float, default = 3, help = 'seconds before measuring')
+    parser.add_argument('--duration', type = float, default = 10)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # assets are relative to the repo root
+    with open('config.json') as f:
+        config = json.loads(f.read())
+
+    print('the bots share the process, so tick p99, lateness and latency include their time. matches/core is the server\'s CPU time alone')
+    for bots in [int(count) for count in args.bots.split(',')]:
+        asyncio.run(bench(config, bots, args.n_minotaurs, args.warmup, args.duration, args.seed))
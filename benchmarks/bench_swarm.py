@@ -0,0 +1,49 @@
+import os
+import json
+import time
+import random
+import argparse
+
+import pygame
+
+import common
+from common import summary
+from game import Game
+from utils import FleeBot
+
+def bench(config: dict, frames: int, swarm: bool):
+    app = Game(dict(config, swarm = swarm), controller = FleeBot(random.Random(config['seed'])))
+    app.setup()
+    update, draw = [], []
+    for _ in range(frames):
+        started_at = time.perf_counter()
+        app.update(delta_time = app.timestep)
+        update.append(time.perf_counter() - started_at)
+        started_at = time.perf_counter()
+        app.update_screen()
+        draw.append(time.perf_counter() - started_at)
+        if app.status != 'playing':
+            break
+
+    print('{:5d} minotaurs {:7}  update {}  draw {}  ({} ticks, {})'.format(
+        config['n_minotaurs'], 'swarm' if swarm else 'sprites', summary(update), summary(draw), app.ticks, app.status
+    ))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Frame cost of IDK sprites against the numpy swarm for large minotaur counts')
+    parser.add_argument('--counts', default = '10,100,1000,5000')
+    parser.add_argument('--frames', type = int, default = 300)
+    parser.add_argument('--size', default = '10x22')
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # assets are relative to the repo root
+    pygame.init()
+    with open('config.json') as f:
+        config = json.loads(f.read())
+    (rows, cols), = common.parse_sizes(args.size)
+    config.update(rows = rows, cols = cols, seed = args.seed, debug = False, profiler = False, match_time = 10 ** 6, dirty_rects = False)
+
+    for count in args.counts.split(','):
+        for swarm in [False, True]:
+            bench(dict(config, n_minotaurs = int(count)), args.frames, swarm)
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import types
+import typing
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from utils import Maze
+
+def parse_sizes(text: str) -> typing.List[typing.Tuple[int, int]]:
+    # "10x22,100x100" -> [(10, 22), (100, 100)] as (rows, cols)
+    sizes = []
+    for size in text.split(','):
+        rows, cols = size.lower().split('x')
+        sizes.append((int(rows), int(cols)))
+    return sizes
+
+def make_app(window_size = (1280, 720)):
+    if not pygame.display.get_init():
+        pygame.display.init()
+    window = pygame.display.set_mode(window_size)
+    return types.SimpleNamespace(
+        debug = False,
+        paused = False,
+        config = {'cell_color': [255, 255, 255]},
+        window = window,
+        window_size = window.get_size(),
+        maze = None,
+        pathfinder = None
+    )
+
+def window_for(rows: int, cols: int, cell_size: int = 50):
+    # Maze.set_attrs keeps 50px / 100px of margin around the grid
+    return (cols * cell_size + 50, rows * cell_size + 100)
+
+def placeholder_assets(size = (40, 40), frames = 25):
+    frame = pygame.Surface(size)
+    return {side: [frame] * frames for side in ['left', 'right']}
+
+def make_maze(rows: int, cols: int, seed: int = 0, window_size = (1280, 720), **kwargs) -> Maze:
+    app = make_app(window_size = window_size)
+    app.maze = Maze(app, rows = rows, cols = cols, seed = seed, **kwargs)
+    app.maze.create_maze()
+    return app.maze
+
+def timeit(function, repeat: int) -> typing.List[float]:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+    return timings
+
+def summary(timings: typing.List[float]) -> str:
+    timings = sorted(timings)
+    mean = sum(timings) / len(timings)
+    return 'mean {:9.3f} ms  p50 {:9.3f} ms  max {:9.3f} ms'.format(
+        mean * 1000, timings[len(timings) // 2] * 1000, timings[-1] * 1000
+    )
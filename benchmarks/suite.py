@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import random
+import typing
+import argparse
+import platform
+
+import pygame
+
+import common # sets the dummy video driver before anything opens a window
+from common import parse_sizes, make_app, make_maze, timeit
+from utils import Maze, FleeBot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+Timings = typing.List[float]
+
+# Every case times one operation `repeat` times after a warm up and reports milliseconds per
+# operation. Results are keyed "case/params" so a baseline only compares like with like.
+
+def case_calibrate(repeat: int) -> Timings:
+    # plain python that none of the game's code touches, how fast the machine is right now
+    def work():
+        cells = {}
+        for i in range(20000):
+            cells[i % 997] = cells.get(i % 997, 0) + i
+        return sorted(cells.values())
+    return timeit(work, repeat)
+
+def case_generate(rows: int, cols: int, seed: int, repeat: int) -> Timings:
+    # Maze.create_maze as Game calls it with config.json's "generator": null
+    app = make_app()
+    def generate():
+        app.maze = Maze(app, rows = rows, cols = cols, seed = seed)
+        app.maze.create_maze()
+    return timeit(generate, repeat)
+
+def case_find_path(rows: int, cols: int, seed: int, repeat: int) -> Timings:
+    maze = make_maze(rows, cols, seed = seed)
+    rng = random.Random(seed)
+    pairs = iter([(maze.grid[rng.randrange(cols)][rng.randrange(rows)], maze.grid[rng.randrange(cols)][rng.randrange(rows)]) for _ in range(repeat)])
+    return timeit(lambda: maze.find_path(*next(pairs)), repeat)
+
+def case_can_move(rows: int, cols: int, seed: int, repeat: int) -> Timings:
+    # one operation is 1000 calls, a single one is too short to time
+    maze = make_maze(rows, cols, seed = seed)
+    rng = random.Random(seed)
+    size = max(1, int(maze.cell_size * 0.8))
+    left, top = int(maze.offset.x), int(maze.offset.y)
+    rects = [
+        pygame.Rect(rng.randrange(left, left + max(1, cols * maze.cell_size - size)), rng.randrange(top, top + max(1, rows * maze.cell_size - size)), size, size)
+        for _ in range(1000)
+    ]
+    def batch():
+        for rect in rects:
+            maze.can_move(rect, rect)
+    return timeit(batch, repeat)
+
+def case_draw_grid(rows: int, cols: int, seed: int, repeat: int) -> Timings:
+    maze = make_maze(rows, cols, seed = seed)
+    background = pygame.Surface(maze.app.window_size)
+    maze.draw_grid(background = background) # bakes the wall layer once, like the first frame does
+    return timeit(lambda: maze.draw_grid(background = background), repeat)
+
+def _game(rows: int, cols: int, n_minotaurs: int, seed: int):
+    import game # needs the dummy driver from common before pygame opens a window
+
+    with open(os.path.join(ROOT, 'config.json')) as f:
+        config = json.loads(f.read())
+    config.update(rows = rows, cols = cols, n_minotaurs = n_minotaurs, seed = seed, debug = False, profiler = False, match_time = 10 ** 6)
+    app = game.Game(config, controller = FleeBot(random.Random(seed)))
+    app.setup()
+    return app
+
+def _check(app, case: str):
+    # Game.update does nothing once the match is over, those timings would look great and mean nothing
+    if app.status != 'playing':
+        raise RuntimeError('{}: the match ended after {} ticks, use fewer --frames or another --seed'.format(case, app.ticks))
+
+def case_update(rows: int, cols: int, n_minotaurs: int, seed: int, repeat: int) -> Timings:
+    app = _game(rows, cols, n_minotaurs, seed)
+    timings = timeit(lambda: app.update(delta_time = app.timestep), repeat)
+    _check(app, 'game.update')
+    return timings
+
+def case_update_screen(rows: int, cols: int, n_minotaurs: int, seed: int, repeat: int) -> Timings:
+    app = _game(rows, cols, n_minotaurs, seed)
+    def frame():
+        app.update(delta_time = app.timestep)
+        started_at = time.perf_counter()
+        app.present(app.update_screen()) # dirty rects when config.json enables them
+        return time.perf_counter() - started_at
+    frame() # text and layers are rendered once and cached
+    timings = [frame() for _ in range(repeat)]
+    _check(app, 'game.update_screen')
+    return timings
+
+def stats(timings: Timings) -> dict:
+    timings = sorted(timings)
+    return {
+        'p50_ms': timings[len(timings) // 2] * 1000,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'min_ms': timings[0] * 1000,
+        'runs': len(timings),
+    }
+
+def run(args, only: typing.Optional[typing.Set[str]] = None) -> typing.Dict[str, dict]:
+    # every case runs --rounds times and keeps its fastest round, one busy moment shouldn't fail the gate.
+    # only limits it to those keys, for re-running the ones that look slower
+    results: typing.Dict[str, dict] = {}
+
+    def timed(case: typing.Callable[[], Timings]) -> dict:
+        # the machine's speed swings from one second to the next, so every round is bracketed by the
+        # calibration and compare weighs the case against it instead of against the clock alone
+        before = stats(case_calibrate(10))[args.metric]
+        result = stats(case())
+        after = stats(case_calibrate(10))[args.metric]
+        result['calibrate_ms'] = (before + after) / 2
+        return result
+
+    def record(key: str, case: typing.Callable[[], Timings]):
+        if only is not None and key not in only:
+            return
+        rounds = [timed(case) for _ in range(args.rounds)]
+        results[key] = min(rounds, key = lambda result: result[args.metric] / result['calibrate_ms'])
+        print('{:40} p50 {:9.3f} ms  mean {:9.3f} ms'.format(key, results[key]['p50_ms'], results[key]['mean_ms']), file = sys.stderr)
+
+    seed, repeat, frames = args.seed, args.repeat, args.frames
+    for rows, cols in args.generate_sizes:
+        record('generate/{}x{}'.format(rows, cols), lambda: case_generate(rows, cols, seed, max(3, repeat // 10)))
+    for rows, cols in args.sizes:
+        record('find_path/{}x{}'.format(rows, cols), lambda: case_find_path(rows, cols, seed, repeat))
+        record('can_move_x1000/{}x{}'.format(rows, cols), lambda: case_can_move(rows, cols, seed, repeat))
+        record('draw_grid/{}x{}'.format(rows, cols), lambda: case_draw_grid(rows, cols, seed, repeat))
+    for rows, cols in args.game_sizes:
+        for n_minotaurs in args.minotaurs:
+            key = '{}x{}/{}_minotaurs'.format(rows, cols, n_minotaurs)
+            record('game.update/' + key, lambda: case_update(rows, cols, n_minotaurs, seed, frames))
+            record('game.update_screen/' + key, lambda: case_update_screen(rows, cols, n_minotaurs, seed, frames))
+    return results
+
+def compare(results: typing.Dict[str, dict], baseline: typing.Dict[str, dict], threshold: float, metric: str) -> typing.List[str]:
+    # the cases that got slower than baseline * (1 + threshold). current is scaled to the machine speed
+    # the baseline ran at, when both sides have the calibration
+    regressions = []
+    print('{:40} {:>11} {:>11} {:>8}'.format('case', 'baseline', 'current', 'change'))
+    for key in sorted(results.keys() | baseline.keys()):
+        if key not in baseline or key not in results:
+            print('{:40} {:>11} {:>11} {:>8}'.format(key, '-' if key not in baseline else '{:.3f}'.format(baseline[key][metric]), '-' if key not in results else '{:.3f}'.format(results[key][metric]), 'new' if key not in baseline else 'skipped'))
+            continue
+        before, after = baseline[key][metric], results[key][metric]
+        if 'calibrate_ms' in baseline[key] and 'calibrate_ms' in results[key]:
+            after *= baseline[key]['calibrate_ms'] / results[key]['calibrate_ms']
+        change = after / before - 1 if before else 0.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(key)
+        print('{:40} {:11.3f} {:11.3f} {:+7.1f}% {}'.format(key, before, after, change * 100, 'REGRESSION' if regressed else ''))
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Seeded headless benchmarks for generation, pathfinding, collision and rendering, with a baseline gate')
+    parser.add_argument('--sizes', type = parse_sizes, default = parse_sizes('10x22,50x50,100x100'), help = 'ROWSxCOLS for find_path, can_move and draw_grid')
+    parser.add_argument('--generate-sizes', type = parse_sizes, default = parse_sizes('10x22,50x50'), help = 'ROWSxCOLS for create_maze')
+    parser.add_argument('--game-sizes', type = parse_sizes, default = parse_sizes('10x22,20x40'), help = 'ROWSxCOLS for whole Game frames')
+    parser.add_argument('--minotaurs', type = lambda text: [int(count) for count in text.split(',')], default = [1, 10])
+    parser.add_argument('--repeat', type = int, default = 50, help = 'operations timed per case')
+    parser.add_argument('--frames', type = int, default = 300, help = 'frames timed per game case')
+    parser.add_argument('--rounds', type = int, default = 3, help = 'runs per case, the fastest one is kept')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--out', help = 'write the results as json')
+    parser.add_argument('--baseline', nargs = '?', const = BASELINE, help = 'compare against a results file, defaults to benchmarks/baseline.json')
+    parser.add_argument('--save-baseline', nargs = '?', const = BASELINE, help = 'store these results as the new baseline')
+    parser.add_argument('--threshold', type = float, default = 0.25, help = 'allowed slowdown before failing, 0.25 = 25%%')
+    parser.add_argument('--metric', default = 'p50_ms', choices = ['p50_ms', 'mean_ms', 'min_ms'])
+    parser.add_argument('--retries', type = int, default = 2, help = 'times a slower case is run again before it fails the gate')
+    args = parser.parse_args()
+
+    os.chdir(ROOT) # assets and config.json are relative to the repo root
+    pygame.init()
+    results = run(args)
+    document = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'machine': platform.machine(),
+            'system': platform.system(),
+            'seed': args.seed,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+    for path in [args.out, args.save_baseline]:
+        if path:
+            with open(path, 'w') as f:
+                json.dump(document, f, indent = 4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.loads(f.read())['results']
+        regressions = compare(results, baseline, args.threshold, args.metric)
+        # a shared machine has slow spells that last longer than a case, a real slowdown is still there later
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            print('running {} again'.format(', '.join(regressions)), file = sys.stderr)
+            rerun = run(args, only = set(regressions))
+            regressions = compare(rerun, {key: baseline[key] for key in rerun if key in baseline}, args.threshold, args.metric)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import typing
+import asyncio
+import argparse
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from utils import (
+    Maze, HELLO, MATCH, STATE, END, INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, MatchInfo, DeltaDecoder,
+    read_message, encode_message, encode_input, decode_match, read_keyboard, render_text, load_atlas
+)
+
+BOT_INPUTS = (0, INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_UP | INPUT_LEFT, INPUT_DOWN | INPUT_RIGHT)
+
+async def connect(host: str, port: int) -> typing.Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return reader, writer
+
+class RemoteMatch:
+    # what the window shows of a match the server runs: the maze it sent once and the sprite
+    # centres it keeps sending. Stands in for Game as the maze's app
+    def __init__(self, info: MatchInfo, window: pygame.Surface, config: dict) -> None:
+        self.window = window
+        self.window_size = tuple(info.header['window_size'])
+        self.config = config
+        self.debug = False
+        self.maze = Maze(self, rows = info.header['rows'], cols = info.header['cols'], compact = True)
+        self.maze.load_sides(bytearray(info.sides))
+        self.decoder = DeltaDecoder(info.header['sprites'])
+        self.tick_rate = info.header['tick_rate']
+        self.tick = 0
+        self.status = 'playing'
+        self.remaining = info.header['match_time']
+        self.faces: typing.List[str] = ['right'] * info.header['sprites']
+        self.previous: typing.List[typing.Tuple[int, int]] = []
+
+    def apply(self, payload: bytes):
+        update = self.decoder.decode(payload)
+        for index, ((x, _), (old_x, _)) in enumerate(zip(update.positions, self.previous)):
+            if x != old_x:
+                self.faces[index] = 'right' if x > old_x else 'left'
+        self.previous = list(update.positions)
+        self.tick, self.status, self.remaining = update.tick, update.status, update.remaining
+
+    def draw(self, assets: dict, background: pygame.Surface):
+        self.maze.draw_grid(background = background)
+        for index, (x, y) in enumerate(self.previous):
+            frames = assets['player' if index == 0 else 'minotaur'][self.faces[index]]
+            image = frames[self.tick // 6 % len(frames)]
+            self.window.blit(image, image.get_rect(center = (x, y)))
+        if self.status == 'playing':
+            text = render_text('Remaining Time -> {}:{}'.format(*divmod(self.remaining, 60)), 40, (255, 0, 0))
+            self.window.blit(text, text.get_rect(topright = (self.window_size[0], text.get_height() // 2)))
+        else:
+            text = render_text(self.config['text'][self.status] + '  (R to play again)', 40, (0, 0, 0))
+            self.window.blit(text, text.get_rect(center = (self.window_size[0] // 2, self.window_size[1] // 2)))
+
+async def play(host: str, port: int, overrides: dict):
+    # the keyboard and a window against a server.py, inputs go out when they change
+    with open('config.json') as f:
+        config = json.loads(f.read())
+    reader, writer = await connect(host, port)
+    writer.write(encode_message(HELLO, json.dumps(overrides).encode()))
+
+    pygame.init()
+    kind, payload = await read_message(reader)
+    info = decode_match(payload)
+    window = pygame.display.set_mode(tuple(info.header['window_size']))
+    pygame.display.set_caption('maze @ {}:{}'.format(host, port))
+    assets, background = load_atlas(size = (40, 40), background_size = window.get_size())
+    assets = {folder: {face: [frame.convert_alpha() for frame in frames] for face, frames in faces.items()} for folder, faces in assets.items()}
+    background = background.convert_alpha()
+    match = RemoteMatch(info, window, config)
+
+    async def receive():
+        nonlocal match
+        while True:
+            kind, payload = await read_message(reader)
+            if kind == MATCH:
+                match = RemoteMatch(decode_match(payload), window, config)
+            elif kind == STATE:
+                match.apply(payload)
+
+    receiving = asyncio.ensure_future(receive())
+    clock = pygame.time.Clock()
+    sequence, sent = 0, -1
+    try:
+        while not receiving.done():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN and event.key in (pygame.K_r, pygame.K_RETURN) and match.status != 'playing':
+                    writer.write(encode_message(HELLO, json.dumps(overrides).encode()))
+            pressed = read_keyboard(None) # type: ignore
+            if pressed != sent:
+                sequence += 1
+                writer.write(encode_input(sequence, pressed))
+                sent = pressed
+            match.draw(assets, background)
+            pygame.display.flip()
+            clock.tick(60)
+            await asyncio.sleep(0)
+        receiving.result() # the server went away, say why
+    finally:
+        receiving.cancel()
+        writer.close()
+        pygame.quit()
+
+class BotStats:
+    def __init__(self) -> None:
+        self.matches = 0
+        self.states = 0
+        self.bytes = 0
+        self.latencies: typing.List[float] = [] # input sent -> first STATE that applied it
+
+async def bot(host: str, port: int, overrides: dict, duration: float, rng: random.Random, stats: BotStats):
+    # a load generator player: mashes a random direction every 0.2-1 s, plays again when a match ends
+    reader, writer = await connect(host, port)
+    writer.write(encode_message(HELLO, json.dumps(overrides).encode()))
+    decoder: typing.Optional[DeltaDecoder] = None
+    sequence, sent_at, change_at = 0, {}, 0.0
+    ends_at = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < ends_at:
+            kind, payload = await read_message(reader)
+            now = time.perf_counter()
+            if kind == MATCH:
+                decoder = DeltaDecoder(decode_match(payload).header['sprites'])
+                stats.matches += 1
+            elif kind == STATE and decoder is not None:
+                update = decoder.decode(payload)
+                stats.states += 1
+                stats.bytes += len(payload)
+                for applied in [pending for pending in sent_at if pending <= update.ack]:
+                    stats.latencies.append(now - sent_at.pop(applied))
+                if now >= change_at:
+                    sequence += 1
+                    sent_at[sequence] = now
+                    writer.write(encode_input(sequence, rng.choice(BOT_INPUTS)))
+                    change_at = now + rng.uniform(0.2, 1.0)
+            elif kind == END:
+                sent_at.clear()
+                writer.write(encode_message(HELLO, json.dumps(overrides).encode()))
+    finally:
+        writer.close()
+
+async def run_bots(host: str, port: int, overrides: dict, count: int, duration: float, seed: int) -> BotStats:
+    stats = BotStats()
+    await asyncio.gather(*[bot(host, port, dict(overrides, seed = seed + index), duration, random.Random(seed + index), stats) for index in range(count)])
+    return stats
+
+def percentile(values: typing.List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Play on a server.py, or load it with bots')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 7777)
+    parser.add_argument('--bots', type = int, default = 0, help = 'connect this many bots instead of opening a window')
+    parser.add_argument('--duration', type = float, default = 30, help = 'seconds the bots play for')
+    parser.add_argument('--n-minotaurs', type = int)
+    parser.add_argument('--size', help = 'ROWSxCOLS')
+    parser.add_argument('--seed', type = int)
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.n_minotaurs is not None:
+        overrides['n_minotaurs'] = args.n_minotaurs
+    if args.size:
+        overrides['rows'], overrides['cols'] = [int(value) for value in args.size.lower().split('x')]
+    if args.seed is not None:
+        overrides['seed'] = args.seed
+
+    if args.bots:
+        stats = asyncio.run(run_bots(args.host, args.port, overrides, args.bots, args.duration, args.seed or 0))
+        print('{} bots  {} matches  {:.0f} states/s  {:.1f} bytes/state  input latency p50 {:.1f} ms  p99 {:.1f} ms'.format(
+            args.bots, stats.matches, stats.states / args.duration, stats.bytes / max(1, stats.states),
+            percentile(stats.latencies, 0.5) * 1000, percentile(stats.latencies, 0.99) * 1000
+        ))
+        sys.exit()
+
+    try:
+        asyncio.run(play(args.host, args.port, overrides))
+    except (ConnectionError, asyncio.IncompleteReadError) as error:
+        print('disconnected: {}'.format(error))
@@ -5,6 +5,8 @@ import os
 import time
 import typing
 import threading
+import argparse
+import contextlib
 
 try:
     import pygame
@@ -16,49 +18,197 @@ except ImportError:
 
 # from PIL import Image
 
-from utils import Player, IDK, Maze
+from utils import Player, IDK, Swarm, Maze, ChunkedMaze, Cell, PathScheduler, StepTask, Recorder, ReplayPlayer, load_level, save_level, PROFILER, FleeBot, read_keyboard, render_text, render_label, load_atlas, sprite_frames
+
+class MatchResult(typing.NamedTuple):
+    status: typing.Literal['won', 'playing', 'lost']
+    ticks: int
+    elapsed: float # simulated seconds
+    time_to_catch: typing.Optional[float]
 
 class Game:
-    def __init__(self, config):
+    def __init__(self, config, headless: bool = False, controller: typing.Optional[typing.Callable[["Game"], int]] = None):
         self.config = config
-
-        self.window = pygame.display.set_mode((1280, 720))    
-        self.window_size = self.window.get_size()   
-        self.background = pygame.transform.scale(pygame.image.load('assets/background.jpg').convert_alpha(), size = self.window.get_size())                                                                                                                                                            
+        # headless games never open a window, they step a fixed timestep as fast as possible, see simulate()
+        self.headless = headless
+        # one seed drives the maze, the spawns and the bot so a match can be replayed
+        self.seed = config.get('seed')
+        # restarts move on to the next level, each one a new maze from the next seed
+        self.level = 0
+        self.controller = controller or (FleeBot(rng = random.Random(self.seed)) if headless else read_keyboard)
+
+        if headless:
+            self.window = None
+            self.window_size = (1280, 720)
+        else:
+            self.window = pygame.display.set_mode((1280, 720))    
+            self.window_size = self.window.get_size()   
+        self.background: typing.Optional[pygame.Surface] = None
         self.clock = pygame.time.Clock()
-        self.sprites = pygame.sprite.Group()
-
         self.running = False
         self.paused = False
-        self.debug = config['debug']
+        self.debug = config['debug'] and not headless
         self.match_time = config['match_time']
-        self.status: typing.Literal['won', 'playing', 'lost'] = 'playing'
-        
-        self.maze = Maze(self, rows = 10, cols = 22)
-        self.maze.create_maze()
-        self.started_at = time.time()
-
+        self.timestep = 1 / config.get('tick_rate', 60)
+        # the window draws as often as max_fps allows (0 = no cap) while the game steps at tick_rate,
+        # a slow frame runs several steps, never more than max_frame_time worth, see run()
+        self.max_fps = config.get('max_fps', 60)
+        self.max_frame_time = config.get('max_frame_time', 0.25)
+        self.interpolate = config.get('interpolate', True)
+        self.sim_thread = config.get('sim_thread', False) and not headless
+        self.lock = threading.Lock()
+        self.stepped_at = 0.0
+
+        # before the maze, maze_steps bakes its walls onto the background
         self.assets = {}
         self.load_assets()
 
+        self.maze = self.build_maze(self.level_seed(self.level))
+        # a debug window watches the maze being carved in run(), everything else needs it finished now
+        self.generating: StepTask[Maze] = StepTask(self.maze_steps(self.maze))
+        if not self.debug:
+            self.generating.finish()
+        # the next level's maze, built pregenerate_budget_us a frame while this match runs so restart() doesn't wait
+        self.upcoming: typing.Optional[StepTask[Maze]] = None
+        self.pregenerate_budget_us = config.get('pregenerate_budget_us', 2000)
+        # generation and search steps a frame while debug draws them
+        self.debug_steps = config.get('debug_steps', 2)
+
+        # only the sprites and the overlays change while playing, repaint those and hand display.update the rects
+        # scrolling chunked mazes and the debug path move everything, they always redraw the whole window
+        # a swarm covers most of the window anyway
+        self.dirty_rects = config.get('dirty_rects', True) and not self.debug and not headless and not isinstance(self.maze, ChunkedMaze) and not config.get('swarm')
+
+        # F3 toggles the overlay, "trace" records every timed section and writes it when the game ends
+        self.trace_path: typing.Optional[str] = config.get('trace')
+        self._profiler_lines: typing.List[pygame.Surface] = []
+        if config.get('profiler') or self.trace_path:
+            PROFILER.enable(tracing = bool(self.trace_path))
+        # "record" writes every match to a replay file, see utils.replay and --replay
+        self.record_path: typing.Optional[str] = config.get('record')
+        self.recorder: typing.Optional[Recorder] = None
+
+        self.reset_match()
+
+    def reset_match(self):
+        # everything a match changes, back to its first tick on the current maze
+        self.random = random.Random(self.level_seed(self.level))
+        self.ticks = 0
+        self.caught_at: typing.Optional[float] = None
+        self.spawn_cells: typing.List[Cell] = []
+        self.status: typing.Literal['won', 'playing', 'lost'] = 'playing'
+        self.started_at = self.clock_time
+        # RenderUpdates remembers where each sprite was drawn, so a frame can erase just those spots
+        self.sprites = pygame.sprite.RenderUpdates()
+        # "swarm" keeps the minotaurs in numpy arrays instead of one IDK sprite each, for thousands of them
+        self.swarm: typing.Optional[Swarm] = None
+        # "scheduled" pathing: chasers queue A* searches, at most path_budget expansions (or path_budget_us instead) run a tick
+        self.pathfinder: typing.Optional[PathScheduler] = None
+        if self.config.get('pathing') == 'scheduled':
+            self.pathfinder = PathScheduler(self.maze, budget = self.config.get('path_budget', 500), budget_us = self.config.get('path_budget_us'))
+        self._drawn_status: typing.Optional[str] = None
+        self._overlay_rects: typing.List[pygame.Rect] = []
         self.player = Player(app = self)
 
+    def level_seed(self, level: int) -> typing.Optional[int]:
+        return None if self.seed is None else self.seed + level
+
+    def build_maze(self, seed: typing.Optional[int]) -> Maze:
+        # an empty maze of the configured kind, maze_steps fills it in
+        config = self.config
+        if config.get('level'):
+            # a prebuilt layout saved with --save-level, mapped instead of generated
+            maze = load_level(self, config['level'], compact = config.get('compact_maze', False))
+        else:
+            if config.get('chunk_size'):
+                # mazes bigger than the window, generated a tile at a time around the player
+                maze = ChunkedMaze(self, rows = config['rows'], cols = config['cols'], seed = seed, tile_size = config['chunk_size'], max_tiles = config.get('max_chunks', 256), cell_size = config.get('cell_size', 50))
+            else:
+                maze = Maze(self, rows = config.get('rows', 10), cols = config.get('cols', 22), compact = config.get('compact_maze', False), seed = seed)
+            maze.loop_precent = config.get('loop_precent', maze.loop_precent)
+        if not isinstance(maze, ChunkedMaze): # never whole, there is no graph of it
+            # path searches (find_path, "scheduled" pathing) run on the corridor-compressed junction graph
+            maze.compress_paths = config.get('compress_paths', False)
+        return maze
+
+    def maze_steps(self, maze: Maze) -> typing.Generator[typing.Any, None, Maze]:
+        # everything a maze needs before a match starts on it, a step at a time for StepTask
+        if not self.config.get('level'):
+            yield from maze.generation_steps(algorithm = self.config.get('generator'))
+        if self.config.get('precompute_distances') and not isinstance(maze, ChunkedMaze):
+            maze.precompute()
+            yield None
+        if self.background is not None and not isinstance(maze, ChunkedMaze): # the walls baked onto it, the first frame only blits them
+            yield from maze.layer_steps(background = self.background)
+        return maze
+
+    def load_layout(self, sides: typing.MutableSequence[int]):
+        # a maze from elsewhere (a replay) in place of the one generated from config
+        self.maze.load_sides(sides)
+        if self.config.get('precompute_distances') and not isinstance(self.maze, ChunkedMaze):
+            self.maze.precompute()
+        self.reset_match()
+
+    def prepare_next(self):
+        self.upcoming = StepTask(self.maze_steps(self.build_maze(self.level_seed(self.level + 1))))
+
+    def restart(self):
+        # the next level on the pregenerated maze, whatever the frames didn't get to is finished here
+        if self.upcoming is None:
+            self.prepare_next()
+        maze = self.upcoming.finish() # type: ignore
+        with self.lock:
+            self.level += 1
+            self.maze = maze
+            self.reset_match()
+            if isinstance(self.controller, FleeBot):
+                self.controller.reset()
+            self.setup()
+            self.stepped_at = time.perf_counter()
+        self.prepare_next()
+
+    @property
+    def clock_time(self) -> float:
+        # windowed games step a fixed timestep too, so a match lasts match_time of simulated time
+        return self.ticks * self.timestep
+
     @property
     def remaining_time(self):
-        return int(self.started_at + self.match_time - time.time()) if self.status == 'playing' else 1
+        return int(self.started_at + self.match_time - self.clock_time) if self.status == 'playing' else 1
+
+    def read_input(self) -> int:
+        pressed = self.controller(self)
+        if self.recorder is not None:
+            self.recorder.record(pressed)
+        return pressed
+
+    def chaser_cells(self) -> typing.Tuple[int, ...]:
+        # Maze.index_of of the cell under every minotaur
+        if self.swarm is not None:
+            return tuple(self.swarm.cells().tolist())
+        # clamped onto the grid like Swarm.cells, a centre just outside it counts as the edge cell
+        maze = self.maze
+        cells = []
+        for sprite in self.sprites:
+            if isinstance(sprite, IDK):
+                x, y = sprite.rect.center
+                col = min(max(int((x - maze.offset.x) // maze.cell_size), 0), maze.cols - 1)
+                row = min(max(int((y - maze.offset.y) // maze.cell_size), 0), maze.rows - 1)
+                cells.append(col * maze.rows + row)
+        return tuple(cells)
 
     def load_assets(self, size = (40, 40)):
-        for folder in ['player', 'minotaur']:
-            self.assets.setdefault(folder, {})
-            for subfolder in ['left', 'right']:
-                self.assets[folder].setdefault(subfolder, [])
-                for file in os.listdir(os.path.join('assets', folder, subfolder)):
-                    self.assets[folder][subfolder].append(
-                        pygame.transform.scale(
-                            pygame.image.load(os.path.join('assets', folder, subfolder, file)).convert_alpha(), 
-                            size = size
-                        )
-                    )
+        if self.headless: # nothing is drawn, sprites only need the frame size and count
+            for folder in ['player', 'minotaur']:
+                for subfolder in ['left', 'right']:
+                    self.assets.setdefault(folder, {})[subfolder] = [pygame.Surface(size) for _ in sprite_frames(folder, subfolder)]
+            return
+
+        # decoded and scaled once, later launches read the packed atlas from .cache
+        assets, background = load_atlas(size = size, background_size = self.window_size)
+        for folder, faces in assets.items():
+            self.assets[folder] = {face: [frame.convert_alpha() for frame in frames] for face, frames in faces.items()}
+        self.background = background.convert_alpha()
 
     def debug_neighbours(self):
         pos = pygame.mouse.get_pos()
@@ -74,68 +224,340 @@ class Game:
                 color = (0, 0, 255),
                 rect = neighbour.rect.copy(),
             )
-            self.window.blit(pygame.font.SysFont('ariel', 70).render(direction, True, (0, 255, 0)), neighbour.rect.center)
-
-    def draw_text(self, text: str, rect_function, **kwargs):
-        font = pygame.font.Font('assets\crisium.ttf', kwargs.get('size', 40))
-        cords = rect_function(font.size(text))
-        self.window.blit(
-            font.render(text, True, kwargs.get('color', (0, 0, 0))), cords
-        )
+            self.window.blit(render_label(direction, 70, (0, 255, 0)), neighbour.rect.center)
 
-    def update_screen(self, delta_time: float):
-        self.window.fill(self.config['background_color'][self.status])
-        if self.status == 'playing':
-            self.sprites.update(delta_time = delta_time)
-            self.window.blit(self.background, dest = (0, 0))
-        self.sprites.draw(self.window)
-        self.maze.draw_grid()
-        if self.status == 'playing':
-            remaining = ':'.join([str(_) for _ in divmod(self.remaining_time, 60)])
-            self.draw_text('Remaining Time -> ' + remaining, rect_function = lambda size: (self.window_size[0] - size[0], size[1] // 2), color = (255, 0, 0))
-        elif self.status == 'won':
-            self.draw_text(self.config['text']['won'], rect_function = lambda size: (self.window_size[0] // 2 - size[0] // 2, self.window_size[1] // 2 - size[1] // 2))
-        elif self.status == 'lost':
-            self.draw_text(self.config['text']['lost'], rect_function = lambda size: (self.window_size[0] // 2 - size[0] // 2, self.window_size[1] // 2 - size[1] // 2))
+    def text_overlay(self, text: str, rect_function, **kwargs) -> typing.Tuple[pygame.Surface, pygame.Rect]:
+        # cached per (text, size, color), the timer only renders again when its text changes
+        with PROFILER.section('draw_text'):
+            surface = render_text(text, kwargs.get('size', 40), tuple(kwargs.get('color', (0, 0, 0))))
+            return surface, surface.get_rect(topleft = rect_function(surface.get_size()))
 
-    def run(self):
-        self.running = True
-        
-        self.maze.find_path(self.maze.grid[0][0], self.maze.grid[-1][-1])
+    def draw_text(self, text: str, rect_function, **kwargs):
+        self.window.blit(*self.text_overlay(text, rect_function, **kwargs))
+
+    def setup(self):
+        if self.record_path: # before the spawns, the recording starts from the state they are drawn from
+            root, extension = os.path.splitext(self.record_path)
+            self.recorder = Recorder(self.record_path if self.level == 0 else '{}.{}{}'.format(root, self.level, extension), snapshot_every = self.config.get('snapshot_every', 600))
+            self.recorder.start(self)
+
+        rows, cols = self.maze.play_area
+        start = self.maze.grid[0][0]
+        # minotaurs spawn in the far quarter, at least spawn_distance steps (not cells) from the player
+        min_distance = self.config.get('spawn_distance', 0)
+        if min_distance:
+            distances = {cell: self.maze.distance(cell, start) for col in range(cols // 2, cols) for cell in self.maze.grid[col][rows // 2:rows]}
+            far = [cell for cell, distance in distances.items() if distance is not None and distance >= min_distance]
+            # nothing is that far on a small maze, the furthest cells will have to do
+            far = far or [max(distances, key = lambda cell: distances[cell] or -1)]
 
         for _ in range(self.config["n_minotaurs"]):
-            row, col = random.randint(self.maze.rows // 2, self.maze.rows - 1), random.randint(self.maze.cols // 2, self.maze.cols - 1)
-            self.sprites.add(IDK(
-                app = self,
-                pos = self.maze.grid[col][row].rect.center))
+            if min_distance:
+                cell = self.random.choice(far)
+            else:
+                row, col = self.random.randint(rows // 2, rows - 1), self.random.randint(cols // 2, cols - 1)
+                cell = self.maze.grid[col][row]
+            self.spawn_cells.append(cell)
+            if not self.config.get('swarm'):
+                self.sprites.add(IDK(
+                    app = self,
+                    pos = cell.rect.center))
+        if self.config.get('swarm'):
+            self.swarm = Swarm(self, [cell.rect.center for cell in self.spawn_cells])
 
         self.sprites.add(self.player)
         self.player.rect.center = self.maze.grid[0][0].rect.center
+        self.maze.update_camera(self.player.rect)
 
-        while self.running:
-                                        
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    pygame.quit()
-                    sys.exit()
+    def update(self, delta_time: float):
+        if self.status != 'playing':
+            return
+        self.ticks += 1
+        for sprite in self.sprites:
+            sprite.previous_pos = sprite.rect.topleft
+
+        if self.swarm is not None:
+            caught = self.swarm.collides(self.player.rect)
+        else:
+            caught = self.player.rect.collidelist([m.rect for m in self.sprites.sprites() if isinstance(m, IDK)]) != -1
+        if caught:
+            self.status = 'lost'
+            self.caught_at = self.clock_time - self.started_at
+        elif self.remaining_time <= 0:
+            self.status = 'won'
+        else:
+            if self.swarm is not None: # before the player, where IDK sprites sit in the group
+                with PROFILER.section('swarm.update'):
+                    self.swarm.update(delta_time = delta_time)
+            with PROFILER.section('sprites.update'):
+                self.sprites.update(delta_time = delta_time)
+            if self.pathfinder is not None: # answers what the chasers just asked for, they pick it up on arrival
+                with PROFILER.section('pathfinder'):
+                    self.pathfinder.run()
+            self.maze.update_camera(self.player.rect)
+        if self.recorder is not None:
+            self.recorder.step(self)
+
+    def simulate(self, max_ticks: typing.Optional[int] = None) -> MatchResult:
+        self.setup()
+        while self.status == 'playing' and (max_ticks is None or self.ticks < max_ticks):
+            PROFILER.begin_frame()
+            self.update(delta_time = self.timestep)
+            PROFILER.end_frame()
+        self.finish_profiling()
+        self.finish_recording()
+
+        return MatchResult(
+            status = self.status,
+            ticks = self.ticks,
+            elapsed = self.ticks * self.timestep,
+            time_to_catch = self.caught_at
+        )
 
-            delta_time = self.clock.tick(60) / 1000 # convert to milli sec
+    def draw_sprites(self):
+        # sprites live in maze coordinates, the camera only moves for chunked mazes
+        camera = self.maze.camera
+        self.window.blits([(sprite.image, sprite.rect.move(-camera.x, -camera.y)) for sprite in self.sprites], doreturn = False)
+        if PROFILER.enabled:
+            PROFILER.count('blits', len(self.sprites))
+        if self.swarm is not None:
+            self.swarm.draw(self.window, camera)
+
+    def profiler_overlay(self) -> typing.Optional[typing.Tuple[pygame.Surface, pygame.Rect]]:
+        if not PROFILER.enabled:
+            return None
+        if not self._profiler_lines or self.ticks % 30 == 0: # percentiles sort the whole window, twice a second is plenty
+            self._profiler_lines = [render_label(line, 16, (255, 255, 255), name = 'monospace') for line in PROFILER.lines()]
+
+        width = max(line.get_width() for line in self._profiler_lines) + 10
+        panel = pygame.Surface((width, len(self._profiler_lines) * 18 + 10), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        for index, line in enumerate(self._profiler_lines):
+            panel.blit(line, (5, 5 + index * 18))
+        return panel, panel.get_rect(bottomleft = (5, self.window_size[1] - 5)) # the player starts top left
+
+    def overlays(self) -> typing.List[typing.Tuple[pygame.Surface, pygame.Rect]]:
+        # drawn over the sprites, in this order
+        if self.status == 'playing':
+            remaining = ':'.join([str(_) for _ in divmod(self.remaining_time, 60)])
+            overlays = [self.text_overlay('Remaining Time -> ' + remaining, rect_function = lambda size: (self.window_size[0] - size[0], size[1] // 2), color = (255, 0, 0))]
+        else:
+            overlays = [self.text_overlay(self.config['text'][self.status], rect_function = lambda size: (self.window_size[0] // 2 - size[0] // 2, self.window_size[1] // 2 - size[1] // 2))]
+        profiler = self.profiler_overlay()
+        if profiler:
+            overlays.append(profiler)
+        return overlays
+
+    def finish_profiling(self):
+        if self.trace_path:
+            PROFILER.dump_trace(self.trace_path)
+
+    def finish_recording(self):
+        if self.recorder is not None:
+            self.recorder.finish(self)
+
+    @contextlib.contextmanager
+    def interpolated(self, alpha: float):
+        # draw every sprite alpha of the way from its previous step to its current one, then put the rects back
+        if not self.interpolate or alpha <= 0 or self.status != 'playing':
+            yield
+            return
+        saved = []
+        for sprite in self.sprites:
+            if sprite.previous_pos is None:
+                continue
+            (x, y), (to_x, to_y) = sprite.previous_pos, sprite.rect.topleft
+            saved.append((sprite, sprite.rect))
+            sprite.rect = sprite.rect.move(round((x - to_x) * (1 - alpha)), round((y - to_y) * (1 - alpha)))
+        if self.swarm is not None:
+            self.swarm.alpha = alpha
+        self.maze.update_camera(self.player.rect)
+        try:
+            yield
+        finally:
+            for sprite, rect in saved:
+                sprite.rect = rect
+            if self.swarm is not None:
+                self.swarm.alpha = 1.0
+            self.maze.update_camera(self.player.rect)
+
+    def update_dirty(self) -> typing.List[pygame.Rect]:
+        # the static layer is exactly what sits under every sprite and overlay, copying parts of it back erases them
+        layer = self.maze.static_layer(background = self.background)
+        with PROFILER.section('draw_sprites'):
+            self.sprites.clear(self.window, layer)
+            for rect in self._overlay_rects:
+                self.window.blit(layer, rect, area = rect)
+            dirty = self.sprites.draw(self.window) # old and new rect of every sprite
+        overlays = self.overlays()
+        self.window.blits(overlays, doreturn = False)
+
+        dirty.extend(self._overlay_rects)
+        self._overlay_rects = [rect for _, rect in overlays]
+        dirty.extend(self._overlay_rects)
+        if PROFILER.enabled:
+            PROFILER.count('blits', len(self.sprites) + len(dirty))
+            PROFILER.count('dirty_pixels', sum(rect.width * rect.height for rect in dirty))
+        return dirty
+
+    def update_screen(self) -> typing.Optional[typing.List[pygame.Rect]]:
+        # returns the rects that changed, None when the whole window did
+        if self.dirty_rects and self.status == self._drawn_status:
+            if self.status == 'playing':
+                return self.update_dirty()
+            if not PROFILER.enabled: # the end screen doesn't move
+                return []
+        self._drawn_status = self.status
 
-            if self.player.rect.collidelist([m.rect for m in self.sprites.sprites() if isinstance(m, IDK)]) != -1:
-                self.status = 'lost'
-            elif self.remaining_time <= 0:
-                self.status = 'won'
-                
-            self.update_screen(delta_time = delta_time)
+        if self.status == 'playing':
+            with PROFILER.section('draw_grid'):
+                self.maze.draw_grid(background = self.background) # one blit, walls are baked into the background
+            with PROFILER.section('draw_sprites'):
+                if self.dirty_rects:
+                    self.sprites.draw(self.window) # same picture, but the group learns where to erase next frame
+                else:
+                    self.draw_sprites()
+        else:
+            self.window.fill(self.config['background_color'][self.status])
+            self.draw_sprites()
+            self.maze.draw_grid()
+        overlays = self.overlays()
+        self.window.blits(overlays, doreturn = False)
+        self._overlay_rects = [rect for _, rect in overlays]
+        if PROFILER.enabled:
+            PROFILER.count('dirty_pixels', self.window_size[0] * self.window_size[1])
+        return None
+
+    def present(self, rects: typing.Optional[typing.List[pygame.Rect]]):
+        with PROFILER.section('flip'):
+            if rects is None:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update(rects)
+
+    def draw_frame(self, alpha: typing.Optional[float] = None):
+        # alpha is how far into the next step we are, with sim_thread it's read off the clock
+        with self.lock:
+            if alpha is None:
+                alpha = min((time.perf_counter() - self.stepped_at) / self.timestep, 1.0)
+            with self.interpolated(alpha):
+                rects = self.update_screen()
+                if self.debug:
+                    self.debug_neighbours()
+        self.present(rects)
+
+    def run_simulation(self):
+        # sim_thread: steps on a fixed schedule, the main thread only draws whatever the last step left behind
+        next_step_at = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            if now - next_step_at > self.max_frame_time: # fell too far behind, drop the time instead of catching up
+                next_step_at = now
+            while next_step_at <= now:
+                with self.lock:
+                    self.update(delta_time = self.timestep)
+                    self.stepped_at = time.perf_counter()
+                next_step_at += self.timestep
+            time.sleep(max(0.0, next_step_at - time.perf_counter()))
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+                self.finish_profiling()
+                self.finish_recording()
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                PROFILER.toggle()
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_r, pygame.K_RETURN) and self.status != 'playing':
+                self.restart()
+
+    def watch(self, task: StepTask, draw: typing.Callable[..., None]):
+        # debug: debug_steps of task a frame, each drawn, the window keeps handling events meanwhile
+        while self.running and not task.advance(max_steps = self.debug_steps):
+            self.handle_events()
+            self.clock.tick(self.max_fps)
+            if task.last is not None:
+                draw(*task.last)
+                pygame.display.flip()
+        return task.result
 
-            if self.debug:
-                self.debug_neighbours()
+    def run(self):
+        self.running = True
+        self.watch(self.generating, self.maze.draw_generation)
+        self.setup()
+        if self.debug:
+            search = StepTask(self.maze.search_steps(self.maze.grid[0][0], self.maze.grid[-1][-1]))
+            self.maze.path = self.watch(search, self.maze.draw_search)
+        self.prepare_next()
+        accumulator = 0.0
+        if self.sim_thread:
+            self.stepped_at = time.perf_counter()
+            threading.Thread(target = self.run_simulation, name = 'simulation', daemon = True).start()
 
-            pygame.display.flip()
+        while self.running:
+            self.handle_events()
+
+            frame_time = self.clock.tick(self.max_fps) / 1000 # convert to seconds
+            PROFILER.begin_frame() # the frame starts after tick, time spent waiting for vsync isn't ours
+
+            if self.sim_thread:
+                self.draw_frame()
+            else:
+                # every step is exactly timestep long, so a slow frame can't carry a sprite through a wall
+                accumulator += min(frame_time, self.max_frame_time)
+                while accumulator >= self.timestep:
+                    self.update(delta_time = self.timestep)
+                    accumulator -= self.timestep
+                self.draw_frame(alpha = accumulator / self.timestep)
+            if not self.upcoming.done: # type: ignore
+                with PROFILER.section('pregenerate'):
+                    self.upcoming.advance(budget_us = self.pregenerate_budget_us) # type: ignore
+            PROFILER.end_frame()
 
 if __name__ == '__main__':
-    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--headless', action = 'store_true', help = 'simulate one match without a window and print the result')
+    parser.add_argument('--batch', action = 'store_true', help = 'run a headless balance sweep, see batch.py --help')
+    parser.add_argument('--save-level', metavar = 'PATH', help = 'generate the maze from config.json, save it as a level and exit')
+    parser.add_argument('--trace', metavar = 'PATH', help = 'profile every frame and write a chrome://tracing json file on exit')
+    parser.add_argument('--record', metavar = 'PATH', help = 'write a replay of the match, later levels get .1, .2, ... before the extension')
+    parser.add_argument('--replay', metavar = 'PATH', help = 're-simulate a recorded match headless, exits 1 if it ends differently')
+    parser.add_argument('--seek', type = int, metavar = 'TICK', help = 'with --replay, jump to TICK and print the state there')
+    args, batch_args = parser.parse_known_args()
+
+    if args.batch:
+        import batch
+        batch.main(batch_args)
+        sys.exit()
+
+    with open('config.json') as f:
+        config = json.loads(f.read())
+    if args.trace:
+        config['trace'] = args.trace
+    if args.record:
+        config['record'] = args.record
+
+    if args.replay:
+        replay = ReplayPlayer(args.replay, Game)
+        started_at = time.perf_counter()
+        game = replay.seek(args.seek) if args.seek is not None else replay.play()
+        took = time.perf_counter() - started_at
+        print('tick {} {} player at {}, {:.1f} ms'.format(game.ticks, game.status, game.player.rect.center, took * 1000))
+        if args.seek is None:
+            print('{:.0f}x real time, recorded {}, replayed {}'.format(game.ticks * game.timestep / took, replay.result, (game.status, game.ticks, game.caught_at)))
+            sys.exit(0 if replay.matches() else 1)
+        sys.exit()
+
+    if args.headless:
+        print(Game(config = config, headless = True).simulate())
+        sys.exit()
+
+    if args.save_level:
+        save_level(Game(config = config, headless = True).maze, args.save_level)
+        sys.exit()
+
     pygame.init()
 
     # with Image.open('assets/Mini-Knights.gif') as im:
@@ -170,8 +592,5 @@ if __name__ == '__main__':
     #         _im = _im.transpose(Image.FLIP_LEFT_RIGHT)
     #         _im.save('assets/minotaur/left/{}.png'.format(frame_index // 6))
 
-    with open('config.json') as f:
-        config = json.loads(f.read())
-
     app = Game(config = config)
     app.run()
@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import time
+import socket
+import struct
+import typing
+import logging
+import asyncio
+import argparse
+import collections
+import concurrent.futures
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from game import Game
+from utils import IDK, ChunkedMaze, MAX_SPRITES, HELLO, INPUT, END, DeltaEncoder, read_message, encode_message, encode_match, decode_input
+from utils.generators import GENERATORS
+
+log = logging.getLogger('server')
+
+# config keys a client's HELLO may set and the range their values are clamped to, everything
+# else is the server's config.json. A match is a whole Game, these keep one HELLO from costing
+# the server much more time or memory than another
+CLIENT_LIMITS = {
+    'seed': (0, 2 ** 32 - 1),
+    'n_minotaurs': (0, 64),
+    'rows': (2, 100),
+    'cols': (2, 100),
+    'match_time': (10, 600),
+    'loop_precent': (0, 100),
+}
+
+def client_config(overrides: dict) -> dict:
+    # the HELLO overrides a server accepts, ValueError when one isn't even the right kind of value
+    if not isinstance(overrides, dict):
+        raise ValueError('HELLO wants a json object, not {}'.format(type(overrides).__name__))
+    config = {}
+    for key, (low, high) in CLIENT_LIMITS.items():
+        if key in overrides:
+            value = overrides[key]
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError('{} should be an integer -> {!r}'.format(key, value))
+            config[key] = min(max(value, low), high)
+    if overrides.get('generator') is not None:
+        if overrides['generator'] not in GENERATORS:
+            raise ValueError('Unknown maze generator -> {!r}'.format(overrides['generator']))
+        config['generator'] = overrides['generator']
+    return config
+
+class Match:
+    # one connection's Game, headless. The tick loop steps it with the last input the client sent
+    def __init__(self, writer: asyncio.StreamWriter, config: dict) -> None:
+        self.writer = writer
+        self.pressed = 0
+        self.ack = 0 # sequence number of that input
+        self.encoder = DeltaEncoder()
+        self.game = Game(config, headless = True, controller = self)
+        if isinstance(self.game.maze, ChunkedMaze):
+            raise TypeError('chunked mazes are never whole, there is no maze to send once')
+        self.game.setup()
+        self.chasers = [sprite for sprite in self.game.sprites if isinstance(sprite, IDK)]
+        if self.header()['sprites'] > MAX_SPRITES:
+            raise ValueError('{} sprites, a STATE holds {} at most'.format(self.header()['sprites'], MAX_SPRITES))
+
+    def __call__(self, app: Game) -> int:
+        return self.pressed
+
+    def positions(self) -> typing.List[typing.Tuple[int, int]]:
+        # sprite centres, the player first
+        positions = [self.game.player.rect.center]
+        positions.extend(sprite.rect.center for sprite in self.chasers)
+        if self.game.swarm is not None:
+            positions.extend((int(x), int(y)) for x, y in self.game.swarm.position.tolist())
+        return positions
+
+    def header(self) -> dict:
+        game, maze = self.game, self.game.maze
+        return {
+            'rows': maze.rows,
+            'cols': maze.cols,
+            'seed': maze.seed,
+            'window_size': list(game.window_size),
+            'tick_rate': round(1 / game.timestep),
+            'match_time': game.match_time,
+            'sprites': 1 + len(self.chasers) + (len(game.swarm) if game.swarm is not None else 0),
+        }
+
+    def result(self) -> dict:
+        game = self.game
+        return {'status': game.status, 'ticks': game.ticks, 'time_to_catch': game.caught_at}
+
+class GameServer:
+    # Every match of the process on one fixed tick: step() updates each Game once and writes its
+    # STATE, run() calls it every timestep. Falling more than max_lag behind drops the time
+    # instead of catching up, like Game.run_simulation
+    def __init__(self, config: dict, max_lag: float = 0.25, max_buffer: int = 1 << 16, window: int = 600, builders: int = 1) -> None:
+        self.config = dict(config, debug = False, profiler = False)
+        self.timestep = 1 / self.config.get('tick_rate', 60)
+        self.max_lag = max_lag
+        self.max_buffer = max_buffer
+        self.matches: typing.Dict[asyncio.StreamWriter, Match] = {}
+        # Games are built on these threads so generating a level never holds up the tick
+        self.builder = concurrent.futures.ThreadPoolExecutor(max_workers = builders, thread_name_prefix = 'match-builder')
+
+        # the last `window` ticks, for stats()
+        self.tick_times: typing.Deque[float] = collections.deque(maxlen = window)
+        # CPU time of the same ticks, what matches per core comes from when other processes share the box
+        self.cpu_times: typing.Deque[float] = collections.deque(maxlen = window)
+        self.lateness: typing.Deque[float] = collections.deque(maxlen = window)
+        self.match_ticks: typing.Deque[int] = collections.deque(maxlen = window)
+        self.ticks = 0
+        self.bytes_sent = 0
+        self.skipped = 0
+        self.failed = 0
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 7777) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        sock = writer.get_extra_info('socket')
+        if sock is not None: # STATEs are small and go out every tick, don't let Nagle hold them back
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                if kind == HELLO:
+                    await self.start_match(writer, client_config(json.loads(payload or b'{}')))
+                elif kind == INPUT and writer in self.matches:
+                    match = self.matches[writer]
+                    match.ack, match.pressed = decode_input(payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # gone
+        except (ValueError, TypeError, KeyError, struct.error) as error: # a malformed message or HELLO
+            log.warning('dropping %s: %s: %s', writer.get_extra_info('peername'), type(error).__name__, error)
+        except Exception:
+            log.exception('dropping %s', writer.get_extra_info('peername'))
+        finally:
+            self.matches.pop(writer, None)
+            writer.close()
+
+    async def start_match(self, writer: asyncio.StreamWriter, overrides: dict) -> typing.Optional[Match]:
+        self.matches.pop(writer, None) # a HELLO mid match gives it up
+        match = await asyncio.get_running_loop().run_in_executor(self.builder, Match, writer, dict(self.config, **overrides))
+        if writer.is_closing(): # left while the level was generated
+            return None
+        self.matches[writer] = match
+        writer.write(encode_match(match.header(), bytes(match.game.maze.sides)))
+        return match
+
+    def step(self):
+        # one tick of every match, then its STATE, and the END of the ones that finished
+        self.ticks += 1
+        self.match_ticks.append(len(self.matches))
+        for writer, match in list(self.matches.items()):
+            if writer.is_closing(): # handle() hasn't seen the disconnect yet
+                del self.matches[writer]
+                continue
+            try:
+                self.step_match(writer, match)
+            except Exception:
+                # one broken match mustn't stop the others, its client is dropped
+                log.exception('match of %s failed on tick %d, closing it', writer.get_extra_info('peername'), match.game.ticks)
+                self.failed += 1
+                self.matches.pop(writer, None)
+                writer.close()
+
+    def step_match(self, writer: asyncio.StreamWriter, match: Match):
+        game = match.game
+        game.update(delta_time = self.timestep)
+        if writer.transport.get_write_buffer_size() > self.max_buffer and game.status == 'playing':
+            # the client isn't reading, skip it until it catches up and send it whole again then
+            match.encoder.reset()
+            self.skipped += 1
+            return
+        data = match.encoder.encode(game.ticks, match.ack, game.status, game.remaining_time, match.positions())
+        if game.status != 'playing':
+            data += encode_message(END, json.dumps(match.result()).encode())
+            del self.matches[writer]
+        writer.write(data)
+        self.bytes_sent += len(data)
+
+    async def run(self):
+        next_tick = time.perf_counter()
+        while True:
+            now = time.perf_counter()
+            if now - next_tick > self.max_lag:
+                next_tick = now
+            if now >= next_tick:
+                self.lateness.append(now - next_tick)
+                cpu = time.thread_time()
+                self.step()
+                self.cpu_times.append(time.thread_time() - cpu)
+                self.tick_times.append(time.perf_counter() - now)
+                next_tick += self.timestep
+            await asyncio.sleep(max(0.0, next_tick - time.perf_counter())) # 0 still lets the connections in
+
+    def reset_stats(self):
+        self.tick_times.clear()
+        self.cpu_times.clear()
+        self.lateness.clear()
+        self.match_ticks.clear()
+        self.ticks = 0
+        self.bytes_sent = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def stats(self) -> dict:
+        def percentile(values, fraction):
+            values = sorted(values)
+            return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+        cpu_time = sum(self.cpu_times) / len(self.cpu_times) if self.cpu_times else 0.0
+        matches = sum(self.match_ticks) / len(self.match_ticks) if self.match_ticks else 0.0
+        return {
+            'matches': round(matches, 1),
+            'tick_p50_ms': percentile(self.tick_times, 0.5) * 1000,
+            'tick_p99_ms': percentile(self.tick_times, 0.99) * 1000,
+            'late_p99_ms': percentile(self.lateness, 0.99) * 1000,
+            # how many matches one core steps at this cost per match, with nothing else to do
+            'matches_per_core': matches * self.timestep / cpu_time if cpu_time else 0.0,
+            'bytes_per_match_tick': self.bytes_sent / sum(self.match_ticks) if sum(self.match_ticks) else 0.0,
+            'skipped': self.skipped,
+            'failed': self.failed,
+        }
+
+async def main(args):
+    logging.basicConfig(level = logging.INFO, format = '%(asctime)s %(levelname)s %(message)s')
+    with open('config.json') as f:
+        config = json.loads(f.read())
+    server = GameServer(config)
+    listener = await server.serve(args.host, args.port)
+    print('serving on {}'.format(', '.join(str(sock.getsockname()) for sock in listener.sockets)))
+    ticks = asyncio.ensure_future(server.run())
+    while True:
+        await asyncio.sleep(args.stats_every)
+        stats = server.stats()
+        print('{matches:6.1f} matches  tick p50 {tick_p50_ms:6.2f} ms  p99 {tick_p99_ms:6.2f} ms  late p99 {late_p99_ms:6.2f} ms  '
+              '{matches_per_core:7.0f} matches/core  {bytes_per_match_tick:6.1f} bytes/match/tick  {skipped} skipped  {failed} failed'.format(**stats))
+        server.reset_stats()
+        if ticks.done():
+            ticks.result() # the tick loop died, show why
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Run many headless matches for remote players, see client.py')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 7777)
+    parser.add_argument('--stats-every', type = float, default = 10, help = 'seconds between stats lines')
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        sys.exit()
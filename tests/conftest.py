@@ -0,0 +1,36 @@
+import os
+import sys
+import types
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import pytest
+import pygame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def app():
+    # what Maze needs of a Game, on a hidden window
+    if not pygame.display.get_init():
+        pygame.display.init()
+    window = pygame.display.set_mode((1280, 720))
+    return types.SimpleNamespace(
+        debug = False,
+        paused = False,
+        config = {'cell_color': [255, 255, 255]},
+        window = window,
+        window_size = window.get_size(),
+        maze = None,
+        pathfinder = None
+    )
+
+@pytest.fixture
+def config():
+    # config.json as a headless Game runs it, from the repo root where the assets are
+    os.chdir(ROOT)
+    with open('config.json') as f:
+        return dict(json.loads(f.read()), debug = False, profiler = False)
@@ -0,0 +1,51 @@
+import os
+import glob
+
+import pytest
+import pygame
+
+from utils import load_atlas
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT) # assets are relative to the repo root
+    pygame.display.init()
+    return str(tmp_path / 'cache')
+
+def atlas(cache_dir: str) -> str:
+    files = glob.glob(os.path.join(cache_dir, 'atlas-*.bin'))
+    assert len(files) == 1
+    return files[0]
+
+@pytest.mark.parametrize('damage', [
+    lambda data: data[:8], # cut off right after the magic
+    lambda data: data[:8] + (1).to_bytes(4, 'little') + b'5', # a header that isn't a list
+    lambda data: data[:len(data) // 2], # frames cut short
+])
+def test_damaged_cache_is_a_miss(cache_dir, damage):
+    assets, background = load_atlas((40, 40), (320, 240), cache_dir = cache_dir)
+    path = atlas(cache_dir)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(damage(data))
+
+    reloaded, reloaded_background = load_atlas((40, 40), (320, 240), cache_dir = cache_dir)
+    assert reloaded_background.get_size() == background.get_size()
+    assert {folder: {face: len(frames) for face, frames in faces.items()} for folder, faces in reloaded.items()} == \
+           {folder: {face: len(frames) for face, frames in faces.items()} for folder, faces in assets.items()}
+    with open(atlas(cache_dir), 'rb') as f:
+        assert f.read() == data # written whole again
+
+def test_cleanup_keeps_other_writes(cache_dir):
+    os.makedirs(cache_dir)
+    stale, writing = os.path.join(cache_dir, 'atlas-0000000000000000.bin'), os.path.join(cache_dir, 'atlas-1111111111111111.bin.99.tmp')
+    for path in [stale, writing]:
+        with open(path, 'wb') as f:
+            f.write(b'x')
+    load_atlas((40, 40), (320, 240), cache_dir = cache_dir)
+    assert not os.path.exists(stale)
+    assert os.path.exists(writing)
+    atlas(cache_dir)
@@ -0,0 +1,20 @@
+import pygame
+
+from game import Game
+
+def test_first_maze_bakes_its_walls(config):
+    # maze_steps bakes the wall layer with the rest of generation, the first frame only blits it
+    pygame.init()
+    game = Game(dict(config, seed = 0))
+    assert game.background is not None
+    assert game.background in game.maze._layers
+
+def test_chaser_cells_off_the_grid(config):
+    game = Game(dict(config, seed = 0, n_minotaurs = 2), headless = True)
+    game.setup()
+    maze = game.maze
+    chasers = [sprite for sprite in game.sprites if sprite is not game.player]
+    chasers[0].rect.center = (int(maze.offset.x) - 100, int(maze.offset.y) - 100)
+    chasers[1].rect.center = (int(maze.offset.x) + maze.cols * maze.cell_size + 100, int(maze.offset.y) + 10)
+    assert game.chaser_cells() == (0, (maze.cols - 1) * maze.rows)
+    game.controller(game) # FleeBot reads them every tick
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from game import Game
+from utils import Maze, JunctionGraph, PathScheduler, FleeBot
+
+def loop_maze(app, rows: int, cols: int, seed: int, loops: int = 20) -> Maze:
+    maze = app.maze = Maze(app, rows = rows, cols = cols, seed = seed, compact = True)
+    maze.loop_precent = loops
+    maze.create_maze()
+    return maze
+
+@pytest.mark.parametrize('seed', range(40))
+def test_open_side_patch_matches_rebuild(app, seed):
+    # loops give nodes corridors that come back to themselves, both ends list them
+    maze = loop_maze(app, 15, 15, seed)
+    maze.compress_paths = True
+    graph = maze.junction_graph()
+    rng = random.Random(seed)
+    for _ in range(30):
+        cell = maze.grid[rng.randrange(15)][rng.randrange(15)]
+        closed = [(neighbour, direction) for neighbour, direction in maze.get_neighbours(cell.pos) if direction not in cell.open_sides]
+        if not closed:
+            continue
+        neighbour, direction = rng.choice(closed)
+        maze.open_side(cell.pos, direction)
+        maze.open_side(neighbour.pos, maze.reverse_direction(direction))
+        assert maze.junction_graph() is graph # patched, not built again
+        fresh = JunctionGraph(maze)
+        start, goal = maze.grid[rng.randrange(15)][rng.randrange(15)], maze.grid[rng.randrange(15)][rng.randrange(15)]
+        assert len(graph.find_path(start, goal)) == len(fresh.find_path(start, goal))
+
+@pytest.mark.parametrize('loops', [0, 20])
+def test_graph_paths_as_short_as_cell_search(app, loops):
+    maze = loop_maze(app, 30, 30, seed = loops)
+    rng = random.Random(loops)
+    for _ in range(50):
+        start, goal = maze.grid[rng.randrange(30)][rng.randrange(30)], maze.grid[rng.randrange(30)][rng.randrange(30)]
+        maze.compress_paths = False
+        cells = maze.find_path(start, goal)
+        maze.compress_paths = True
+        path = maze.find_path(start, goal)
+        assert len(path) == len(cells)
+        assert path[0] == start and path[-1] == goal
+        # every hop goes through an open side
+        for a, b in zip(path, path[1:]):
+            assert b in [neighbour for neighbour, _ in maze.get_neighbours(a.pos, filter_cant_move = True)]
+
+def test_scheduler_searches_the_graph(app):
+    maze = loop_maze(app, 30, 30, seed = 1)
+    maze.compress_paths = True
+    scheduler = PathScheduler(maze, budget = 10 ** 6)
+    start, goal = maze.grid[0][0], maze.grid[29][29]
+    future = scheduler.request(start, goal)
+    scheduler.run()
+    graph = maze.junction_graph()
+    assert future.result() == graph.find_path(start, goal)
+    # a junction graph search expands far fewer nodes than the path has cells
+    assert scheduler.expanded < len(future.result())
+
+def test_compress_paths_config(config):
+    game = Game(dict(config, seed = 0, compress_paths = True, pathing = 'scheduled'), headless = True, controller = FleeBot(random.Random(0)))
+    assert game.maze.compress_paths
+    game.setup()
+    for _ in range(120):
+        game.update(delta_time = game.timestep)
+    assert game.maze.junction_graph().expanded > 0 # the chasers' searches ran on it
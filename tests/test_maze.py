@@ -0,0 +1,19 @@
+import random
+
+from utils import Maze
+
+def test_distance_field_matches_flow_field(app):
+    maze = app.maze = Maze(app, rows = 20, cols = 30, seed = 0, compact = True)
+    maze.create_maze()
+    rng = random.Random(0)
+    a, b = maze.grid[rng.randrange(30)][rng.randrange(20)], maze.grid[rng.randrange(30)][rng.randrange(20)]
+    from_a, from_b = maze.distance_field([a]), maze.distance_field([b])
+    assert from_a[maze.index_of(a.pos)] == 0
+    # several sources: the nearest one counts
+    assert maze.distance_field([a, b, None]) == [min(x, y) for x, y in zip(from_a, from_b)]
+
+    for cell in [maze.grid[rng.randrange(30)][rng.randrange(20)] for _ in range(20)]:
+        assert maze.field_distance(cell, a) == from_a[maze.index_of(cell.pos)]
+        step = maze.next_step(cell, a)
+        if cell != a:
+            assert from_a[maze.index_of(step.pos)] == from_a[maze.index_of(cell.pos)] - 1
@@ -0,0 +1,32 @@
+import random
+import typing
+
+from utils import Maze, PathScheduler
+
+def scheduled(app, budget: int, budget_us: typing.Optional[float] = None) -> typing.Tuple[PathScheduler, list]:
+    # 50 searches between random cells of a 60x60 maze, with the futures they'll answer
+    maze = app.maze = Maze(app, rows = 60, cols = 60, seed = 0, compact = True)
+    maze.create_maze()
+    scheduler = PathScheduler(maze, budget = budget, budget_us = budget_us)
+    rng = random.Random(0)
+    pending = []
+    for _ in range(50):
+        start, goal = maze.grid[rng.randrange(60)][rng.randrange(60)], maze.grid[rng.randrange(60)][rng.randrange(60)]
+        pending.append((scheduler.request(start, goal), start, goal))
+    return scheduler, pending
+
+def test_count_budget_caps_a_frame(app):
+    scheduler, _ = scheduled(app, budget = 10)
+    assert scheduler.run() == 10
+    assert scheduler.run() == 10
+
+def test_time_budget_replaces_the_count(app):
+    # with budget_us set a frame runs until the clock says stop, past budget expansions
+    scheduler, _ = scheduled(app, budget = 10, budget_us = 5000)
+    assert scheduler.run() > 10
+
+def test_results_match_find_path(app):
+    scheduler, pending = scheduled(app, budget = 10 ** 6)
+    scheduler.run()
+    for future, start, goal in pending:
+        assert len(future.result()) == len(scheduler.maze.find_path(start, goal))
@@ -1,2 +1,14 @@
 from .sprites import * # type: ignore
-from .maze import * # type: ignore
\ No newline at end of file
+from .maze import * # type: ignore
+from .bots import * # type: ignore
+from .text import * # type: ignore
+from .assets import * # type: ignore
+from .chunks import * # type: ignore
+from .levels import * # type: ignore
+from .planning import * # type: ignore
+from .profiler import * # type: ignore
+from .swarm import * # type: ignore
+from .graph import * # type: ignore
+from .steps import * # type: ignore
+from .replay import * # type: ignore
+from .net import * # type: ignore
@@ -0,0 +1,106 @@
+import os
+import json
+import typing
+import struct
+import hashlib
+import concurrent.futures
+
+import pygame
+
+__all__ = (
+    "CACHE_DIR",
+    "sprite_frames",
+    "load_atlas"
+)
+
+ASSET_DIR = 'assets'
+CACHE_DIR = '.cache'
+BACKGROUND = os.path.join(ASSET_DIR, 'background.jpg')
+SPRITE_FOLDERS = ('player', 'minotaur')
+FACES = ('left', 'right')
+
+# atlas file: magic, header length, json header with every frame size, then raw RGBA frames back to back
+ATLAS_MAGIC = b'MZATLAS1'
+
+SizeType = typing.Tuple[int, int]
+AssetsType = typing.Dict[str, typing.Dict[str, typing.List[pygame.Surface]]]
+
+_tobytes = getattr(pygame.image, 'tobytes', None) or pygame.image.tostring
+
+def sprite_frames(folder: str, face: str) -> typing.List[str]:
+    # frames are named 0.png, 1.png, ... and os.listdir returns them in any order
+    directory = os.path.join(ASSET_DIR, folder, face)
+    return [os.path.join(directory, file) for file in sorted(os.listdir(directory), key = lambda file: int(os.path.splitext(file)[0]))]
+
+def _cache_key(paths: typing.List[str], size: SizeType, background_size: SizeType) -> str:
+    sources = [(path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths]
+    return hashlib.sha1(json.dumps([ATLAS_MAGIC.decode(), list(size), list(background_size), sources]).encode()).hexdigest()[:16]
+
+def _decode(path: str, size: SizeType) -> pygame.Surface:
+    return pygame.transform.scale(pygame.image.load(path), size)
+
+def _read_atlas(path: str, count: int) -> typing.List[pygame.Surface]:
+    with open(path, 'rb') as f:
+        data = memoryview(f.read())
+
+    if bytes(data[:len(ATLAS_MAGIC)]) != ATLAS_MAGIC:
+        raise ValueError('not a sprite atlas: {}'.format(path))
+    header_size, = struct.unpack_from('<I', data, len(ATLAS_MAGIC))
+    offset = len(ATLAS_MAGIC) + 4
+    sizes = json.loads(bytes(data[offset:offset + header_size]))
+    offset += header_size
+    if len(sizes) != count:
+        raise ValueError('sprite atlas has {} frames, expected {}'.format(len(sizes), count))
+
+    surfaces = []
+    for width, height in sizes:
+        end = offset + width * height * 4
+        surfaces.append(pygame.image.frombuffer(data[offset:end], (width, height), 'RGBA'))
+        offset = end
+    return surfaces
+
+def _write_atlas(path: str, surfaces: typing.List[pygame.Surface]):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    header = json.dumps([list(surface.get_size()) for surface in surfaces]).encode()
+
+    # write next to the real file and swap it in, so a crash never leaves half an atlas behind.
+    # One temporary file per process, batch workers and server builders may write the same atlas at once
+    temporary = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temporary, 'wb') as f:
+        f.write(ATLAS_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for surface in surfaces:
+            f.write(_tobytes(surface, 'RGBA'))
+    os.replace(temporary, path)
+
+    # atlases for other sizes or older sources, only finished ones: a .tmp may be another process's write
+    for file in os.listdir(os.path.dirname(path)):
+        if file.startswith('atlas-') and file.endswith('.bin') and file != os.path.basename(path):
+            try:
+                os.remove(os.path.join(os.path.dirname(path), file))
+            except FileNotFoundError:
+                pass # another process cleaned it up first
+
+def load_atlas(size: SizeType, background_size: SizeType, cache_dir: str = CACHE_DIR) -> typing.Tuple[AssetsType, pygame.Surface]:
+    # returns unconverted surfaces, call convert_alpha once a display exists
+    entries = [(folder, face, path) for folder in SPRITE_FOLDERS for face in FACES for path in sprite_frames(folder, face)]
+    paths = [path for *_, path in entries] + [BACKGROUND]
+    atlas_path = os.path.join(cache_dir, 'atlas-{}.bin'.format(_cache_key(paths, size, background_size)))
+
+    try:
+        surfaces = _read_atlas(atlas_path, count = len(paths))
+    except (OSError, ValueError, TypeError, struct.error):
+        # missing, or cut short / garbled by something other than us: decode the sources again
+        # pygame releases the GIL while decoding and scaling, so threads do overlap here
+        with concurrent.futures.ThreadPoolExecutor() as pool:
+            surfaces = list(pool.map(_decode, paths, [size] * len(entries) + [background_size]))
+        try:
+            _write_atlas(atlas_path, surfaces)
+        except OSError:
+            pass # a read only checkout still starts, just without the cache
+
+    assets: AssetsType = {}
+    for (folder, face, _), surface in zip(entries, surfaces):
+        assets.setdefault(folder, {}).setdefault(face, []).append(surface)
+    return assets, surfaces[-1]
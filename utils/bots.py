@@ -0,0 +1,82 @@
+import random
+import typing
+
+from .maze import Cell
+from .sprites import INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT
+
+if typing.TYPE_CHECKING:
+    from game import Game
+
+__all__ = (
+    "FleeBot",
+)
+
+class FleeBot:
+    # drives the player for headless matches. It walks cell centre to cell centre towards the
+    # cell furthest from every minotaur among the cells it can reach before any of them
+    def __init__(self, rng: typing.Optional[random.Random] = None) -> None:
+        self.random = rng or random.Random()
+        self.moving_to: typing.Optional[Cell] = None
+        self._chaser_cells: typing.Tuple[int, ...] = ()
+
+    def reset(self):
+        # a new match, the cell it was heading for belongs to the last maze
+        self.moving_to = None
+        self._chaser_cells = ()
+
+    def __call__(self, app: "Game") -> int:
+        center = app.player.rect.center
+        if self.moving_to is None or self._arrived(center, self.moving_to.rect.center):
+            maze = app.maze
+            chaser_cells = app.chaser_cells()
+            current = self.moving_to or maze.get_cell(center)
+            if self.moving_to is None or chaser_cells != self._chaser_cells or self.moving_to != current:
+                self._chaser_cells = chaser_cells
+                self.moving_to = self.choose(app, current, chaser_cells)
+        return self.steer(center, self.moving_to.rect.center)
+
+    def choose(self, app: "Game", current: Cell, chaser_cells: typing.Iterable[int]) -> Cell:
+        maze = app.maze
+        from_chasers = maze.distance_field(maze.grid[index // maze.rows][index % maze.rows] for index in chaser_cells)
+        from_player = maze.distance_field([current])
+
+        # unreachable by the minotaurs beats everything, otherwise the furthest cell we get to first
+        best, goals = -1, []
+        # chunked mazes return a sparse dict of the cells their bounded search reached
+        for index, distance in (from_player.items() if isinstance(from_player, dict) else enumerate(from_player)):
+            if distance == -1:
+                continue
+            safety = from_chasers[index] if from_chasers[index] != -1 else maze.rows * maze.cols
+            if safety <= distance:
+                continue
+            if safety > best:
+                best, goals = safety, [index]
+            elif safety == best:
+                goals.append(index)
+        if not goals:
+            return current
+
+        # walk back from the goal to the cell next to us
+        index = self.random.choice(goals)
+        while from_player[index] > 1:
+            col, row = maze.pos_of(index)
+            for neighbour, _ in maze.get_neighbours((col, row), filter_cant_move = True):
+                if from_player[maze.index_of(neighbour.pos)] == from_player[index] - 1:
+                    index = maze.index_of(neighbour.pos)
+                    break
+        return maze.grid[index // maze.rows][index % maze.rows]
+
+    def _arrived(self, center, target) -> bool:
+        return abs(target[0] - center[0]) <= 1 and abs(target[1] - center[1]) <= 1
+
+    def steer(self, center, target) -> int:
+        pressed = 0
+        if target[0] - center[0] > 1:
+            pressed |= INPUT_RIGHT
+        elif target[0] - center[0] < -1:
+            pressed |= INPUT_LEFT
+        if target[1] - center[1] > 1:
+            pressed |= INPUT_DOWN
+        elif target[1] - center[1] < -1:
+            pressed |= INPUT_UP
+        return pressed
@@ -0,0 +1,326 @@
+import random
+import typing
+import collections
+
+import pygame
+
+from .maze import Maze, CompactGrid, STEPS, SIDE_BITS, WALL_WIDTH, PosType, Direction
+from .generators import generate
+from .profiler import PROFILER
+
+__all__ = (
+    "ChunkedMaze",
+)
+
+TileKey = typing.Tuple[int, int]
+
+class Distances(dict):
+    # sparse BFS result, cells the search never reached read as -1 like the lists of Maze
+    def __missing__(self, index: int) -> int:
+        return -1
+
+class ChunkedSides:
+    # stands in for Maze.sides (flat index -> open side mask) and pages tiles in on access
+    def __init__(self, maze: "ChunkedMaze") -> None:
+        self.maze = maze
+
+    def __len__(self) -> int:
+        return self.maze.rows * self.maze.cols
+
+    def __getitem__(self, index: int) -> int:
+        col, row = divmod(index, self.maze.rows)
+        tile, local = self.maze._tile_at(col, row)
+        return tile[local]
+
+    def __setitem__(self, index: int, mask: int):
+        col, row = divmod(index, self.maze.rows)
+        tile, local = self.maze._tile_at(col, row, pin = True)
+        tile[local] = mask
+
+class ChunkedMaze(Maze):
+    # A maze far bigger than the window. It is cut into tile_size x tile_size tiles that are
+    # generated on first access from (seed, tile) and dropped again once more than max_tiles are
+    # loaded. Every tile is a perfect maze of its own, and each pair of neighbouring tiles opens at
+    # least one passage in the wall between them, so the whole maze stays connected. Both tiles
+    # derive that passage from the same seed, so an evicted tile comes back identical.
+    # Cells sit at fixed world coordinates and the camera follows the player.
+    def __init__(self, app, rows: int, cols: int, seed: typing.Optional[int] = None, tile_size: int = 16, max_tiles: int = 256, cell_size: int = 50) -> None:
+        if seed is None: # tiles are seeded from it, None would make every unseeded maze the same one
+            seed = random.getrandbits(32)
+        super().__init__(app, rows = rows, cols = cols, compact = True, seed = seed)
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.cell_size = cell_size
+        self.algorithm = 'backtracker'
+        # searches only look this many cells around their sources, chasers further out stand still
+        self.field_radius = 24
+        self._field_window = (0, 0, 0, 0)
+
+        self._tiles: "collections.OrderedDict[TileKey, bytearray]" = collections.OrderedDict()
+        self._pinned: typing.Set[TileKey] = set() # edited tiles can't be regenerated, never evict them
+        # baked wall surfaces are megabytes each, only keep the ones around the camera
+        self.max_layers = 16
+        self._tile_layers: "collections.OrderedDict[TileKey, pygame.Surface]" = collections.OrderedDict()
+        self._last_key: typing.Optional[TileKey] = None
+        self._last_tile = bytearray()
+
+    def _init_grid(self):
+        self.set_attrs()
+        self.sides = ChunkedSides(self)
+        self.grid = CompactGrid(self)
+
+    def set_attrs(self):
+        self.offset = pygame.math.Vector2(0, 0)
+        self.invalidate()
+
+    @property
+    def world_size(self) -> typing.Tuple[int, int]:
+        return self.cols * self.cell_size, self.rows * self.cell_size
+
+    @property
+    def play_area(self) -> typing.Tuple[int, int]:
+        return min(self.rows, self.app.window_size[1] // self.cell_size), min(self.cols, self.app.window_size[0] // self.cell_size)
+
+    @property
+    def loaded_tiles(self) -> int:
+        return len(self._tiles)
+
+    def update_camera(self, target: pygame.Rect):
+        width, height = self.app.window_size
+        world_width, world_height = self.world_size
+        self.camera.x = max(0, min(target.centerx - width // 2, world_width - width))
+        self.camera.y = max(0, min(target.centery - height // 2, world_height - height))
+
+    def invalidate(self):
+        super().invalidate()
+        self._tile_layers.clear()
+
+    def create_maze(self, start_cell = (1, 1), algorithm: typing.Optional[str] = None):
+        # nothing is generated up front, tiles are built when something first reads them
+        if not self.grid:
+            self._init_grid()
+        self.algorithm = algorithm or 'backtracker'
+        self._tiles.clear()
+        self._pinned.clear()
+        self._last_key = None
+        self.invalidate()
+
+    def generation_steps(self, start_cell = (1, 1), algorithm: typing.Optional[str] = None) -> typing.Iterator[typing.Any]:
+        # nothing to step through either
+        self.create_maze(start_cell, algorithm = algorithm)
+        return iter(())
+
+    def precompute(self, landmarks: int = 8, exact_up_to: int = 1024):
+        raise TypeError('chunked mazes only search around the player, there is nothing to precompute')
+
+    def junction_graph(self):
+        raise TypeError('chunked mazes are never whole, there is no graph of them to build')
+
+    def open_side(self, pos: PosType, side: Direction):
+        index = self.index_of(pos)
+        self.sides[index] |= SIDE_BITS[side]
+        key = ((pos[0] - 1) // self.tile_size, (pos[1] - 1) // self.tile_size)
+        self._tile_layers.pop(key, None)
+        self._field_root = None
+        self.version += 1
+
+    # tiles
+
+    def _tile_shape(self, key: TileKey) -> typing.Tuple[int, int]:
+        # rows, cols, tiles on the bottom and right edges can be smaller
+        return min(self.tile_size, self.rows - key[1] * self.tile_size), min(self.tile_size, self.cols - key[0] * self.tile_size)
+
+    def _border(self, side: str, key: TileKey, length: int) -> typing.List[int]:
+        # passages through the wall east of / south of the tile at key, shared by both tiles
+        rng = random.Random('{}:{}:{}:{}'.format(self.seed, side, *key))
+        chance = self.loop_precent / 100
+        forced = rng.randrange(length)
+        return [offset for offset in range(length) if rng.random() < chance or offset == forced]
+
+    def _generate_tile(self, key: TileKey) -> bytearray:
+        rows, cols = self._tile_shape(key)
+        tile = generate(self.algorithm, rows, cols, random.Random('{}:{}:{}'.format(self.seed, *key)), loop_precent = self.loop_precent)
+
+        n_cols, n_rows = -(-self.cols // self.tile_size), -(-self.rows // self.tile_size)
+        if key[0] + 1 < n_cols:
+            for row in self._border('E', key, rows):
+                tile[(cols - 1) * rows + row] |= SIDE_BITS['E']
+        if key[0] > 0:
+            for row in self._border('E', (key[0] - 1, key[1]), rows):
+                tile[row] |= SIDE_BITS['W']
+        if key[1] + 1 < n_rows:
+            for col in self._border('S', key, cols):
+                tile[col * rows + rows - 1] |= SIDE_BITS['S']
+        if key[1] > 0:
+            for col in self._border('S', (key[0], key[1] - 1), cols):
+                tile[col * rows] |= SIDE_BITS['N']
+        return tile
+
+    def _tile_at(self, col: int, row: int, pin: bool = False) -> typing.Tuple[bytearray, int]:
+        # 0 based col, row -> (tile, index inside the tile)
+        key = (col // self.tile_size, row // self.tile_size)
+        if key == self._last_key and not pin:
+            tile = self._last_tile
+        else:
+            tile = self._tiles.get(key)
+            if tile is None:
+                tile = self._tiles[key] = self._generate_tile(key)
+                self._evict()
+            else:
+                self._tiles.move_to_end(key)
+            if pin:
+                self._pinned.add(key)
+            self._last_key, self._last_tile = key, tile
+
+        tile_rows = min(self.tile_size, self.rows - key[1] * self.tile_size)
+        return tile, (col - key[0] * self.tile_size) * tile_rows + row - key[1] * self.tile_size
+
+    def _evict(self):
+        for key in list(self._tiles):
+            if len(self._tiles) <= self.max_tiles:
+                break
+            if key not in self._pinned and key != self._last_key:
+                del self._tiles[key]
+                self._tile_layers.pop(key, None)
+
+    # bounded searches, a BFS over the whole maze is out of the question. They run on a window of
+    # field_radius cells around the sources, copied out of the tiles into a plain bytearray first
+
+    def _window(self, indices: typing.List[int]) -> typing.Tuple[int, int, int, int]:
+        # first col, first row, width, height, never more than 2 * field_radius from the first source
+        radius = self.field_radius
+        cols, rows = [index // self.rows for index in indices], [index % self.rows for index in indices]
+        first_col = max(0, min(cols) - radius, cols[0] - 2 * radius)
+        first_row = max(0, min(rows) - radius, rows[0] - 2 * radius)
+        last_col = min(self.cols - 1, max(cols) + radius, cols[0] + 2 * radius)
+        last_row = min(self.rows - 1, max(rows) + radius, rows[0] + 2 * radius)
+        return first_col, first_row, last_col - first_col + 1, last_row - first_row + 1
+
+    def _window_sides(self, first_col: int, first_row: int, width: int, height: int) -> bytearray:
+        sides = bytearray(width * height)
+        for col in range(first_col, first_col + width):
+            base, row = (col - first_col) * height - first_row, first_row
+            while row < first_row + height:
+                tile, local = self._tile_at(col, row)
+                count = min(first_row + height - row, self.tile_size - row % self.tile_size, self.rows - row)
+                sides[base + row:base + row + count] = tile[local:local + count]
+                row += count
+        return sides
+
+    def _window_bfs(self, indices: typing.List[int]) -> typing.Tuple[typing.Tuple[int, int, int, int], typing.List[int], typing.List[int], typing.List[int]]:
+        # same walk as Maze.update_flow_field on window indices, returns the window, distances, next hops and the visit order
+        window = first_col, first_row, width, height = self._window(indices)
+        sides = self._window_sides(*window)
+        distance = [-1] * (width * height)
+        next_index = [-1] * (width * height)
+        queue = []
+        for index in indices:
+            col, row = index // self.rows - first_col, index % self.rows - first_row
+            if 0 <= col < width and 0 <= row < height and distance[col * height + row] == -1:
+                distance[col * height + row] = 0
+                next_index[col * height + row] = col * height + row
+                queue.append(col * height + row)
+
+        for index in queue:
+            col, row = divmod(index, height)
+            open_sides = sides[index]
+            for _, bit, d_col, d_row in STEPS:
+                if not open_sides & bit or not (0 <= col + d_col < width and 0 <= row + d_row < height):
+                    continue
+                neighbour = index + d_col * height + d_row
+                if distance[neighbour] == -1:
+                    distance[neighbour] = distance[index] + 1
+                    next_index[neighbour] = index
+                    queue.append(neighbour)
+        return window, distance, next_index, queue
+
+    def _to_window(self, pos: PosType) -> int:
+        first_col, first_row, width, height = self._field_window
+        col, row = pos[0] - 1 - first_col, pos[1] - 1 - first_row
+        return col * height + row if 0 <= col < width and 0 <= row < height else -1
+
+    def update_flow_field(self, target_cell) -> bool:
+        if target_cell is None or target_cell.pos == self._field_root:
+            return False
+        self._field_window, self._field_distance, self._field_next, reached = self._window_bfs([self.index_of(target_cell.pos)])
+        self._field_root = target_cell.pos
+        if PROFILER.enabled:
+            PROFILER.count('flow_field.cells', len(reached))
+        return True
+
+    def next_step(self, cell, target_cell):
+        if cell is None or target_cell is None or cell == target_cell:
+            return None
+        self.update_flow_field(target_cell)
+        index = self._to_window(cell.pos)
+        if index == -1 or self._field_next[index] == -1:
+            return None
+        first_col, first_row, _, height = self._field_window
+        col, row = divmod(self._field_next[index], height)
+        return self.grid[first_col + col][first_row + row]
+
+    def field_distance(self, cell, target_cell) -> typing.Optional[int]:
+        self.update_flow_field(target_cell)
+        index = self._to_window(cell.pos)
+        if index == -1 or self._field_distance[index] == -1:
+            return None
+        return self._field_distance[index]
+
+    def distance_field(self, sources) -> Distances:
+        indices = [self.index_of(cell.pos) for cell in sources if cell is not None]
+        if not indices:
+            return Distances()
+        (first_col, first_row, _, height), distance, _, reached = self._window_bfs(indices)
+        return Distances(
+            ((first_col + index // height) * self.rows + first_row + index % height, distance[index]) for index in reached
+        )
+
+    # drawing, one baked surface per visible tile
+
+    def _tile_layer(self, key: TileKey) -> pygame.Surface:
+        layer = self._tile_layers.get(key)
+        if layer is not None:
+            self._tile_layers.move_to_end(key)
+            return layer
+
+        rows, cols = self._tile_shape(key)
+        size = self.cell_size
+        layer = pygame.Surface((cols * size, rows * size), pygame.SRCALPHA)
+        color = self.app.config['cell_color']
+        first_col, first_row = key[0] * self.tile_size, key[1] * self.tile_size
+        for col in range(cols):
+            for row in range(rows):
+                closed = ~self.sides[(first_col + col) * self.rows + first_row + row] & 15
+                x, y = col * size, row * size
+                if closed & SIDE_BITS['N']:
+                    pygame.draw.line(layer, color, (x, y), (x + size, y), WALL_WIDTH)
+                if closed & SIDE_BITS['S']:
+                    pygame.draw.line(layer, color, (x, y + size), (x + size, y + size), WALL_WIDTH)
+                if closed & SIDE_BITS['E']:
+                    pygame.draw.line(layer, color, (x + size, y), (x + size, y + size), WALL_WIDTH)
+                if closed & SIDE_BITS['W']:
+                    pygame.draw.line(layer, color, (x, y + size), (x, y), WALL_WIDTH)
+
+        self._tile_layers[key] = layer
+        while len(self._tile_layers) > self.max_layers:
+            self._tile_layers.popitem(last = False)
+        return layer
+
+    def visible_tiles(self) -> typing.Iterator[TileKey]:
+        tile_px = self.tile_size * self.cell_size
+        width, height = self.app.window_size
+        last_col, last_row = (self.cols - 1) // self.tile_size, (self.rows - 1) // self.tile_size
+        for tile_col in range(int(self.camera.x // tile_px), min(int((self.camera.x + width - 1) // tile_px), last_col) + 1):
+            for tile_row in range(int(self.camera.y // tile_px), min(int((self.camera.y + height - 1) // tile_px), last_row) + 1):
+                yield tile_col, tile_row
+
+    def draw_grid(self, background: typing.Optional[pygame.Surface] = None):
+        window = self.app.window
+        if background is not None:
+            window.blit(background, dest = (0, 0))
+
+        tile_px = self.tile_size * self.cell_size
+        tiles = [(self._tile_layer(key), (key[0] * tile_px - self.camera.x, key[1] * tile_px - self.camera.y)) for key in self.visible_tiles()]
+        window.blits(tiles, doreturn = False)
+        if PROFILER.enabled:
+            PROFILER.count('blits', len(tiles) + (background is not None))
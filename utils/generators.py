@@ -0,0 +1,191 @@
+import random
+import typing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = (
+    "GENERATORS",
+    "generate"
+)
+
+# Generators work on a flat bytearray of open side masks in Maze.index_of order
+# (index = col * rows + row, both 0 based) with the bits of maze.SIDE_BITS:
+# N = 1, E = 2, S = 4, W = 8. Every one of them builds a perfect maze, loops are added by braid().
+
+def _open_east(sides: bytearray, index: int, rows: int):
+    sides[index] |= 2
+    sides[index + rows] |= 8
+
+def _open_south(sides: bytearray, index: int):
+    sides[index] |= 4
+    sides[index + 1] |= 1
+
+def backtracker(rows: int, cols: int, rng: random.Random) -> bytearray:
+    # the same recursive backtracker as Maze.create_maze, on integers instead of Cells
+    sides = bytearray(rows * cols)
+    visited = bytearray(rows * cols)
+    visited[0] = 1
+    stack = [0]
+    randrange = rng.randrange
+
+    while stack:
+        index = stack[-1]
+        col, row = divmod(index, rows)
+        options = []
+        if col > 0 and not visited[index - rows]:
+            options.append((index - rows, 8, 2))
+        if col < cols - 1 and not visited[index + rows]:
+            options.append((index + rows, 2, 8))
+        if row > 0 and not visited[index - 1]:
+            options.append((index - 1, 1, 4))
+        if row < rows - 1 and not visited[index + 1]:
+            options.append((index + 1, 4, 1))
+
+        if not options:
+            stack.pop()
+            continue
+
+        neighbour, bit, back = options[randrange(len(options))]
+        sides[index] |= bit
+        sides[neighbour] |= back
+        visited[neighbour] = 1
+        stack.append(neighbour)
+    return sides
+
+def eller(rows: int, cols: int, rng: random.Random) -> bytearray:
+    # Eller's algorithm, one maze row at a time, only the current row's sets are kept
+    sides = bytearray(rows * cols)
+    uniform = rng.random
+    labels = list(range(cols))
+    next_label = cols
+
+    for row in range(rows):
+        last = row == rows - 1
+        parent: typing.Dict[int, int] = {}
+
+        def find(label: int) -> int:
+            root = label
+            while root in parent:
+                root = parent[root]
+            while label != root: # path compression
+                parent[label], label = root, parent[label]
+            return root
+
+        # join neighbours in different sets, the last row must join all of them
+        for col in range(cols - 1):
+            left, right = find(labels[col]), find(labels[col + 1])
+            if left != right and (last or uniform() < 0.5):
+                parent[right] = left
+                _open_east(sides, col * rows + row, rows)
+        if last:
+            break
+
+        # every set carries on into the next row through at least one opening
+        members: typing.Dict[int, typing.List[int]] = {}
+        for col in range(cols):
+            members.setdefault(find(labels[col]), []).append(col)
+
+        labels = [-1] * cols
+        for label, group in members.items():
+            down = [col for col in group if uniform() < 0.5] or [group[rng.randrange(len(group))]]
+            for col in down:
+                labels[col] = label
+                _open_south(sides, col * rows + row)
+
+        for col in range(cols):
+            if labels[col] == -1:
+                labels[col] = next_label
+                next_label += 1
+    return sides
+
+def kruskal(rows: int, cols: int, rng: random.Random) -> bytearray:
+    # Kruskal over randomly weighted walls, run as Boruvka rounds so every round is a handful of
+    # array operations: each set takes its lightest wall to another set, then the sets are merged.
+    # With distinct weights both build the same tree.
+    if numpy is None:
+        raise RuntimeError('the kruskal generator needs numpy')
+
+    n_cells = rows * cols
+    generator = numpy.random.default_rng(rng.getrandbits(64))
+    grid = numpy.arange(n_cells, dtype = numpy.int64).reshape(cols, rows)
+    first = numpy.concatenate([grid[:-1, :].ravel(), grid[:, :-1].ravel()])
+    second = numpy.concatenate([grid[1:, :].ravel(), grid[:, 1:].ravel()])
+    n_east = (cols - 1) * rows
+
+    # edges sorted by weight once, so "lightest" is just "lowest position"
+    order = generator.permutation(first.size)
+    first, second, is_east = first[order], second[order], order < n_east
+
+    sets = numpy.arange(n_cells, dtype = numpy.int64)
+    in_tree = numpy.zeros(first.size, dtype = bool)
+    active = numpy.arange(first.size, dtype = numpy.int64)
+
+    while active.size:
+        set_a, set_b = sets[first[active]], sets[second[active]]
+        crossing = set_a != set_b
+        active, set_a, set_b = active[crossing], set_a[crossing], set_b[crossing]
+        if not active.size:
+            break
+
+        lightest = numpy.full(n_cells, active.size, dtype = numpy.int64)
+        positions = numpy.arange(active.size, dtype = numpy.int64)
+        numpy.minimum.at(lightest, set_a, positions)
+        numpy.minimum.at(lightest, set_b, positions)
+
+        owners = numpy.flatnonzero(lightest < active.size)
+        picked = lightest[owners]
+        in_tree[active[picked]] = True
+        other = numpy.where(set_a[picked] == owners, set_b[picked], set_a[picked])
+
+        pointer = numpy.arange(n_cells, dtype = numpy.int64)
+        pointer[owners] = other
+        # two sets that picked the same wall point at each other, the smaller one becomes the root
+        mutual = (pointer[other] == owners) & (owners < other)
+        pointer[owners[mutual]] = owners[mutual]
+        while True:
+            jumped = pointer[pointer]
+            if numpy.array_equal(jumped, pointer):
+                break
+            pointer = jumped
+        sets = pointer[sets]
+
+    sides = numpy.zeros(n_cells, dtype = numpy.uint8)
+    east, south = in_tree & is_east, in_tree & ~is_east
+    sides[first[east]] |= 2
+    sides[second[east]] |= 8
+    sides[first[south]] |= 4
+    sides[second[south]] |= 1
+    return bytearray(sides.tobytes())
+
+def braid(sides: bytearray, rows: int, cols: int, rng: random.Random, loop_precent: int):
+    # knock down each remaining inner wall with a loop_precent chance
+    if loop_precent <= 0:
+        return
+    chance = loop_precent / 100
+    uniform = rng.random
+    for col in range(cols):
+        for row in range(rows):
+            index = col * rows + row
+            if col < cols - 1 and not sides[index] & 2 and uniform() < chance:
+                _open_east(sides, index, rows)
+            if row < rows - 1 and not sides[index] & 4 and uniform() < chance:
+                _open_south(sides, index)
+
+GENERATORS: typing.Dict[str, typing.Callable[[int, int, random.Random], bytearray]] = {
+    'backtracker': backtracker,
+    'eller': eller,
+    'kruskal': kruskal,
+}
+
+def generate(algorithm: str, rows: int, cols: int, rng: random.Random, loop_precent: int = 0) -> bytearray:
+    try:
+        generator = GENERATORS[algorithm]
+    except KeyError:
+        raise ValueError('Unknown maze generator -> {}'.format(algorithm)) from None
+
+    sides = generator(rows, cols, rng)
+    braid(sides, rows, cols, rng, loop_precent)
+    return sides
@@ -0,0 +1,223 @@
+import heapq
+import typing
+
+from .profiler import PROFILER
+
+if typing.TYPE_CHECKING:
+    from .maze import Maze, Cell
+
+__all__ = (
+    "JunctionGraph",
+)
+
+START = -2
+GOAL = -1
+
+# (neighbour offset as (d_col, d_row), own side bit, the neighbour's side bit back)
+PASSAGES = ((-1, 0, 8, 2), (1, 0, 2, 8), (0, -1, 1, 4), (0, 1, 4, 1))
+
+class JunctionGraph:
+    # Maze.sides with the corridors squeezed out. Nodes are the cells that don't have exactly two
+    # passages (junctions, dead ends), each corridor between two of them is one edge that keeps its
+    # cells in order. A passage only counts when both cells have it open, which is what every
+    # finished maze looks like. Built by Maze.junction_graph(), Maze.open_side keeps it up to date.
+    #
+    # A position along a corridor is -1 for its first node, len(cells) for its last one and the
+    # list index for the cells in between.
+    def __init__(self, maze: "Maze") -> None:
+        self.maze = maze
+        self.version = maze.version
+        self.nodes: typing.Set[int] = set()
+        # corridor id -> (first node, last node, cells in between from first to last)
+        self.corridors: typing.Dict[int, typing.Tuple[int, int, typing.List[int]]] = {}
+        # node -> {cell next to it: id of the corridor leaving through that cell}
+        self.links: typing.Dict[int, typing.Dict[int, int]] = {}
+        # corridor cell -> (corridor id, position)
+        self.interior: typing.Dict[int, typing.Tuple[int, int]] = {}
+        # degree 2 cells made nodes so a loop with no junction on it still has one
+        self._forced: typing.Set[int] = set()
+        self._next_id = 0
+        self.expanded = 0 # nodes expanded over the graph's life, for benchmarks
+
+        for index in range(maze.rows * maze.cols):
+            if self._is_node(index):
+                self.nodes.add(index)
+        for node in list(self.nodes):
+            self._walk_from(node)
+        for index in range(maze.rows * maze.cols):
+            self._cover(index)
+
+    def _exits(self, index: int) -> typing.List[int]:
+        maze = self.maze
+        rows, cols, sides = maze.rows, maze.cols, maze.sides
+        col, row = divmod(index, rows)
+        mask, exits = sides[index], []
+        for d_col, d_row, bit, back in PASSAGES:
+            if mask & bit and 0 <= col + d_col < cols and 0 <= row + d_row < rows:
+                neighbour = index + d_col * rows + d_row
+                if sides[neighbour] & back:
+                    exits.append(neighbour)
+        return exits
+
+    def _is_node(self, index: int) -> bool:
+        return index in self._forced or len(self._exits(index)) != 2
+
+    def _walk_from(self, node: int):
+        # adds every corridor leaving node that isn't in the graph yet
+        links = self.links.setdefault(node, {})
+        for first in self._exits(node):
+            if first in links:
+                continue
+            previous, current, cells = node, first, []
+            while current not in self.nodes:
+                cells.append(current)
+                a, b = self._exits(current)
+                previous, current = current, (b if a == previous else a)
+            self._add(node, current, cells)
+
+    def _add(self, first: int, last: int, cells: typing.List[int]):
+        corridor = self._next_id
+        self._next_id += 1
+        self.corridors[corridor] = (first, last, cells)
+        self.links.setdefault(first, {})[cells[0] if cells else last] = corridor
+        self.links.setdefault(last, {})[cells[-1] if cells else first] = corridor
+        for position, index in enumerate(cells):
+            self.interior[index] = (corridor, position)
+
+    def _remove(self, corridor: int) -> typing.Tuple[int, int]:
+        first, last, cells = self.corridors.pop(corridor)
+        self.links.get(first, {}).pop(cells[0] if cells else last, None)
+        self.links.get(last, {}).pop(cells[-1] if cells else first, None)
+        for index in cells:
+            del self.interior[index]
+        return first, last
+
+    def _cover(self, index: int):
+        # a passage cell left outside every corridor is on a loop without nodes, make it one
+        if index not in self.nodes and index not in self.interior and self._exits(index):
+            self._forced.add(index)
+            self.nodes.add(index)
+            self._walk_from(index)
+
+    def open_side(self, index: int, bit: int):
+        # rebuilds only the corridors through the two cells on either side of the opened wall
+        maze = self.maze
+        col, row = divmod(index, maze.rows)
+        cells = [index]
+        for d_col, d_row, side, _ in PASSAGES:
+            if side == bit and 0 <= col + d_col < maze.cols and 0 <= row + d_row < maze.rows:
+                cells.append(index + d_col * maze.rows + d_row)
+
+        ends = set()
+        for cell in cells:
+            if cell in self.interior:
+                ends.update(self._remove(self.interior[cell][0]))
+            elif cell in self.nodes:
+                for corridor in set(self.links[cell].values()): # a loop back to cell is listed at both ends
+                    ends.update(self._remove(corridor))
+        for cell in cells:
+            if self._is_node(cell):
+                self.nodes.add(cell)
+            elif cell in self.nodes:
+                self.nodes.discard(cell)
+                self.links.pop(cell, None)
+            ends.add(cell)
+        for node in ends:
+            if node in self.nodes:
+                self._walk_from(node)
+        for cell in cells:
+            self._cover(cell)
+        self.version = maze.version
+
+    def _between(self, corridor: int, start: int, end: int) -> typing.List[int]:
+        # corridor cells strictly between two positions, in walking order
+        cells = self.corridors[corridor][2]
+        if start < end:
+            return cells[start + 1:end]
+        return cells[end + 1:start][::-1]
+
+    def find_path(self, start_cell: typing.Optional["Cell"], end_cell: typing.Optional["Cell"]) -> typing.List["Cell"]:
+        # A* over nodes, a start or goal inside a corridor joins through both of its ends.
+        # Same result shape as Maze.find_path, the cells of the edges taken are only listed at the end
+        if start_cell is None or end_cell is None:
+            return []
+        maze = self.maze
+        rows = maze.rows
+        start, goal = maze.index_of(start_cell.pos), maze.index_of(end_cell.pos)
+        if start == goal:
+            return [start_cell]
+        goal_col, goal_row = divmod(goal, rows)
+
+        g: typing.Dict[int, int] = {}
+        # search node -> (previous search node, corridor, from position, to position), None at the start
+        parent: typing.Dict[int, typing.Optional[typing.Tuple[int, int, int, int]]] = {}
+        open_heap: typing.List[typing.Tuple[int, int, int]] = []
+
+        def push(node: int, g_score: int, via: typing.Optional[typing.Tuple[int, int, int, int]]):
+            if g_score < g.get(node, g_score + 1):
+                g[node] = g_score
+                parent[node] = via
+                if node == GOAL:
+                    h = 0
+                else:
+                    col, row = divmod(node, rows)
+                    h = abs(col - goal_col) + abs(row - goal_row)
+                heapq.heappush(open_heap, (g_score + h, -g_score, node))
+
+        goal_corridor = None if goal in self.nodes else self.interior.get(goal)
+        if start in self.nodes:
+            push(start, 0, None)
+        elif start in self.interior:
+            corridor, position = self.interior[start]
+            first, last, cells = self.corridors[corridor]
+            push(first, position + 1, (START, corridor, position, -1))
+            push(last, len(cells) - position, (START, corridor, position, len(cells)))
+            if goal_corridor is not None and goal_corridor[0] == corridor:
+                push(GOAL, abs(goal_corridor[1] - position), (START, corridor, position, goal_corridor[1]))
+        else:
+            return [] # a cell with no passages
+
+        closed: typing.Set[int] = set()
+        while open_heap:
+            _, neg_g, node = heapq.heappop(open_heap)
+            if node in closed:
+                continue
+            if node == GOAL or node == goal:
+                break
+            closed.add(node)
+            g_score = -neg_g
+            for corridor in self.links.get(node, {}).values():
+                first, last, cells = self.corridors[corridor]
+                if first == last:
+                    continue # a loop back to the same node never makes a path shorter
+                if node == first:
+                    push(last, g_score + len(cells) + 1, (node, corridor, -1, len(cells)))
+                else:
+                    push(first, g_score + len(cells) + 1, (node, corridor, len(cells), -1))
+            if goal_corridor is not None:
+                corridor, position = goal_corridor
+                first, last, cells = self.corridors[corridor]
+                if node == first:
+                    push(GOAL, g_score + position + 1, (node, corridor, -1, position))
+                if node == last:
+                    push(GOAL, g_score + len(cells) - position, (node, corridor, len(cells), position))
+        else:
+            node = None
+        self.expanded += len(closed)
+        if PROFILER.enabled:
+            PROFILER.count('graph.expanded', len(closed))
+        if node is None:
+            return []
+
+        hops = []
+        while parent[node] is not None:
+            previous, corridor, from_position, to_position = parent[node] # type: ignore
+            hops.append((corridor, from_position, to_position, goal if node == GOAL else node))
+            if previous == START:
+                break
+            node = previous
+        path = [start]
+        for corridor, from_position, to_position, index in reversed(hops):
+            path.extend(self._between(corridor, from_position, to_position))
+            path.append(index)
+        return [maze.grid[index // rows][index % rows] for index in path]
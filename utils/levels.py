@@ -0,0 +1,76 @@
+import os
+import mmap
+import typing
+import struct
+
+from .maze import Maze
+from .chunks import ChunkedMaze
+
+__all__ = (
+    "LEVEL_VERSION",
+    "LevelHeader",
+    "save_level",
+    "read_level_header",
+    "load_level"
+)
+
+# level file: fixed header, then one byte per cell in Maze.index_of order holding the open side
+# nibble (maze.SIDE_BITS) in its low bits. A whole byte per cell lets the mapped file stand in
+# for Maze.sides as is, a packed file would have to be unpacked cell by cell on load.
+LEVEL_MAGIC = b'MZLV'
+LEVEL_VERSION = 1
+# magic, version, flags, rows, cols, seed, loop_precent, padded to 32 bytes
+HEADER = struct.Struct('<4sHHIIqH6x')
+HAS_SEED = 1
+
+class LevelHeader(typing.NamedTuple):
+    version: int
+    rows: int
+    cols: int
+    seed: typing.Optional[int]
+    loop_precent: int
+
+def save_level(maze: Maze, path: str):
+    if isinstance(maze, ChunkedMaze):
+        raise TypeError('chunked mazes are rebuilt from their seed, save the seed instead')
+    if maze.seed is not None and not isinstance(maze.seed, int):
+        raise ValueError('only int seeds can be saved, got {!r}'.format(maze.seed))
+
+    flags = HAS_SEED if maze.seed is not None else 0
+    header = HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, flags, maze.rows, maze.cols, maze.seed or 0, maze.loop_precent)
+
+    # same as the sprite atlas, a crash while saving never leaves half a level behind
+    with open(path + '.tmp', 'wb') as f:
+        f.write(header)
+        f.write(maze.sides)
+    os.replace(path + '.tmp', path)
+
+def _parse_header(data: bytes, size: int, path: str) -> LevelHeader:
+    if len(data) < HEADER.size:
+        raise ValueError('not a maze level: {}'.format(path))
+    magic, version, flags, rows, cols, seed, loop_precent = HEADER.unpack_from(data)
+    if magic != LEVEL_MAGIC:
+        raise ValueError('not a maze level: {}'.format(path))
+    if version != LEVEL_VERSION:
+        raise ValueError('unsupported level version {} in {}'.format(version, path))
+    if size != HEADER.size + rows * cols:
+        raise ValueError('level {} is truncated, expected {} cells'.format(path, rows * cols))
+    return LevelHeader(version, rows, cols, seed if flags & HAS_SEED else None, loop_precent)
+
+def read_level_header(path: str) -> LevelHeader:
+    with open(path, 'rb') as f:
+        return _parse_header(f.read(HEADER.size), os.fstat(f.fileno()).st_size, path)
+
+def load_level(app, path: str, compact: bool = True) -> Maze:
+    # The file is mapped copy on write: pages are read in as cells are touched, so opening a level
+    # costs the same at any size, and open_side edits stay in memory without touching the file.
+    # Non compact mazes still build a Cell per cell, which is what compact mode is for.
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        header = _parse_header(f.read(HEADER.size), size, path)
+        mapped = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_COPY)
+
+    maze = Maze(app, rows = header.rows, cols = header.cols, compact = compact, seed = header.seed)
+    maze.loop_precent = header.loop_precent
+    maze.load_sides(memoryview(mapped)[HEADER.size:])
+    return maze
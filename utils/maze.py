@@ -1,13 +1,68 @@
 import pygame
 import typing
 import random
+import heapq
+
+from .text import render_label
+from .generators import generate
+from .oracle import DistanceOracle
+from .graph import JunctionGraph
+from .profiler import PROFILER
+from .steps import run_steps
 
 PosType = typing.Tuple[int, int]
 Direction = typing.Literal['N', 'E', 'S', 'W']
 
+INF = float('inf')
+WALL_WIDTH = 3
+# open sides are stored as a 4 bit mask per cell in Maze.sides
+SIDE_BITS: typing.Dict[Direction, int] = {'N': 1, 'E': 2, 'S': 4, 'W': 8}
+SIDE_SETS: typing.Tuple[typing.FrozenSet[Direction], ...] = tuple(
+    frozenset(side for side, bit in SIDE_BITS.items() if mask & bit) for mask in range(16)
+)
+# direction, side bit, column step, row step (same order as Maze.get_neighbours)
+STEPS: typing.Tuple[typing.Tuple[Direction, int, int, int], ...] = (
+    ('W', 8, -1, 0),
+    ('E', 2, 1, 0),
+    ('N', 1, 0, -1),
+    ('S', 4, 0, 1)
+)
+# what Maze.generation_steps and Maze.search_steps yield, the arguments of draw_generation and draw_search
+GenerationStep = typing.Tuple[typing.Set["Cell"], typing.List["Cell"], "Cell", "Cell"]
+SearchStep = typing.Tuple[typing.Set[PosType], PosType, typing.Callable[[PosType], int]]
+
+def _time_of_impact(left: int, top: int, right: int, bottom: int, dx: float, dy: float, wall: typing.Tuple[int, int, int, int]) -> typing.Optional[typing.Tuple[float, int, int]]:
+    # when a box moving by (dx, dy) starts to overlap wall, as a fraction of the move, and the normal it hits
+    wall_left, wall_top, wall_right, wall_bottom = wall
+    if dx > 0:
+        x_entry, x_exit = (wall_left - right) / dx, (wall_right - left) / dx
+    elif dx < 0:
+        x_entry, x_exit = (wall_right - left) / dx, (wall_left - right) / dx
+    elif left < wall_right and wall_left < right:
+        x_entry, x_exit = -INF, INF
+    else:
+        return None
+    if dy > 0:
+        y_entry, y_exit = (wall_top - bottom) / dy, (wall_bottom - top) / dy
+    elif dy < 0:
+        y_entry, y_exit = (wall_bottom - top) / dy, (wall_top - bottom) / dy
+    elif top < wall_bottom and wall_top < bottom:
+        y_entry, y_exit = -INF, INF
+    else:
+        return None
+
+    entry = max(x_entry, y_entry)
+    # behind the box, already inside it (let it walk out) or only grazing a corner
+    if entry < 0 or entry >= min(x_exit, y_exit):
+        return None
+    if x_entry > y_entry:
+        return entry, -1 if dx > 0 else 1, 0
+    return entry, 0, -1 if dy > 0 else 1
+
 class Cell:
-    def __init__(self, app, pos: PosType, cell_size: typing.Optional[int] = None) -> None:
+    def __init__(self, app, pos: PosType, cell_size: typing.Optional[int] = None, maze: typing.Optional["Maze"] = None) -> None:
         self.app = app
+        self.maze = maze or app.maze
         self.pos = pos # col, row
         self.rect = None
         self.open_sides = set()
@@ -28,11 +83,11 @@ class Cell:
         return hash(self.pos)
 
     def set_rect(self, cell_size: int):
-        x_offset, y_offset = self.app.maze.offset
+        x_offset, y_offset = self.maze.offset
         self.rect = pygame.Rect( (self.pos[0] - 1) * cell_size + x_offset, (self.pos[1] - 1) * cell_size + y_offset, cell_size, cell_size)
 
     def open_side(self, side: Direction):
-        self.open_sides.add(side)
+        self.maze.open_side(self.pos, side)
 
     def draw(self, window):
 
@@ -50,38 +105,188 @@ class Cell:
                 color = self.app.config['cell_color'],
                 start_pos = point[0],
                 end_pos = point[1],
-                width = 3
+                width = WALL_WIDTH
             )
 
+class CompactCell(Cell):
+    # throwaway view over one entry of Maze.sides, handed out by a compact maze
+    def __init__(self, maze: "Maze", pos: PosType) -> None:
+        self.app = maze.app
+        self.maze = maze
+        self.pos = pos # col, row
+        self.previous = None
+
+    @property
+    def cell_size(self) -> int:
+        return self.maze.cell_size
+
+    @property
+    def rect(self) -> pygame.Rect:
+        cell_size = self.maze.cell_size or 50
+        return pygame.Rect((self.pos[0] - 1) * cell_size + self.maze.offset.x, (self.pos[1] - 1) * cell_size + self.maze.offset.y, cell_size, cell_size)
+
+    @property
+    def open_sides(self) -> typing.FrozenSet[Direction]:
+        return SIDE_SETS[self.maze.sides[self.maze.index_of(self.pos)]]
+
+    def set_rect(self, cell_size: int):
+        pass # derived from the maze on every access
+
+class CompactColumn:
+    def __init__(self, maze: "Maze", col: int) -> None:
+        self.maze = maze
+        self.col = col
+
+    def __len__(self) -> int:
+        return self.maze.rows
+
+    def __getitem__(self, row: int) -> CompactCell:
+        if row < 0:
+            row += self.maze.rows
+        if not 0 <= row < self.maze.rows:
+            raise IndexError('row index out of range')
+        return CompactCell(self.maze, (self.col + 1, row + 1))
+
+    def __iter__(self) -> typing.Iterator[CompactCell]:
+        return (CompactCell(self.maze, (self.col + 1, row + 1)) for row in range(self.maze.rows))
+
+class CompactGrid:
+    # indexes like the list of columns of a normal maze, grid[col][row], but builds cells on demand
+    def __init__(self, maze: "Maze") -> None:
+        self.maze = maze
+
+    def __len__(self) -> int:
+        return self.maze.cols
+
+    def __getitem__(self, col: int) -> CompactColumn:
+        if col < 0:
+            col += self.maze.cols
+        if not 0 <= col < self.maze.cols:
+            raise IndexError('column index out of range')
+        return CompactColumn(self.maze, col)
+
+    def __iter__(self) -> typing.Iterator[CompactColumn]:
+        return (CompactColumn(self.maze, col) for col in range(self.maze.cols))
+
 class Maze:
-    def __init__(self, app, rows = 10, cols = 22) -> None:
+    def __init__(self, app, rows = 10, cols = 22, compact: bool = False, seed: typing.Optional[int] = None) -> None:
         self.app = app
         self.rows = rows
         self.cols = cols
+        self.seed = seed
+        self.random = random.Random(seed)
+        # compact mazes only keep Maze.sides and hand out CompactCell views
+        self.compact = compact
 
-        self.grid: typing.List[typing.List["Cell"]] = []
+        self.grid: typing.Union[typing.List[typing.List["Cell"]], CompactGrid] = []
+        self.sides = bytearray() # open side mask of every cell, indexed like index_of()
         self.rects: typing.List[pygame.Rect] = []
         self.loop_precent = 20
         self.path = []
-
-    def _init_grid(self):
+        # bumped on every change to the walls, for anything that keeps search state around
+        self.version = 0
+        # precomputed distances, dropped whenever the walls change, see precompute()
+        self.oracle: typing.Optional[DistanceOracle] = None
+        # world position drawn at the window's top left, only chunked mazes scroll
+        self.camera = pygame.math.Vector2(0, 0)
+        # find_path searches junction_graph() instead of single cells
+        self.compress_paths = False
+        self._graph: typing.Optional[JunctionGraph] = None
+
+        # player-rooted BFS field shared by every chaser, indexed like index_of()
+        self._field_root: typing.Optional[PosType] = None
+        self._field_distance: typing.List[int] = []
+        self._field_next: typing.List[int] = []
+        # walls baked onto a window sized surface, keyed by the background under them
+        self._layers: typing.Dict[typing.Optional[pygame.Surface], pygame.Surface] = {}
+
+    def _init_grid(self, sides: typing.Optional[typing.MutableSequence[int]] = None):
+        run_steps(self._grid_steps(sides = sides))
+
+    def _grid_steps(self, sides: typing.Optional[typing.MutableSequence[int]] = None) -> typing.Generator[None, None, None]:
+        # _init_grid a column of Cells at a time
         self.set_attrs()
+        self.sides = bytearray(self.rows * self.cols) if sides is None else sides
+        if self.compact:
+            self.grid = CompactGrid(self)
+            return
+
         self.grid.clear()
         for x in range(1, self.cols + 1):
             self.grid.append([])
             for y in range(1, self.rows + 1):
-                self.grid[x - 1].append(Cell(pos = (x, y), cell_size = self.cell_size, app = self.app))
+                self.grid[x - 1].append(Cell(pos = (x, y), cell_size = self.cell_size, app = self.app, maze = self))
+            yield None
+        if sides is not None:
+            self._sync_cells()
+
+    def _sync_cells(self):
+        # Cell.open_sides copies of Maze.sides, compact mazes read the masks directly
+        for column in self.grid:
+            for cell in column:
+                cell.open_sides = set(SIDE_SETS[self.sides[self.index_of(cell.pos)]])
+
+    def load_sides(self, sides: typing.MutableSequence[int]):
+        # use an existing buffer of open side masks (e.g. a mapped level file) instead of generating one
+        if len(sides) != self.rows * self.cols:
+            raise ValueError('expected {} cells, got {}'.format(self.rows * self.cols, len(sides)))
+        self._init_grid(sides = sides)
     
     def set_attrs(self):
+        window_size = self.app.window_size
         self.cell_size = min(
-            (pygame.display.get_window_size()[0] - 50) // self.cols,
-            (pygame.display.get_window_size()[1] - 100) // self.rows
+            (window_size[0] - 50) // self.cols,
+            (window_size[1] - 100) // self.rows
         )
 
         self.offset = pygame.math.Vector2(
-            (pygame.display.get_window_size()[0] - self.cols * self.cell_size) // 2,
-            (pygame.display.get_window_size()[1] - self.rows * self.cell_size) // 2
+            (window_size[0] - self.cols * self.cell_size) // 2,
+            (window_size[1] - self.rows * self.cell_size) // 2
         )
+        self.invalidate()
+
+    @property
+    def world_size(self) -> typing.Tuple[int, int]:
+        # sprites are kept inside this, the whole maze is laid out in the window
+        return self.app.window_size
+
+    @property
+    def play_area(self) -> typing.Tuple[int, int]:
+        # rows, cols around the start cell that matches are set up in
+        return self.rows, self.cols
+
+    @property
+    def flow_root(self) -> typing.Optional[PosType]:
+        return self._field_root
+
+    @property
+    def flow_next(self) -> typing.List[int]:
+        # cell index of the next step towards flow_root for every cell, -1 where it can't be reached
+        return self._field_next
+
+    def update_camera(self, target: pygame.Rect):
+        pass
+
+    def invalidate(self):
+        self.version += 1
+        self.oracle = None
+        self._field_root = None
+        self._layers.clear()
+
+    def open_side(self, pos: PosType, side: Direction):
+        self.sides[self.index_of(pos)] |= SIDE_BITS[side]
+        if not self.compact:
+            self.grid[pos[0] - 1][pos[1] - 1].open_sides.add(side)
+        self.invalidate()
+        graph = self._graph
+        if graph is not None and graph.version == self.version - 1: # up to date until now, patch it
+            graph.open_side(self.index_of(pos), SIDE_BITS[side])
+
+    def junction_graph(self) -> JunctionGraph:
+        # corridors collapsed into edges, built on first use and again after changes open_side didn't make
+        if self._graph is None or self._graph.version != self.version:
+            self._graph = JunctionGraph(self)
+        return self._graph
 
     def get_cell(self, pos: PosType) -> "Cell":
         try:
@@ -89,6 +294,85 @@ class Maze:
         except IndexError:
             return None
 
+    def index_of(self, pos: PosType) -> int:
+        return (pos[0] - 1) * self.rows + (pos[1] - 1)
+
+    def pos_of(self, index: int) -> PosType:
+        return (index // self.rows + 1, index % self.rows + 1)
+
+    def update_flow_field(self, target_cell: "Cell") -> bool:
+        if target_cell is None or target_cell.pos == self._field_root:
+            return False
+
+        distance, next_index, reached = self._bfs([self.index_of(target_cell.pos)], track_next = True)
+        self._field_root = target_cell.pos
+        self._field_distance = distance
+        self._field_next = next_index # type: ignore
+        if PROFILER.enabled:
+            PROFILER.count('flow_field.cells', reached)
+        return True
+
+    def _bfs(self, roots: typing.Iterable[int], track_next: bool = False) -> typing.Tuple[typing.List[int], typing.Optional[typing.List[int]], int]:
+        # multi source BFS: steps to the nearest root (-1 where none reaches), with track_next the
+        # neighbour one step closer to it too (roots point at themselves), and how many cells it reached
+        rows, cols, sides = self.rows, self.cols, self.sides
+        distance = [-1] * (rows * cols)
+        next_index = [-1] * (rows * cols) if track_next else None
+        queue = []
+        for root in roots:
+            if distance[root] == -1:
+                distance[root] = 0
+                if next_index is not None:
+                    next_index[root] = root
+                queue.append(root)
+
+        for index in queue: # the list grows while we walk it, BFS without popping
+            col, row = index // rows + 1, index % rows + 1
+            open_sides = sides[index]
+            for _, bit, d_col, d_row in STEPS:
+                if not open_sides & bit or not (1 <= col + d_col <= cols and 1 <= row + d_row <= rows):
+                    continue
+                neighbour = index + d_col * rows + d_row
+                if distance[neighbour] == -1:
+                    distance[neighbour] = distance[index] + 1
+                    if next_index is not None:
+                        next_index[neighbour] = index
+                    queue.append(neighbour)
+        return distance, next_index, len(queue)
+
+    def precompute(self, landmarks: int = 8, exact_up_to: int = 1024) -> DistanceOracle:
+        # only worth it once the maze is finished, any later open_side throws it away again
+        self.oracle = DistanceOracle(self, landmarks = landmarks, exact_up_to = exact_up_to)
+        return self.oracle
+
+    def distance(self, cell: "Cell", target_cell: "Cell") -> typing.Optional[int]:
+        # O(1) from the oracle's table or landmark rows, else a BFS from target_cell the first time it is asked about
+        a, b = self.index_of(cell.pos), self.index_of(target_cell.pos)
+        if self.oracle is not None and (self.oracle.exact or a in self.oracle.landmarks or b in self.oracle.landmarks):
+            return self.oracle.distance(a, b)
+        return self.field_distance(cell, target_cell)
+
+    def next_step(self, cell: "Cell", target_cell: "Cell") -> typing.Optional["Cell"]:
+        if cell is None or target_cell is None or cell == target_cell:
+            return None
+        if self.oracle is not None and self.oracle.exact: # no flow field to rebuild when the player moves
+            index = self.oracle.next_step(self.index_of(cell.pos), self.index_of(target_cell.pos))
+            return self.grid[index // self.rows][index % self.rows] if index != -1 else None
+        self.update_flow_field(target_cell)
+        index = self._field_next[self.index_of(cell.pos)]
+        if index == -1:
+            return None
+        return self.grid[index // self.rows][index % self.rows]
+
+    def distance_field(self, sources: typing.Iterable["Cell"]) -> typing.List[int]:
+        # multi source BFS, -1 where no source can reach
+        return self._bfs([self.index_of(cell.pos) for cell in sources if cell is not None])[0]
+
+    def field_distance(self, cell: "Cell", target_cell: "Cell") -> typing.Optional[int]:
+        self.update_flow_field(target_cell)
+        distance = self._field_distance[self.index_of(cell.pos)]
+        return distance if distance != -1 else None
+
     def get_neighbours(self, target_pos: PosType, filter_cant_move: bool = False) -> typing.List[typing.Tuple["Cell", Direction]]:
         neighbours = (
             (target_pos[0] - 1, target_pos[1], 'W'),
@@ -99,96 +383,123 @@ class Maze:
         ret = []
         for col, row, direction in neighbours:
             if (1 <= row <= self.rows) and (1 <= col <= self.cols):
-                cell = self.grid[col - 1][row - 1]
-                if filter_cant_move and self.reverse_direction(direction) not in cell.open_sides:
+                if filter_cant_move and not self.sides[(col - 1) * self.rows + row - 1] & SIDE_BITS[self.reverse_direction(direction)]:
                     continue
-                ret.append((cell, direction))
+                ret.append((self.grid[col - 1][row - 1], direction))
 
         return ret
 
-    def find_path(self, start_cell: "Cell", end_cell: "Cell"):
-
-        class Node:
-            cell: "Cell"
-            f_score: "int"
-            g_score: "int"
-            previous = None
-
-            def __init__(self, cell: "Cell", f_score: "int", g_score: "int", previous: "Cell" = None) -> None:
-                self.cell = cell
-                self.f_score = f_score
-                self.g_score = g_score
-                self.previous = previous
-                
-
-        def heuristic(cell_1, cell_2):
-            return abs(cell_2.pos[0] - cell_1.pos[0]) + abs(cell_2.pos[1] + cell_1.pos[1])
-
-        nodes = [Node(cell = cell, f_score = float('inf'), g_score = float('inf')) for row in self.grid for cell in row if cell != start_cell]
-        nodes.append(Node(cell = start_cell, f_score = heuristic(start_cell, end_cell), g_score = 0))
-
-        visited = []
-        unvisited = nodes.copy()
-        path = []
-
-        while unvisited:
-            current_node = sorted(unvisited, key = lambda node: node.f_score)[0] # least f_score
-
-            if current_node.cell == end_cell:
-                path.append(current_node.cell)
-
-                while current_node.previous:
-                    path.append(current_node.previous.cell)
-                    current_node = [node for node in nodes if node == current_node.previous][0]
-
+    def find_path(self, start_cell: "Cell", end_cell: "Cell") -> typing.List["Cell"]:
+        if start_cell is None or end_cell is None:
+            return []
+        if self.compress_paths:
+            return self.junction_graph().find_path(start_cell, end_cell)
+        return run_steps(self.search_steps(start_cell, end_cell))
+
+    def search_steps(self, start_cell: "Cell", end_cell: "Cell") -> typing.Generator[SearchStep, None, typing.List["Cell"]]:
+        # find_path's cell by cell A*, yielding after every expanded cell so it can be run a few
+        # steps a frame (see StepTask) and drawn with draw_search. Returns the path
+        if start_cell is None or end_cell is None:
+            return []
+        goal = end_cell.pos
+        oracle, goal_index = self.oracle, self.index_of(goal)
+
+        def heuristic(pos: PosType) -> int:
+            manhattan = abs(goal[0] - pos[0]) + abs(goal[1] - pos[1])
+            if oracle is None:
+                return manhattan
+            # both are admissible and consistent, so is the larger of the two
+            return max(manhattan, oracle.lower_bound((pos[0] - 1) * self.rows + pos[1] - 1, goal_index))
+
+        start = start_cell.pos
+        g_scores = {start: 0}
+        previous: typing.Dict[PosType, typing.Optional[PosType]] = {start: None}
+        closed = set()
+        f_score = lambda pos: g_scores[pos] + heuristic(pos)
+        # (f_score, -g_score, pos), deeper nodes win ties so corridors are followed first
+        open_heap = [(heuristic(start), 0, start)]
+
+        while open_heap:
+            _, neg_g, current = heapq.heappop(open_heap)
+            if current in closed:
+                continue # stale heap entry
+
+            if current == goal:
+                if PROFILER.enabled:
+                    PROFILER.count('astar.expanded', len(closed) + 1)
+                path = []
+                while current is not None:
+                    path.append(self.grid[current[0] - 1][current[1] - 1])
+                    current = previous[current]
                 path.reverse()
-                break
-
-            for neighbour, _ in self.get_neighbours(target_pos = current_node.cell.pos, filter_cant_move = True):
-                neighbour_node = [node for node in nodes if node.cell == neighbour][0]
-                
-                if neighbour_node in visited:
-                    continue
+                return path
 
-                g_score = current_node.g_score + 1 # Cost is always 1
-                f_score = g_score + heuristic(neighbour, end_cell)
+            closed.add(current)
+            open_sides = self.sides[(current[0] - 1) * self.rows + current[1] - 1]
+            g_score = 1 - neg_g # Cost is always 1
 
-                if g_score < neighbour_node.g_score:
-                    neighbour_node.g_score = g_score; neighbour_node.f_score = f_score; neighbour_node.previous = current_node
-
-            unvisited.remove(current_node)
-            visited.append(current_node)
-
-            if self.app.debug:
-                self._debug_draw_path(open_set = visited, current = current_node)
+            for _, bit, d_col, d_row in STEPS:
+                if not open_sides & bit:
+                    continue
+                neighbour = (current[0] + d_col, current[1] + d_row)
+                if neighbour in closed or not (1 <= neighbour[0] <= self.cols and 1 <= neighbour[1] <= self.rows):
+                    continue
+                if g_score < g_scores.get(neighbour, INF):
+                    g_scores[neighbour] = g_score
+                    previous[neighbour] = current
+                    heapq.heappush(open_heap, (g_score + heuristic(neighbour), -g_score, neighbour))
 
-        return path
+            yield closed, current, f_score
 
-    def _debug_draw_path(self, open_set, current):
-        for node in open_set:
-                pygame.draw.rect(
-                    surface = self.app.window,
-                    color = (0, 255, 0) if node != current else (255, 0, 0),
-                    rect = node.cell.rect.copy(),
-                )
-                self.app.window.blit(pygame.font.SysFont('ariel', self.cell_size // 2).render(str(node.f_score), True, (0, 0, 255)), node.cell.rect.center)
+        if PROFILER.enabled:
+            PROFILER.count('astar.expanded', len(closed))
+        return []
 
-        self.draw_grid()
-        pygame.display.flip()
-        pygame.time.delay(5)
+    def draw_search(self, closed, current, f_score):
+        # one step of search_steps: expanded cells with their f score, the newest in red
         self.app.window.fill((0, 0, 0))
+        for pos in closed:
+            cell = self.grid[pos[0] - 1][pos[1] - 1]
+            pygame.draw.rect(
+                surface = self.app.window,
+                color = (0, 255, 0) if pos != current else (255, 0, 0),
+                rect = cell.rect.copy(),
+            )
+            self.app.window.blit(render_label(str(f_score(pos)), self.cell_size // 2, (0, 0, 255)), cell.rect.center)
 
+        self.draw_grid()
 
     def reverse_direction(self, direction: Direction) -> typing.Optional[Direction]:
         return 'N' if direction == 'S' else 'S' if direction == 'N' else 'E' if direction == 'W' else 'W' if direction == 'E' else None
 
-    def draw_grid(self):
+    def static_layer(self, background: typing.Optional[pygame.Surface] = None) -> pygame.Surface:
+        layer = self._layers.get(background)
+        if layer is None:
+            layer = run_steps(self.layer_steps(background = background))
+        return layer
+
+    def layer_steps(self, background: typing.Optional[pygame.Surface] = None) -> typing.Generator[None, None, pygame.Surface]:
+        # static_layer drawn a column of cells at a time, kept once it's whole
+        version = self.version
+        if background is None:
+            layer = pygame.Surface(self.app.window_size, pygame.SRCALPHA)
+        else:
+            layer = background.copy()
         self.rects.clear()
         for row in self.grid:
             for cell in row:
                 self.rects.extend(
-                    cell.draw(self.app.window)
+                    cell.draw(layer)
                 )
+            yield None
+        if self.version == version: # a wall opened halfway through, the next static_layer draws it again
+            self._layers[background] = layer
+        return layer
+
+    def draw_grid(self, background: typing.Optional[pygame.Surface] = None):
+        self.app.window.blit(self.static_layer(background = background), dest = (0, 0))
+        if PROFILER.enabled:
+            PROFILER.count('blits')
 
         for i, cell in enumerate(self.path[:-1]):
             pygame.draw.line(
@@ -200,11 +511,120 @@ class Maze:
             )
 
     def can_move(self, old_pos: pygame.Rect, new_pos: pygame.Rect) -> bool:
-        if new_pos.collidelist(self.rects) == -1:
-            return True
-        return False
+        if PROFILER.enabled:
+            PROFILER.count('can_move')
+        if new_pos.width <= 0 or new_pos.height <= 0:
+            return True # pygame never reports a collision for an empty rect
+
+        size, half = self.cell_size or 50, WALL_WIDTH // 2
+        x_offset, y_offset = int(self.offset.x), int(self.offset.y)
+        left, top, right, bottom = new_pos.left, new_pos.top, new_pos.right, new_pos.bottom
+
+        # a wall sticks out of its cell by WALL_WIDTH // 2, so look a little past the rect
+        first_col = max((left - WALL_WIDTH - x_offset) // size, 0)
+        last_col = min((right + WALL_WIDTH - x_offset) // size, self.cols - 1)
+        first_row = max((top - WALL_WIDTH - y_offset) // size, 0)
+        last_row = min((bottom + WALL_WIDTH - y_offset) // size, self.rows - 1)
+
+        # the rects pygame.draw.line covers for each closed side in Cell.draw, tested inline so no Rect is built per wall
+        for col in range(first_col, last_col + 1):
+            x = x_offset + col * size
+            base = col * self.rows
+            for row in range(first_row, last_row + 1):
+                closed = ~self.sides[base + row] & 15
+                if not closed:
+                    continue
+                y = y_offset + row * size
+                if closed & 5 and left < x + size + 1 and x < right: # N, S span the cell width
+                    if closed & 1 and top < y - half + WALL_WIDTH and y - half < bottom:
+                        return False
+                    if closed & 4 and top < y + size - half + WALL_WIDTH and y + size - half < bottom:
+                        return False
+                if closed & 10 and top < y + size + 1 and y < bottom: # E, W span the cell height
+                    if closed & 2 and left < x + size - half + WALL_WIDTH and x + size - half < right:
+                        return False
+                    if closed & 8 and left < x - half + WALL_WIDTH and x - half < right:
+                        return False
+        return True
+
+    def sweep(self, rect: pygame.Rect, dx: float, dy: float) -> typing.Tuple[float, int, int]:
+        # swept can_move: how much of (dx, dy) rect travels before touching a wall (1.0 when nothing is
+        # in the way) and that wall's normal. The whole path is tested, so no step is too long
+        if PROFILER.enabled:
+            PROFILER.count('sweep')
+        if rect.width <= 0 or rect.height <= 0 or not (dx or dy):
+            return 1.0, 0, 0
+
+        size, half = self.cell_size or 50, WALL_WIDTH // 2
+        x_offset, y_offset = int(self.offset.x), int(self.offset.y)
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        # everything the box passes over, only walls inside it are worth solving for
+        swept_left, swept_right = min(left, left + dx), max(right, right + dx)
+        swept_top, swept_bottom = min(top, top + dy), max(bottom, bottom + dy)
+        swept = pygame.Rect(int(swept_left), int(swept_top), int(swept_right + 0.999) - int(swept_left), int(swept_bottom + 0.999) - int(swept_top))
+        if self.can_move(rect, swept): # the usual case, a clear corridor
+            return 1.0, 0, 0
+        first_col = max(int(swept_left - WALL_WIDTH - x_offset) // size, 0)
+        last_col = min(int(swept_right + WALL_WIDTH - x_offset) // size, self.cols - 1)
+        first_row = max(int(swept_top - WALL_WIDTH - y_offset) // size, 0)
+        last_row = min(int(swept_bottom + WALL_WIDTH - y_offset) // size, self.rows - 1)
+
+        best, normal_x, normal_y = 1.0, 0, 0
+        for col in range(first_col, last_col + 1):
+            x = x_offset + col * size
+            base = col * self.rows
+            for row in range(first_row, last_row + 1):
+                closed = ~self.sides[base + row] & 15
+                if not closed:
+                    continue
+                y = y_offset + row * size
+                walls = [] # same boxes as can_move, and whether the wall stands upright (E, W)
+                if closed & 1:
+                    walls.append(((x, y - half, x + size + 1, y - half + WALL_WIDTH), False))
+                if closed & 4:
+                    walls.append(((x, y + size - half, x + size + 1, y + size - half + WALL_WIDTH), False))
+                if closed & 2:
+                    walls.append(((x + size - half, y, x + size - half + WALL_WIDTH, y + size + 1), True))
+                if closed & 8:
+                    walls.append(((x - half, y, x - half + WALL_WIDTH, y + size + 1), True))
+                for wall, upright in walls:
+                    wall_left, wall_top, wall_right, wall_bottom = wall
+                    if not (wall_left < swept_right and swept_left < wall_right and wall_top < swept_bottom and swept_top < wall_bottom):
+                        continue # nowhere near the path
+                    if wall_left < right and left < wall_right and wall_top < bottom and top < wall_bottom:
+                        # already overlapping (sprites wider than a cell always are): it may be walked
+                        # along or out of, a move towards its middle stops right away
+                        if upright and dx and (dx > 0) == (left + right < wall_left + wall_right):
+                            hit = 0.0, -1 if dx > 0 else 1, 0
+                        elif not upright and dy and (dy > 0) == (top + bottom < wall_top + wall_bottom):
+                            hit = 0.0, 0, -1 if dy > 0 else 1
+                        else:
+                            continue
+                    else:
+                        hit = _time_of_impact(left, top, right, bottom, dx, dy, wall)
+                    if hit is not None and hit[0] < best:
+                        best, normal_x, normal_y = hit
+        return best, normal_x, normal_y
+
+    def slide(self, rect: pygame.Rect, dx: int, dy: int, bounces: int = 3) -> typing.Tuple[pygame.Rect, bool]:
+        # moves rect up to the first wall in its way, then along it with what is left of the move
+        rect = rect.copy()
+        collided = False
+        for _ in range(bounces):
+            if not (dx or dy):
+                break
+            time_of_impact, normal_x, normal_y = self.sweep(rect, dx, dy)
+            # rounded towards the start, the box ends touching the wall and never inside it
+            step_x, step_y = int(dx * time_of_impact + (1e-6 if dx > 0 else -1e-6)), int(dy * time_of_impact + (1e-6 if dy > 0 else -1e-6))
+            rect.move_ip(step_x, step_y)
+            if time_of_impact >= 1:
+                break
+            collided = True
+            dx, dy = (0 if normal_x else dx - step_x), (0 if normal_y else dy - step_y)
+        return rect, collided
 
-    def _draw_debug_generation(self, visited, history, old, new):
+    def draw_generation(self, visited, history, old, new):
+        # one step of generation_steps: the backtracker's stack, and the move it just made
         self.app.window.fill((0, 0, 0))
 
         for cell in history:
@@ -223,12 +643,22 @@ class Maze:
         )
 
         self.draw_grid()
-        pygame.display.flip()
-        pygame.time.delay(10)
 
-    def create_maze(self, start_cell = (1, 1)):
-        if self.grid == []:
-            self._init_grid()
+    def create_maze(self, start_cell = (1, 1), algorithm: typing.Optional[str] = None):
+        run_steps(self.generation_steps(start_cell, algorithm = algorithm))
+
+    def generation_steps(self, start_cell = (1, 1), algorithm: typing.Optional[str] = None) -> typing.Generator[GenerationStep, None, None]:
+        # create_maze one backtracker step at a time, see draw_generation. The generators
+        # module builds a whole maze in one go, algorithm mazes are finished by the first next()
+        if not self.grid:
+            yield from self._grid_steps()
+        self.invalidate()
+
+        if algorithm is not None: # one of generators.GENERATORS, works on Maze.sides directly
+            self.sides[:] = generate(algorithm, self.rows, self.cols, self.random, loop_precent = self.loop_precent)
+            if not self.compact:
+                self._sync_cells()
+            return
 
         start_cell = self.grid[start_cell[0] - 1][start_cell[1] - 1]
         visited = {start_cell}
@@ -239,13 +669,14 @@ class Maze:
 
             neighbours = self.get_neighbours(target_pos = current.pos)
 
-            if random.randint(0, 100) > self.loop_precent:
+            if self.random.randint(0, 100) > self.loop_precent:
                 neighbours = list(filter(lambda n: n[0] not in visited, neighbours))
 
             if not neighbours:
                 history.pop()
+                yield visited, history, current, history[-1] if history else current
             else:
-                neighbour, direction = random.choice(neighbours)
+                neighbour, direction = self.random.choice(neighbours)
 
                 current.open_side(side = direction)
                 reversed_side = self.reverse_direction(direction = direction)
@@ -256,6 +687,4 @@ class Maze:
                 neighbour.open_side(side = reversed_side)
                 visited.add(neighbour)
                 history.append(neighbour)
-            
-            if self.app.debug:
-                self._draw_debug_generation(visited = visited, history = history, old = current, new = neighbour)
\ No newline at end of file
+                yield visited, history, current, neighbour
@@ -0,0 +1,134 @@
+import json
+import struct
+import typing
+import asyncio
+
+__all__ = (
+    "HELLO",
+    "INPUT",
+    "MATCH",
+    "STATE",
+    "END",
+    "MAX_SPRITES",
+    "MatchInfo",
+    "StateUpdate",
+    "encode_message",
+    "read_message",
+    "encode_match",
+    "decode_match",
+    "encode_input",
+    "decode_input",
+    "DeltaEncoder",
+    "DeltaDecoder",
+)
+
+# Messages are a frame header (payload bytes, message type) and the payload. A client sends
+#   HELLO  json config overrides, starts a match (again once the last one ended)
+#   INPUT  sequence number and the input bitmask, held until the next one
+# and the server answers with
+#   MATCH  json about the match, then the maze's open side masks, once per match
+#   STATE  every tick: tick, last input applied, status, remaining time and the sprite centres
+#          that moved since the last STATE, see DeltaEncoder
+#   END    json result of the match
+FRAME = struct.Struct('<IB')
+HELLO, INPUT, MATCH, STATE, END = range(1, 6)
+MAX_PAYLOAD = 1 << 24
+
+INPUT_MESSAGE = struct.Struct('<IB')
+# tick, input sequence applied, status, remaining seconds, changed sprites
+STATE_HEADER = struct.Struct('<IIBHH')
+# sprite index, the top bit set when the position that follows is absolute instead of a delta
+ENTRY = struct.Struct('<H')
+DELTA = struct.Struct('<bb')
+ABSOLUTE = struct.Struct('<ii') # chunked mazes run past 32767px
+IS_ABSOLUTE = 0x8000
+# indexes have 15 bits, the changed count in STATE_HEADER fits that many too
+MAX_SPRITES = IS_ABSOLUTE
+STATUSES = ('playing', 'won', 'lost')
+
+Position = typing.Tuple[int, int]
+
+class MatchInfo(typing.NamedTuple):
+    header: dict
+    sides: bytes
+
+class StateUpdate(typing.NamedTuple):
+    tick: int
+    ack: int
+    status: str
+    remaining: int
+    positions: typing.List[Position]
+
+def encode_message(kind: int, payload: bytes = b'') -> bytes:
+    return FRAME.pack(len(payload), kind) + payload
+
+async def read_message(reader: asyncio.StreamReader) -> typing.Tuple[int, bytes]:
+    size, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if size > MAX_PAYLOAD:
+        raise ValueError('message of {} bytes, the limit is {}'.format(size, MAX_PAYLOAD))
+    return kind, await reader.readexactly(size)
+
+def encode_match(header: dict, sides: bytes) -> bytes:
+    data = json.dumps(header).encode()
+    return encode_message(MATCH, struct.pack('<I', len(data)) + data + bytes(sides))
+
+def decode_match(payload: bytes) -> MatchInfo:
+    size, = struct.unpack_from('<I', payload)
+    return MatchInfo(json.loads(payload[4:4 + size]), payload[4 + size:])
+
+def encode_input(sequence: int, pressed: int) -> bytes:
+    return encode_message(INPUT, INPUT_MESSAGE.pack(sequence, pressed))
+
+def decode_input(payload: bytes) -> typing.Tuple[int, int]:
+    return INPUT_MESSAGE.unpack(payload)
+
+class DeltaEncoder:
+    # One per connection. Only sprites that moved since the last STATE it encoded go out, as
+    # two signed bytes when they moved less than 128px, else as an absolute position. TCP keeps
+    # every STATE, so the client's copy stays in step; reset() makes the next one absolute
+    def __init__(self) -> None:
+        self.last: typing.List[Position] = []
+
+    def reset(self):
+        self.last = []
+
+    def encode(self, tick: int, ack: int, status: str, remaining: int, positions: typing.Sequence[Position]) -> bytes:
+        if len(positions) > MAX_SPRITES:
+            raise ValueError('{} sprites, a STATE holds {} at most'.format(len(positions), MAX_SPRITES))
+        last = self.last
+        if len(last) != len(positions):
+            last = [(1 << 30, 1 << 30)] * len(positions) # nothing is ever there, every sprite goes out absolute
+        entries = []
+        for index, (x, y) in enumerate(positions):
+            old_x, old_y = last[index]
+            if x == old_x and y == old_y:
+                continue
+            dx, dy = x - old_x, y - old_y
+            if -128 <= dx < 128 and -128 <= dy < 128:
+                entries.append(ENTRY.pack(index) + DELTA.pack(dx, dy))
+            else:
+                entries.append(ENTRY.pack(index | IS_ABSOLUTE) + ABSOLUTE.pack(x, y))
+        self.last = list(positions)
+        header = STATE_HEADER.pack(tick, ack, STATUSES.index(status), max(0, remaining), len(entries))
+        return encode_message(STATE, header + b''.join(entries))
+
+class DeltaDecoder:
+    def __init__(self, sprites: int) -> None:
+        self.positions: typing.List[Position] = [(0, 0)] * sprites
+
+    def decode(self, payload: bytes) -> StateUpdate:
+        tick, ack, status, remaining, count = STATE_HEADER.unpack_from(payload)
+        positions = self.positions
+        offset = STATE_HEADER.size
+        for _ in range(count):
+            index, = ENTRY.unpack_from(payload, offset)
+            offset += ENTRY.size
+            if index & IS_ABSOLUTE:
+                positions[index & ~IS_ABSOLUTE] = ABSOLUTE.unpack_from(payload, offset)
+                offset += ABSOLUTE.size
+            else:
+                dx, dy = DELTA.unpack_from(payload, offset)
+                x, y = positions[index]
+                positions[index] = (x + dx, y + dy)
+                offset += DELTA.size
+        return StateUpdate(tick, ack, STATUSES[status], remaining, positions)
@@ -0,0 +1,90 @@
+import array
+import typing
+
+if typing.TYPE_CHECKING:
+    from .maze import Maze
+
+__all__ = (
+    "DistanceOracle",
+)
+
+UNREACHABLE = 0xFFFF
+
+class DistanceOracle:
+    # Distances precomputed from the finished maze, see Maze.precompute.
+    #
+    # Mazes of up to exact_up_to cells get the full all-pairs table, 2 bytes per pair, so every
+    # distance is one lookup. Bigger ones keep a row of distances from each of a few landmarks
+    # (ALT): by the triangle inequality |d(l, a) - d(l, b)| <= d(a, b) for any landmark l, which
+    # makes the best landmark a lower bound A* can use as its heuristic. Distances from a landmark
+    # are exact, and the first landmark is the player's start cell.
+    def __init__(self, maze: "Maze", landmarks: int = 8, exact_up_to: int = 1024) -> None:
+        if exact_up_to >= UNREACHABLE:
+            raise ValueError('exact tables are limited to {} cells'.format(UNREACHABLE - 1))
+
+        self.maze = maze
+        self.cells = maze.rows * maze.cols
+        self.exact = self.cells <= exact_up_to
+        self.table = array.array('H')
+        self.landmarks: typing.List[int] = []
+        self.rows: typing.List[array.array] = []
+
+        if self.exact:
+            for index in range(self.cells):
+                distances = maze.distance_field([maze.grid[index // maze.rows][index % maze.rows]])
+                self.table.extend(distance if distance != -1 else UNREACHABLE for distance in distances)
+            return
+
+        # farthest point selection: each landmark is the cell furthest from the ones picked so far
+        closest = [-1] * self.cells
+        index = 0
+        for _ in range(min(landmarks, self.cells)):
+            distances = maze.distance_field([maze.grid[index // maze.rows][index % maze.rows]])
+            self.landmarks.append(index)
+            self.rows.append(array.array('i', distances))
+            closest = [distance if best == -1 else min(best, distance) for best, distance in zip(closest, distances)]
+            index = max(range(self.cells), key = closest.__getitem__)
+            if closest[index] <= 0:
+                break
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.itemsize * len(self.table) + sum(row.itemsize * len(row) for row in self.rows)
+
+    def lower_bound(self, a: int, b: int) -> int:
+        if self.exact:
+            distance = self.table[a * self.cells + b]
+            return distance if distance != UNREACHABLE else 0
+        best = 0
+        for row in self.rows:
+            from_a, from_b = row[a], row[b]
+            if from_a != -1 and from_b != -1 and abs(from_a - from_b) > best:
+                best = abs(from_a - from_b)
+        return best
+
+    def distance(self, a: int, b: int) -> typing.Optional[int]:
+        # O(1) with the exact table or when either end is a landmark, otherwise an ALT guided A*
+        if self.exact:
+            distance = self.table[a * self.cells + b]
+            return distance if distance != UNREACHABLE else None
+        for landmark, row in zip(self.landmarks, self.rows):
+            if landmark == a or landmark == b:
+                distance = row[b if landmark == a else a]
+                return distance if distance != -1 else None
+
+        maze = self.maze
+        path = maze.find_path(maze.grid[a // maze.rows][a % maze.rows], maze.grid[b // maze.rows][b % maze.rows])
+        return len(path) - 1 if path else None
+
+    def next_step(self, a: int, b: int) -> int:
+        # neighbour of a one step closer to b, -1 when there is none. Exact tables only
+        maze, table, cells = self.maze, self.table, self.cells
+        distance = table[a * cells + b]
+        if distance == UNREACHABLE or distance == 0:
+            return -1
+        col, row = divmod(a, maze.rows)
+        open_sides = maze.sides[a]
+        for bit, step in ((8, -maze.rows), (2, maze.rows), (1, -1), (4, 1)): # maze.STEPS order
+            if open_sides & bit and table[(a + step) * cells + b] == distance - 1:
+                return a + step
+        return -1
@@ -0,0 +1,287 @@
+import time
+import heapq
+import typing
+import itertools
+import collections
+
+from concurrent.futures import Future
+
+from .maze import Maze, Cell, STEPS
+from .profiler import PROFILER
+
+__all__ = (
+    "IncrementalPlanner",
+    "PathRequest",
+    "PathScheduler",
+)
+
+class IncrementalPlanner:
+    # One chaser's A* that keeps its search tree between calls instead of starting over.
+    #
+    # The tree is rooted where the chaser was when it was last reset. Closed nodes hold exact
+    # distances from that root whatever the heuristic was, so when the player moves the open list
+    # is only re-keyed for the new goal and the search carries on from where it stopped. Once the
+    # goal is closed the route is read off the tree: when the chaser sits on the root -> goal
+    # branch, the rest of that branch is a shortest path from the chaser too (any part of a
+    # shortest path is one). The usual moves cost O(1): the chaser reaching its next cell pops
+    # the front of the route, and the player stepping onto or off the end of the branch pops or
+    # appends at the back. The tree is reset at the chaser when the goal is on another branch,
+    # when the chaser is reroot_after steps from the root, when it grows past max_nodes, or when
+    # the maze changes.
+    def __init__(self, maze: Maze, reroot_after: int = 64, max_nodes: int = 1 << 16) -> None:
+        self.maze = maze
+        self.reroot_after = reroot_after
+        self.max_nodes = max_nodes
+        self.expanded = 0 # nodes expanded over the planner's life, for benchmarks
+
+        self._version = -1
+        self._root = -1
+        self._target = -1
+        self._g: typing.Dict[int, int] = {}
+        self._parent: typing.Dict[int, int] = {}
+        self._closed: typing.Set[int] = set()
+        self._open: typing.List[typing.Tuple[int, int, int]] = []
+        # next hop first, goal last, never holds the chaser's own cell
+        self._route: typing.Deque[int] = collections.deque()
+        self._at = -1
+
+    def reset(self, root: int):
+        self._version = self.maze.version
+        self._root = root
+        self._target = -1
+        self._g = {root: 0}
+        self._parent = {root: -1}
+        self._closed = set()
+        self._open = [(0, 0, root)]
+        self._route.clear()
+
+    def _heuristic(self, index: int, goal: int) -> int:
+        rows = self.maze.rows
+        return abs(index // rows - goal // rows) + abs(index % rows - goal % rows)
+
+    def _search(self, goal: int) -> bool:
+        # A* from the root until goal is closed, False when it can't be reached
+        if goal in self._closed:
+            return True
+
+        g, parent, closed = self._g, self._parent, self._closed
+        if goal != self._target: # same entries, new f scores, stale ones dropped on the way
+            self._open = [(g[index] + self._heuristic(index, goal), neg_g, index) for _, neg_g, index in self._open if index not in closed and -neg_g == g[index]]
+            heapq.heapify(self._open)
+            self._target = goal
+
+        maze, open_heap = self.maze, self._open
+        rows, cols, sides = maze.rows, maze.cols, maze.sides
+        before = len(closed)
+        goal_col, goal_row = divmod(goal, rows)
+        while open_heap:
+            _, neg_g, index = heapq.heappop(open_heap)
+            if index in closed:
+                continue
+            closed.add(index)
+            self.expanded += 1
+
+            col, row = divmod(index, rows)
+            open_sides = sides[index]
+            g_score = 1 - neg_g
+            for _, bit, d_col, d_row in STEPS:
+                if not open_sides & bit or not (0 <= col + d_col < cols and 0 <= row + d_row < rows):
+                    continue
+                neighbour = index + d_col * rows + d_row
+                if neighbour not in closed and g_score < g.get(neighbour, g_score + 1):
+                    g[neighbour] = g_score
+                    parent[neighbour] = index
+                    heapq.heappush(open_heap, (g_score + abs(col + d_col - goal_col) + abs(row + d_row - goal_row), -g_score, neighbour))
+
+            # the goal is expanded like any other node, closed always means expanded
+            if index == goal:
+                break
+        else:
+            return False
+        if PROFILER.enabled:
+            PROFILER.count('astar.expanded', len(closed) - before)
+        return True
+
+    def _branch(self, at: int, goal: int) -> bool:
+        # route = tree path at -> goal, False when goal isn't below at
+        g, parent = self._g, self._parent
+        route, index = [], goal
+        while g[index] > g[at]:
+            route.append(index)
+            index = parent[index]
+        if index != at:
+            return False
+        route.reverse()
+        self._route = collections.deque(route)
+        return True
+
+    def _replan(self, at: int, goal: int) -> bool:
+        if self._search(goal) and self._branch(at, goal):
+            return True
+        self.reset(at)
+        return self._search(goal) and self._branch(at, goal)
+
+    def next_step(self, cell: typing.Optional[Cell], target_cell: typing.Optional[Cell]) -> typing.Optional[Cell]:
+        if cell is None or target_cell is None or cell == target_cell:
+            return None
+        maze = self.maze
+        at, goal = maze.index_of(cell.pos), maze.index_of(target_cell.pos)
+        route = self._route
+
+        if route and at == route[0]: # arrived at the last hop we handed out
+            route.popleft()
+        elif at != self._at:
+            route.clear()
+        self._at = at
+
+        in_tree = at == self._root or at in self._closed # open nodes may still get a shorter g
+        if self._version != maze.version or not in_tree or self._g[at] > self.reroot_after or len(self._g) > self.max_nodes:
+            self.reset(at)
+
+        if route and route[-1] == goal:
+            pass
+        elif len(route) > 1 and route[-2] == goal: # player stepped back towards us
+            route.pop()
+        elif route and self._search(goal) and self._parent[goal] == route[-1]: # and further away along the branch
+            route.append(goal)
+        elif not self._replan(at, goal):
+            return None
+
+        step = self._route[0]
+        return maze.grid[step // maze.rows][step % maze.rows]
+
+class PathRequest:
+    # one A* from start to goal that can stop after any expansion and pick up again next frame.
+    # future resolves to the path as Cells, start and goal included (like Maze.find_path), or None
+    def __init__(self, maze: Maze, start: int, goal: int, owner: typing.Any = None) -> None:
+        self.maze = maze
+        self.start = start
+        self.goal = goal
+        self.owner = owner
+        self.future: "Future[typing.Optional[typing.List[Cell]]]" = Future()
+        self.expanded = 0
+        self._restart()
+
+    def _restart(self):
+        self._version = self.maze.version
+        self._g = {self.start: 0}
+        self._parent = {self.start: -1}
+        self._closed: typing.Set[int] = set()
+        self._open = [(self._heuristic(self.start), 0, self.start)]
+
+    def _heuristic(self, index: int) -> int:
+        rows, oracle = self.maze.rows, self.maze.oracle
+        manhattan = abs(index // rows - self.goal // rows) + abs(index % rows - self.goal % rows)
+        return manhattan if oracle is None else max(manhattan, oracle.lower_bound(index, self.goal))
+
+    def advance(self, budget: int) -> int:
+        # expands at most budget nodes, returns how many it did. Resolves the future when it finishes
+        if self.maze.compress_paths:
+            return self._advance_graph()
+        if self.maze.version != self._version: # the walls changed under a half done search
+            self._restart()
+        maze, open_heap, g, parent, closed = self.maze, self._open, self._g, self._parent, self._closed
+        rows, cols, sides, goal = maze.rows, maze.cols, maze.sides, self.goal
+        goal_col, goal_row = divmod(goal, rows)
+        heuristic = self._heuristic if maze.oracle is not None else None
+        expanded = 0
+        while open_heap and expanded < budget:
+            _, neg_g, index = heapq.heappop(open_heap)
+            if index in closed:
+                continue
+            closed.add(index)
+            expanded += 1
+            if index == goal:
+                path = []
+                while index != -1:
+                    path.append(maze.grid[index // rows][index % rows])
+                    index = parent[index]
+                path.reverse()
+                self.future.set_result(path)
+                break
+
+            col, row = divmod(index, rows)
+            open_sides = sides[index]
+            g_score = 1 - neg_g
+            for _, bit, d_col, d_row in STEPS:
+                if not open_sides & bit or not (0 <= col + d_col < cols and 0 <= row + d_row < rows):
+                    continue
+                neighbour = index + d_col * rows + d_row
+                if neighbour not in closed and g_score < g.get(neighbour, g_score + 1):
+                    g[neighbour] = g_score
+                    parent[neighbour] = index
+                    h = heuristic(neighbour) if heuristic else abs(col + d_col - goal_col) + abs(row + d_row - goal_row)
+                    heapq.heappush(open_heap, (g_score + h, -g_score, neighbour))
+        else:
+            if not open_heap:
+                self.future.set_result(None)
+        self.expanded += expanded
+        return expanded
+
+    def _advance_graph(self) -> int:
+        # with the corridors collapsed a whole search costs a handful of nodes, it runs in one go
+        # and counts its junctions against the budget
+        maze = self.maze
+        graph, rows = maze.junction_graph(), maze.rows
+        before = graph.expanded
+        path = graph.find_path(maze.grid[self.start // rows][self.start % rows], maze.grid[self.goal // rows][self.goal % rows])
+        self.future.set_result(path or None)
+        expanded = max(1, graph.expanded - before)
+        self.expanded += expanded
+        return expanded
+
+class PathScheduler:
+    # Spreads A* requests over frames. run() is called once a frame and stops after budget node
+    # expansions, or after budget_us microseconds instead when that is set (the count no longer
+    # applies then), so however many chasers ask at once
+    # the frame pays a bounded amount. The closest start/goal pairs are served first and a
+    # half done search keeps its place. One pending request per owner, asking again replaces it
+    def __init__(self, maze: Maze, budget: int = 500, budget_us: typing.Optional[float] = None) -> None:
+        self.maze = maze
+        self.budget = budget
+        self.budget_us = budget_us
+        self.expanded = 0 # over the scheduler's life, for benchmarks
+        self._heap: typing.List[typing.Tuple[int, int, PathRequest]] = []
+        self._by_owner: typing.Dict[typing.Any, PathRequest] = {}
+        self._order = itertools.count()
+
+    def request(self, start: Cell, goal: Cell, owner: typing.Any = None, callback: typing.Optional[typing.Callable[["Future"], None]] = None) -> "Future[typing.Optional[typing.List[Cell]]]":
+        if owner is not None:
+            self.cancel(owner)
+        maze = self.maze
+        request = PathRequest(maze, maze.index_of(start.pos), maze.index_of(goal.pos), owner = owner)
+        if callback is not None:
+            request.future.add_done_callback(callback)
+        if owner is not None:
+            self._by_owner[owner] = request
+        distance = abs(start.pos[0] - goal.pos[0]) + abs(start.pos[1] - goal.pos[1])
+        heapq.heappush(self._heap, (distance, next(self._order), request))
+        return request.future
+
+    def cancel(self, owner: typing.Any):
+        request = self._by_owner.pop(owner, None)
+        if request is not None:
+            request.future.cancel() # dropped from the heap when run() reaches it
+
+    def run(self) -> int:
+        # one frame's worth of searching, returns the nodes expanded
+        deadline = None if self.budget_us is None else time.perf_counter() + self.budget_us / 1e6
+        spent, heap = 0, self._heap
+        while heap and (deadline is not None or spent < self.budget):
+            request = heap[0][2]
+            if request.future.cancelled():
+                heapq.heappop(heap)
+                continue
+            # under a time budget, check the clock every 64 expansions
+            spent += request.advance(self.budget - spent if deadline is None else 64)
+            if request.future.done():
+                heapq.heappop(heap)
+                if self._by_owner.get(request.owner) is request:
+                    del self._by_owner[request.owner]
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        self.expanded += spent
+        if PROFILER.enabled:
+            PROFILER.count('pathfinder.expanded', spent)
+            PROFILER.count('pathfinder.pending', len(heap))
+        return spent
@@ -0,0 +1,142 @@
+import json
+import time
+import typing
+import threading
+import contextlib
+import collections
+
+__all__ = (
+    "Profiler",
+    "PROFILER"
+)
+
+_NULL = contextlib.nullcontext()
+
+class _Section:
+    # one per `with`, so nested or concurrent sections of the same name each keep their own start
+    __slots__ = ('profiler', 'name', 'started_at')
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.started_at = 0.0
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+
+    def __exit__(self, *_):
+        self.profiler.add_time(self.name, self.started_at, time.perf_counter())
+
+class Profiler:
+    # Frame timings and hot path counters, off unless enabled (F3 in game, --trace on the command line).
+    #
+    # Stages are timed with `with PROFILER.section(name):`, which hands back a shared do-nothing
+    # context while disabled. Hot paths guard their counters with `if PROFILER.enabled:` so all
+    # they pay when off is one attribute check. The last `window` frames are kept for the
+    # rolling percentiles, and with tracing on every section is also recorded as a Chrome trace
+    # event (chrome://tracing, ui.perfetto.dev) for dump_trace().
+    #
+    # With sim_thread the simulation thread adds times and counts while the main thread ends
+    # frames, _lock keeps the per frame totals whole across both.
+    def __init__(self, window: int = 600) -> None:
+        self.enabled = False
+        self.tracing = False
+        self.frames: typing.Deque[float] = collections.deque(maxlen = window)
+        self.section_times: typing.Dict[str, typing.Deque[float]] = {}
+        self.counter_values: typing.Dict[str, typing.Deque[int]] = {}
+        self.events: typing.List[dict] = []
+
+        self._lock = threading.Lock()
+        self._frame_times: typing.Dict[str, float] = collections.defaultdict(float)
+        self._counts: typing.Dict[str, int] = collections.defaultdict(int)
+        self._frame_started_at: typing.Optional[float] = None
+        self._origin = time.perf_counter()
+
+    def enable(self, tracing: bool = False):
+        self.enabled = True
+        self.tracing = self.tracing or tracing
+
+    def disable(self):
+        self.enabled = False
+        self._frame_started_at = None
+
+    def toggle(self):
+        self.disable() if self.enabled else self.enable()
+
+    def reset(self):
+        with self._lock:
+            self.frames.clear()
+            self.section_times.clear()
+            self.counter_values.clear()
+            self.events.clear()
+            self._frame_times.clear()
+            self._counts.clear()
+
+    def section(self, name: str) -> typing.ContextManager:
+        if not self.enabled:
+            return _NULL
+        return _Section(self, name)
+
+    def add_time(self, name: str, started_at: float, ended_at: float):
+        with self._lock:
+            self._frame_times[name] += ended_at - started_at
+            if self.tracing:
+                self.events.append({
+                    'name': name, 'ph': 'X', 'pid': 0, 'tid': threading.get_ident(),
+                    'ts': (started_at - self._origin) * 1e6, 'dur': (ended_at - started_at) * 1e6
+                })
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_started_at = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self._frame_started_at is None:
+            return
+        ended_at = time.perf_counter()
+        self.add_time('frame', self._frame_started_at, ended_at)
+        with self._lock:
+            self.frames.append(ended_at - self._frame_started_at)
+
+            # every name seen so far gets a value for every frame, so means are per frame
+            for name in self._frame_times.keys() | self.section_times.keys():
+                self.section_times.setdefault(name, collections.deque(maxlen = self.frames.maxlen)).append(self._frame_times.get(name, 0.0))
+            for name in self._counts.keys() | self.counter_values.keys():
+                self.counter_values.setdefault(name, collections.deque(maxlen = self.frames.maxlen)).append(self._counts.get(name, 0))
+            self._frame_times.clear()
+            self._counts.clear()
+        self._frame_started_at = None
+
+    def percentile(self, fraction: float) -> float:
+        if not self.frames:
+            return 0.0
+        frames = sorted(self.frames)
+        return frames[min(len(frames) - 1, int(len(frames) * fraction))]
+
+    def summary(self) -> dict:
+        # milliseconds per frame, counters per frame, over the rolling window
+        with self._lock:
+            return {
+                'frames': len(self.frames),
+                'p50_ms': self.percentile(0.5) * 1000,
+                'p99_ms': self.percentile(0.99) * 1000,
+                'sections_ms': {name: sum(times) / len(times) * 1000 for name, times in sorted(self.section_times.items()) if name != 'frame'},
+                'counters': {name: sum(values) / len(values) for name, values in sorted(self.counter_values.items())},
+            }
+
+    def lines(self) -> typing.List[str]:
+        summary = self.summary()
+        lines = ['frame p50 {:.2f} ms  p99 {:.2f} ms  ({} frames)'.format(summary['p50_ms'], summary['p99_ms'], summary['frames'])]
+        lines.extend('{:<16} {:7.3f} ms'.format(name, took) for name, took in summary['sections_ms'].items())
+        lines.extend('{:<16} {:9.1f} /frame'.format(name, value) for name, value in summary['counters'].items())
+        return lines
+
+    def dump_trace(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms', 'otherData': self.summary()}, f)
+
+PROFILER = Profiler()
@@ -0,0 +1,305 @@
+import io
+import json
+import struct
+import typing
+import bisect
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .chunks import ChunkedMaze
+from .sprites import IDK
+
+if typing.TYPE_CHECKING:
+    from game import Game
+
+__all__ = (
+    "REPLAY_VERSION",
+    "ReplayResult",
+    "Recorder",
+    "ReplayPlayer",
+)
+
+# replay file: fixed header, the config the match ran with (seed set to the maze's own), the
+# maze's open side masks (empty for chunked mazes, they come back from the seed), Game.random's
+# state before setup() spawned anything, then records back to back until the match ended:
+#   I  input block, (input bitmask, ticks it was held for) byte pairs, one bitmask per tick
+#   S  snapshot after a tick, for seeking, see _pack_snapshot
+#   E  how the match ended
+# Records are written as they fill up, a recording holds at most one block in memory.
+REPLAY_MAGIC = b'MZRP'
+REPLAY_VERSION = 1
+# magic, version, flags, snapshot_every, config bytes, layout bytes
+HEADER = struct.Struct('<4sHHIII')
+# random.Random.getstate(): the Mersenne Twister words, its position and a cached gauss value
+RNG_STATE = struct.Struct('<625Id')
+HAS_GAUSS = 1
+# tag, payload bytes
+RECORD = struct.Struct('<cI')
+INPUTS, SNAPSHOT, END = b'I', b'S', b'E'
+BLOCK_SIZE = 1024
+
+STATUSES = ('playing', 'won', 'lost')
+# ticks, status, caught_at, has caught_at
+MATCH = struct.Struct('<IBd?')
+# rect x, y, direction x, y, frame_index, previous x, y, has previous, has_collided, moving_to (-1 for none)
+SPRITE = struct.Struct('<iidddii??i')
+
+class ReplayResult(typing.NamedTuple):
+    status: str
+    ticks: int
+    time_to_catch: typing.Optional[float]
+
+def _restorable(app: "Game") -> bool:
+    # the default flow field is rebuilt from the player's cell alone, planners and scheduled
+    # searches keep state between ticks that snapshots don't hold
+    return app.config.get('pathing', 'field') == 'field' and not isinstance(app.maze, ChunkedMaze)
+
+def _pack_sprite(maze, sprite) -> bytes:
+    previous = sprite.previous_pos or (0, 0)
+    moving_to = getattr(sprite, 'moving_to', None)
+    return SPRITE.pack(
+        sprite.rect.x, sprite.rect.y, sprite.direction.x, sprite.direction.y, sprite.frame_index,
+        previous[0], previous[1], sprite.previous_pos is not None, getattr(sprite, 'has_collided', False),
+        -1 if moving_to is None else maze.index_of(moving_to.pos)
+    )
+
+def _unpack_sprite(maze, sprite, data: bytes, offset: int):
+    x, y, direction_x, direction_y, frame_index, previous_x, previous_y, has_previous, has_collided, moving_to = SPRITE.unpack_from(data, offset)
+    sprite.rect.topleft = (x, y)
+    sprite.direction.update(direction_x, direction_y)
+    sprite.frame_index = frame_index
+    sprite.previous_pos = (previous_x, previous_y) if has_previous else None
+    sprite.has_collided = has_collided
+    if isinstance(sprite, IDK):
+        sprite.moving_to = None if moving_to == -1 else maze.grid[moving_to // maze.rows][moving_to % maze.rows]
+
+def _pack_snapshot(app: "Game") -> bytes:
+    # everything update() carries from one tick to the next, sprites in group order
+    parts = [MATCH.pack(app.ticks, STATUSES.index(app.status), app.caught_at or 0.0, app.caught_at is not None)]
+    sprites = app.sprites.sprites()
+    parts.append(struct.pack('<I', len(sprites)))
+    parts.extend(_pack_sprite(app.maze, sprite) for sprite in sprites)
+    swarm = app.swarm
+    if swarm is not None:
+        parts.extend([swarm.position.tobytes(), swarm.previous.tobytes(), swarm.moving_to.astype(numpy.int64).tobytes(), swarm.frame.tobytes(), swarm.facing_right.tobytes()])
+    return b''.join(parts)
+
+def _restore_snapshot(app: "Game", data: bytes):
+    ticks, status, caught_at, has_caught_at = MATCH.unpack_from(data)
+    app.ticks = ticks
+    app.status = STATUSES[status] # type: ignore
+    app.caught_at = caught_at if has_caught_at else None
+    offset = MATCH.size
+    count, = struct.unpack_from('<I', data, offset)
+    offset += 4
+    sprites = app.sprites.sprites()
+    if count != len(sprites):
+        raise ValueError('snapshot has {} sprites, the match has {}'.format(count, len(sprites)))
+    for sprite in sprites:
+        _unpack_sprite(app.maze, sprite, data, offset)
+        offset += SPRITE.size
+    swarm = app.swarm
+    if swarm is not None:
+        n = len(swarm)
+        for name, dtype, size in [('position', numpy.float64, n * 2), ('previous', numpy.float64, n * 2), ('moving_to', numpy.int64, n), ('frame', numpy.float64, n), ('facing_right', numpy.bool_, n)]:
+            array = numpy.frombuffer(data, dtype = dtype, count = size, offset = offset).copy()
+            setattr(swarm, name, array.reshape(getattr(swarm, name).shape))
+            offset += array.nbytes
+    app.maze.update_camera(app.player.rect)
+
+class Recorder:
+    # Game.setup() starts it, Game.read_input() hands it every tick's input and Game.update() a
+    # look after every tick for snapshots and the end of the match
+    def __init__(self, path: str, snapshot_every: int = 600) -> None:
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.file: typing.Optional[typing.BinaryIO] = None
+        self.snapshots = False
+        self._block = bytearray()
+        self._input = -1
+        self._run = 0
+
+    def start(self, app: "Game"):
+        maze = app.maze
+        config = dict(app.config, seed = maze.seed)
+        for key in ['record', 'trace']: # a replay doesn't write files of its own
+            config.pop(key, None)
+        layout = b'' if isinstance(maze, ChunkedMaze) else bytes(maze.sides)
+        version, words, gauss = app.random.getstate()
+        config_bytes = json.dumps(config).encode()
+        self.snapshots = _restorable(app) and self.snapshot_every > 0
+
+        self.file = open(self.path, 'wb')
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, HAS_GAUSS if gauss is not None else 0, self.snapshot_every if self.snapshots else 0, len(config_bytes), len(layout)))
+        self.file.write(config_bytes)
+        self.file.write(layout)
+        self.file.write(RNG_STATE.pack(*words, gauss or 0.0))
+
+    def record(self, pressed: int):
+        # run length coded, a held key costs a byte pair every 255 ticks
+        if pressed == self._input and self._run < 255:
+            self._run += 1
+            return
+        if self._run:
+            self._block += bytes((self._input, self._run))
+            if len(self._block) >= BLOCK_SIZE:
+                self._write(INPUTS, self._block)
+                self._block = bytearray()
+        self._input, self._run = pressed, 1
+
+    def _flush_inputs(self):
+        if self._run:
+            self._block += bytes((self._input, self._run))
+            self._input, self._run = -1, 0
+        if self._block:
+            self._write(INPUTS, self._block)
+            self._block = bytearray()
+
+    def _write(self, tag: bytes, payload: bytes):
+        self.file.write(RECORD.pack(tag, len(payload))) # type: ignore
+        self.file.write(payload) # type: ignore
+
+    def step(self, app: "Game"):
+        if self.file is None:
+            return
+        if app.status != 'playing':
+            self.finish(app)
+        elif self.snapshots and app.ticks % self.snapshot_every == 0:
+            self._flush_inputs()
+            self._write(SNAPSHOT, _pack_snapshot(app))
+            self.file.flush() # a crash loses at most the ticks since the last snapshot
+
+    def finish(self, app: "Game"):
+        # a match stopped early (quit, max_ticks) ends "playing"
+        if self.file is None:
+            return
+        self._flush_inputs()
+        self._write(END, MATCH.pack(app.ticks, STATUSES.index(app.status), app.caught_at or 0.0, app.caught_at is not None))
+        self.file.close()
+        self.file = None
+
+class ReplayPlayer:
+    # Re-simulates a recording in a headless Game, as fast as it steps. The recorded inputs are
+    # read as the ticks need them, seek() restores the last snapshot before the tick it is after
+    # and steps from there. make_game is Game (or anything called like it)
+    def __init__(self, path: str, make_game: typing.Callable[..., "Game"]) -> None:
+        self.path = path
+        self.file = open(path, 'rb')
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError('not a replay: {}'.format(path))
+        magic, version, flags, self.snapshot_every, config_size, layout_size = HEADER.unpack(header)
+        if magic != REPLAY_MAGIC:
+            raise ValueError('not a replay: {}'.format(path))
+        if version != REPLAY_VERSION:
+            raise ValueError('unsupported replay version {} in {}'.format(version, path))
+        self.config = json.loads(self.file.read(config_size))
+        self.layout = self.file.read(layout_size)
+        *words, gauss = RNG_STATE.unpack(self.file.read(RNG_STATE.size))
+        self.rng_state = (3, tuple(words), gauss if flags & HAS_GAUSS else None)
+        self.records_at = self.file.tell()
+
+        # one pass over the record headers: where the snapshots are and how the match ended
+        self.snapshots: typing.List[typing.Tuple[int, int]] = [] # (tick, offset of the record)
+        self.result: typing.Optional[ReplayResult] = None
+        while True:
+            offset = self.file.tell()
+            record = self.file.read(RECORD.size)
+            if len(record) < RECORD.size:
+                break # cut short, the match never got to write its end
+            tag, size = RECORD.unpack(record)
+            if tag == SNAPSHOT:
+                self.snapshots.append((MATCH.unpack(self.file.read(MATCH.size))[0], offset))
+                self.file.seek(offset + RECORD.size + size)
+            elif tag == END:
+                ticks, status, caught_at, has_caught_at = MATCH.unpack(self.file.read(MATCH.size))
+                self.result = ReplayResult(STATUSES[status], ticks, caught_at if has_caught_at else None)
+                break
+            else:
+                self.file.seek(size, io.SEEK_CUR)
+
+        self.game = make_game(self.config, headless = True, controller = self)
+        if self.layout and bytes(self.game.maze.sides) != self.layout: # recorded on a later level or with no seed
+            self.game.load_layout(bytearray(self.layout))
+        self.rewind()
+
+    def rewind(self):
+        game = self.game
+        game.reset_match()
+        game.random.setstate(self.rng_state)
+        game.setup()
+        self._seek_records(self.records_at)
+
+    def _seek_records(self, offset: int):
+        self.file.seek(offset)
+        self._inputs = b''
+        self._position = 0
+        self._left = 0
+        self._ended = False
+
+    def __call__(self, app: "Game") -> int:
+        # the controller of the replayed Game, one recorded bitmask a tick
+        if self._left == 0:
+            while self._position >= len(self._inputs):
+                if self._ended or not self._next_block():
+                    return 0
+            self._input, self._left = self._inputs[self._position], self._inputs[self._position + 1]
+            self._position += 2
+        self._left -= 1
+        return self._input
+
+    def _next_block(self) -> bool:
+        while True:
+            record = self.file.read(RECORD.size)
+            if len(record) < RECORD.size:
+                self._ended = True
+                return False
+            tag, size = RECORD.unpack(record)
+            if tag == INPUTS:
+                self._inputs, self._position = self.file.read(size), 0
+                return True
+            if tag == END:
+                self._ended = True
+                return False
+            self.file.seek(size, io.SEEK_CUR) # snapshots are only read by seek()
+
+    def step(self) -> bool:
+        # one tick, False once the match is over
+        game = self.game
+        if game.status != 'playing':
+            return False
+        game.update(delta_time = game.timestep)
+        return game.status == 'playing'
+
+    def play(self, until: typing.Optional[int] = None) -> "Game":
+        # steps to tick until, or to the end
+        game = self.game
+        while game.status == 'playing' and (until is None or game.ticks < until):
+            game.update(delta_time = game.timestep)
+        return game
+
+    def seek(self, tick: int) -> "Game":
+        game = self.game
+        index = bisect.bisect_right(self.snapshots, (tick, float('inf'))) - 1
+        snapshot_tick = self.snapshots[index][0] if index >= 0 else 0
+        if tick < game.ticks or snapshot_tick > game.ticks:
+            if index >= 0:
+                offset = self.snapshots[index][1]
+                self.file.seek(offset)
+                _, size = RECORD.unpack(self.file.read(RECORD.size))
+                _restore_snapshot(game, self.file.read(size))
+                self._seek_records(offset + RECORD.size + size)
+            else:
+                self.rewind()
+        return self.play(until = tick)
+
+    def matches(self) -> bool:
+        # the replay ended the way the recording did, for turning recordings into regression checks
+        game = self.game
+        return self.result is not None and (game.status, game.ticks, game.caught_at) == tuple(self.result)
+
+    def close(self):
+        self.file.close()
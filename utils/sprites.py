@@ -1,28 +1,57 @@
 import pygame
+import collections
 
 from pygame.sprite import Sprite
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Deque, Optional, Tuple
+
+from .planning import IncrementalPlanner
+from .profiler import PROFILER
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
+
     from game import Game
+    from .maze import Cell
 
 __all__ = (
     "Player",
-    "IDK"
+    "IDK",
+    "INPUT_UP",
+    "INPUT_DOWN",
+    "INPUT_LEFT",
+    "INPUT_RIGHT",
+    "read_keyboard"
 )
 
+# player input is a bitmask so it can come from the keyboard or from a bot
+INPUT_UP = 1
+INPUT_DOWN = 2
+INPUT_LEFT = 4
+INPUT_RIGHT = 8
+
+def read_keyboard(app: "Game") -> int:
+    pressed = pygame.key.get_pressed()
+    return (
+        (INPUT_UP if pressed[pygame.K_UP] else 0) |
+        (INPUT_DOWN if pressed[pygame.K_DOWN] else 0) |
+        (INPUT_LEFT if pressed[pygame.K_LEFT] else 0) |
+        (INPUT_RIGHT if pressed[pygame.K_RIGHT] else 0)
+    )
+
 class Movable(Sprite):
     app: "Game"
     rect: "pygame.Rect"
     direction: "pygame.math.Vector2"
     speed: "int"
+    # where the last fixed step started, frames drawn between steps blend towards rect
+    previous_pos: Optional[Tuple[int, int]] = None
 
     @property
     def face(self):
         return 'right' if self.direction.x > 0 else 'left'
 
     def _reposition(self):
-        width, height = self.app.window_size
+        width, height = self.app.maze.world_size
         x, y, w, h = self.rect
         if x < 0:
             self.rect.x = 0
@@ -43,18 +72,12 @@ class Movable(Sprite):
         if self.direction.magnitude() > 0:
             self.direction = self.direction.normalize()
 
+        # rounded the way Rect rounds, then swept so a long step can't skip over a wall
         new_pos = self.rect.copy()
         new_pos.centerx += self.direction.x * (self.speed * delta_time) # type: ignore
-        if self.app.maze.can_move(self.rect, new_pos):
-            self.rect = new_pos
-        else:
-            self.has_collided = True
-
-        new_pos = self.rect.copy()
         new_pos.centery += self.direction.y * (self.speed * delta_time) # type: ignore
-        if self.app.maze.can_move(self.rect, new_pos):
-            self.rect = new_pos
-        else:
+        self.rect, collided = self.app.maze.slide(self.rect, new_pos.x - self.rect.x, new_pos.y - self.rect.y)
+        if collided:
             self.has_collided = True
         self._reposition()
 
@@ -72,26 +95,26 @@ class Player(Movable):
         super().__init__()
 
     def update(self, delta_time) -> None:
-        pressed = pygame.key.get_pressed()
+        pressed = self.app.read_input()
             
         # Left & right
-        if pressed[pygame.K_RIGHT]:
+        if pressed & INPUT_RIGHT:
             self.direction.x = 1
-        elif pressed[pygame.K_LEFT]:
+        elif pressed & INPUT_LEFT:
             self.direction.x = -1
         else:
             self.direction.x = 0
 
         # Up & Down
-        if pressed[pygame.K_UP]:
+        if pressed & INPUT_UP:
             self.direction.y = -1
-        elif pressed[pygame.K_DOWN]:
+        elif pressed & INPUT_DOWN:
             self.direction.y = 1
         else:
             self.direction.y = 0
         
         self.frame_index += delta_time * 10
-        self.frame_index = self.frame_index if self.frame_index <= len(self.images[self.face]) else 0
+        self.frame_index = self.frame_index if self.frame_index < len(self.images[self.face]) else 0
         self.image = self.images[self.face][int(self.frame_index)]
         self.move(delta_time = delta_time)
 
@@ -109,50 +132,58 @@ class IDK(Movable):
         self.last_updated_at = 0
         self.frame_index = 0
         self.has_collided = False
-        self.times_edited_path = 0
         self.moving_to = None
+        # "field" shares one player rooted BFS between every chaser, which is the cheapest on small
+        # mazes. "incremental" gives each chaser its own search that only grows as the player moves
+        # "scheduled" queues an A* with Game.pathfinder whenever the player changes cell and keeps
+        # walking the last route until the new one comes back
+        self.planner = IncrementalPlanner(app.maze) if app.config.get('pathing') == 'incremental' else None
+        self.route: Deque["Cell"] = collections.deque()
+        self._request: Optional["Future"] = None
+        self._goal: Optional["Cell"] = None
 
-        self.path = []
         super().__init__()
 
+    def follow_route(self, current: "Cell", player_cell: Optional["Cell"]) -> "Cell":
+        if self._request is not None and self._request.done():
+            path, self._request = self._request.result(), None
+            if path is not None and current in path:
+                self.route = collections.deque(path[path.index(current) + 1:])
+            else: # we walked off it while it was searched for, ask again from here
+                self._goal = None
+        # a search still running finishes first, restarting it on every player step would starve far chasers
+        if player_cell is not None and player_cell != self._goal and self._request is None:
+            self._goal = player_cell
+            self._request = self.app.pathfinder.request(current, player_cell, owner = self)
+        return self.route.popleft() if self.route else current
+
     def update_path(self):
-        my_cell = self.app.maze.get_cell(self.rect.center)
-        player_cell = self.app.maze.get_cell(self.app.player.rect.center)
-        prev_path = self.path.copy()
-        updated = False
-        if self.path == [] or self.path[-1] != player_cell:
-            if self.path and player_cell in self.path:
-                del self.path[self.path.index(player_cell) + 1:]
-                return
-            elif self.path and self.times_edited_path < 3:
-                neighbours = self.app.maze.get_neighbours(target_pos = self.path[-1].pos, filter_cant_move = True)
-                if player_cell in neighbours:
-                    self.path.append(player_cell)
-                    self.times_edited_path += 1
-                    return
-            self.times_edited_path = 0
-            self.path = self.app.maze.find_path(
-                my_cell, player_cell
-            )
-            updated = True
-
-        if self.path:
-            if updated and my_cell not in prev_path: # Check if its ald moving to the next cell, so it doesnt move back
-                 self.path.pop(0)
-
-            if self.path[0].rect.center == self.rect.center:
-                self.path.pop(0)
+        # walk cell centre to cell centre, asking for the next hop on arrival
+        if self.moving_to is None or self.moving_to.rect.center == self.rect.center:
+            current = self.moving_to or self.app.maze.get_cell(self.rect.center)
+            player_cell = self.app.maze.get_cell(self.app.player.rect.center)
+            if self.app.pathfinder is not None:
+                self.moving_to = self.follow_route(current, player_cell)
+            else:
+                self.moving_to = (self.planner or self.app.maze).next_step(current, player_cell) or current
 
     def update(self, delta_time):
-        self.update_path()
+        if PROFILER.enabled: # once per chaser per frame, skip even the empty section when off
+            with PROFILER.section('update_path'):
+                self.update_path()
+        else:
+            self.update_path()
         self.direction = pygame.math.Vector2(
-            self.path[0].rect.centerx - self.rect.centerx, self.path[0].rect.centery - self.rect.centery
+            self.moving_to.rect.centerx - self.rect.centerx, self.moving_to.rect.centery - self.rect.centery
         )
 
-        self.move(delta_time = delta_time)
+        if self.direction.magnitude() <= self.speed * delta_time:
+            self.rect.center = self.moving_to.rect.center # don't overshoot the centre
+        else:
+            self.move(delta_time = delta_time)
 
         self.frame_index += delta_time * 5
-        self.frame_index = self.frame_index if self.frame_index <= len(self.images[self.face]) else 0
+        self.frame_index = self.frame_index if self.frame_index < len(self.images[self.face]) else 0
         self.image = self.images[self.face][int(self.frame_index)]
 
 # class Wall(Sprite):
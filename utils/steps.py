@@ -0,0 +1,50 @@
+import time
+import typing
+
+__all__ = (
+    "StepTask",
+    "run_steps",
+)
+
+T = typing.TypeVar('T')
+
+def run_steps(steps: typing.Generator[typing.Any, None, T]) -> T:
+    # all of a step generator at once, its return value is the result
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+class StepTask(typing.Generic[T]):
+    # a step generator (Maze.generation_steps, Maze.search_steps, ...) advanced a slice at a time,
+    # so long work can be spread over frames instead of holding one up
+    def __init__(self, steps: typing.Generator[typing.Any, None, T]) -> None:
+        self.steps = steps
+        self.done = False
+        self.result: typing.Optional[T] = None
+        self.last: typing.Any = None # what the last step yielded, for drawing progress
+        self.count = 0
+
+    def advance(self, max_steps: typing.Optional[int] = None, budget_us: typing.Optional[int] = None) -> bool:
+        # runs until max_steps steps or budget_us microseconds are used up, True once finished
+        deadline = None if budget_us is None else time.perf_counter() + budget_us / 1e6
+        taken = 0
+        while not self.done:
+            try:
+                self.last = next(self.steps)
+            except StopIteration as stop:
+                self.result = stop.value
+                self.done = True
+                break
+            self.count += 1
+            taken += 1
+            if max_steps is not None and taken >= max_steps:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return self.done
+
+    def finish(self) -> T:
+        self.advance()
+        return self.result # type: ignore
@@ -0,0 +1,112 @@
+import typing
+
+import pygame
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .chunks import ChunkedMaze
+from .profiler import PROFILER
+
+if typing.TYPE_CHECKING:
+    from game import Game
+
+__all__ = (
+    "Swarm",
+)
+
+class Swarm:
+    # every minotaur of a match as rows of a few arrays, stepped together instead of one IDK.update each.
+    # They follow the same flow field IDK does, cell centre to cell centre, so like IDK they never
+    # need a wall test: two neighbouring centres are only ever joined through an open side
+    def __init__(self, app: "Game", positions: typing.Sequence[typing.Tuple[int, int]], speed: int = 150) -> None:
+        if numpy is None:
+            raise RuntimeError('swarm mode needs numpy')
+        if isinstance(app.maze, ChunkedMaze):
+            raise TypeError('swarm mode needs the whole flow field, chunked mazes only keep a window of it')
+        maze = app.maze
+        self.app = app
+        self.speed = speed
+        self.images = app.assets['minotaur']
+        self.frames = len(self.images['right'])
+        # the same box IDK collides with, the image is drawn from its top left
+        self.size = numpy.array(self.images['right'][0].get_rect().inflate(-5, -5).size, dtype = float)
+
+        # cell centres in Maze.index_of order
+        self.centres = numpy.array([cell.rect.center for column in maze.grid for cell in column], dtype = float)
+        self.position = numpy.array(positions, dtype = float).reshape(-1, 2)
+        self.previous = self.position.copy()
+        self.moving_to = self.cells()
+        self.frame = numpy.zeros(len(self.position))
+        self.facing_right = numpy.zeros(len(self.position), dtype = bool)
+        # set by Game.interpolated while a frame is drawn between two steps
+        self.alpha = 1.0
+
+        self._next: typing.Optional["numpy.ndarray"] = None
+        self._field_key: typing.Optional[typing.Tuple[int, typing.Any]] = None
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    def cells(self) -> "numpy.ndarray":
+        # the cell index under every chaser, like Maze.get_cell
+        maze = self.app.maze
+        col = ((self.position[:, 0] - maze.offset.x) // maze.cell_size).astype(numpy.int64).clip(0, maze.cols - 1)
+        row = ((self.position[:, 1] - maze.offset.y) // maze.cell_size).astype(numpy.int64).clip(0, maze.rows - 1)
+        return col * maze.rows + row
+
+    def _flow(self, target) -> "numpy.ndarray":
+        # next cell towards target for every cell, a cell with nowhere to go points at itself
+        maze = self.app.maze
+        maze.update_flow_field(target)
+        key = (maze.version, maze.flow_root)
+        if key != self._field_key:
+            self._next = numpy.array(maze.flow_next, dtype = numpy.int64)
+            stuck = self._next == -1
+            self._next[stuck] = numpy.flatnonzero(stuck)
+            self._field_key = key
+        return self._next
+
+    def update(self, delta_time: float):
+        if PROFILER.enabled:
+            PROFILER.count('swarm.chasers', len(self))
+        self.previous[:] = self.position
+        target = self.app.maze.get_cell(self.app.player.rect.center)
+
+        arrived = (self.position == self.centres[self.moving_to]).all(axis = 1)
+        if target is not None and arrived.any():
+            self.moving_to[arrived] = self._flow(target)[self.moving_to[arrived]]
+
+        delta = self.centres[self.moving_to] - self.position
+        distance = numpy.hypot(delta[:, 0], delta[:, 1])
+        step = self.speed * delta_time
+        close = distance <= step # don't overshoot the centre
+        self.position[close] = self.centres[self.moving_to[close]]
+        far = ~close
+        # rounded half up like IDK's Rect, so a swarm chases exactly as fast as sprites do
+        self.position[far] = numpy.floor(self.position[far] + delta[far] * (step / distance[far])[:, None] + 0.5)
+        self.facing_right = delta[:, 0] > 0
+
+        self.frame += delta_time * 5
+        self.frame[self.frame >= self.frames] = 0
+
+    def collides(self, rect: pygame.Rect) -> bool:
+        # Rect.colliderect against every chaser box at once
+        top_left = self.position - self.size // 2
+        bottom_right = top_left + self.size
+        return bool((
+            (top_left[:, 0] < rect.right) & (rect.left < bottom_right[:, 0]) &
+            (top_left[:, 1] < rect.bottom) & (rect.top < bottom_right[:, 1])
+        ).any())
+
+    def draw(self, window: pygame.Surface, camera: pygame.Vector2):
+        position = self.previous + (self.position - self.previous) * self.alpha if self.alpha < 1 else self.position
+        top_left = (position - self.size // 2 - (camera.x, camera.y)).astype(numpy.int64)
+        # chasers funnel into the same corridors and animate in step, identical ones are blitted once
+        sprites = numpy.unique(numpy.column_stack([top_left, self.facing_right, self.frame.astype(numpy.int64)]), axis = 0)
+        left, right = self.images['left'], self.images['right']
+        window.blits([((right if facing_right else left)[frame], (x, y)) for x, y, facing_right, frame in sprites.tolist()], doreturn = False)
+        if PROFILER.enabled:
+            PROFILER.count('blits', len(sprites))
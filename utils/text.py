@@ -0,0 +1,35 @@
+import os
+import typing
+import functools
+
+import pygame
+
+__all__ = (
+    "FONT_PATH",
+    "get_font",
+    "get_sysfont",
+    "render_text",
+    "render_label"
+)
+
+FONT_PATH = os.path.join('assets', 'crisium.ttf')
+
+ColorType = typing.Tuple[int, int, int]
+
+# fonts are parsed once per (path, size), rendered text is kept until it falls out of the LRU
+
+@functools.lru_cache(maxsize = None)
+def get_font(path: str, size: int) -> pygame.font.Font:
+    return pygame.font.Font(path, size)
+
+@functools.lru_cache(maxsize = None)
+def get_sysfont(name: str, size: int) -> pygame.font.Font:
+    return pygame.font.SysFont(name, size)
+
+@functools.lru_cache(maxsize = 256)
+def render_text(text: str, size: int, color: ColorType, path: str = FONT_PATH) -> pygame.Surface:
+    return get_font(path, size).render(text, True, color)
+
+@functools.lru_cache(maxsize = 256)
+def render_label(text: str, size: int, color: ColorType, name: str = 'ariel') -> pygame.Surface:
+    return get_sysfont(name, size).render(text, True, color)